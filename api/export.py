@@ -0,0 +1,142 @@
+# api/export.py
+"""
+Streaming serialisers for the /export endpoints.
+
+Stores hand over an ExportSource: the column list plus a generator of record
+chunks. Each chunk is encoded and yielded before the next one is read, so
+server memory is bounded by the chunk size, whatever the size of the export.
+"""
+import csv
+import io
+import json
+from typing import Iterable, Iterator
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is unavailable without pyarrow
+    pa = pq = None
+
+FORMATS = ("ndjson", "csv", "parquet")
+FORMAT_PATTERN = "^(" + "|".join(FORMATS) + ")$"
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+EXPORT_CHUNK_SIZE = 1000
+
+
+class ExportSource:
+    """Columns and record chunks of one export; `schema` optionally fixes the Parquet column types."""
+
+    def __init__(self, columns: list[str], chunks: Iterable[list[dict]], schema=None):
+        self.columns = columns
+        self.chunks = chunks
+        self.schema = schema
+
+
+def _ndjson(source: ExportSource) -> Iterator[bytes]:
+    for chunk in source.chunks:
+        if orjson is not None:
+            yield b"".join(orjson.dumps(record) + b"\n" for record in chunk)
+        else:
+            yield "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in chunk).encode("utf-8")
+
+
+def _csv(source: ExportSource) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=source.columns, extrasaction="ignore", lineterminator="\n")
+    writer.writeheader()
+    for chunk in source.chunks:
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _Drain(io.RawIOBase):
+    """Write-only sink whose buffered bytes are taken after every row group."""
+
+    def __init__(self):
+        self.parts: list[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def take(self) -> bytes:
+        data, self.parts = b"".join(self.parts), []
+        return data
+
+
+def _arrow_schema(chunk: list[dict], columns: list[str]):
+    """Types inferred per column from the first chunk; columns that are all null there become strings."""
+    fields = []
+    for name in columns:
+        try:
+            kind = pa.array([record.get(name) for record in chunk]).type
+        except (pa.ArrowInvalid, pa.ArrowTypeError):  # mixed types
+            kind = pa.string()
+        fields.append(pa.field(name, pa.string() if pa.types.is_null(kind) else kind))
+    return pa.schema(fields)
+
+
+def _arrow_table(chunk: list[dict], schema):
+    arrays = []
+    for field in schema:
+        values = [record.get(field.name) for record in chunk]
+        try:
+            arrays.append(pa.array(values, type=field.type))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            if not pa.types.is_string(field.type):
+                raise
+            arrays.append(pa.array([None if v is None else str(v) for v in values], type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _parquet(source: ExportSource) -> Iterator[bytes]:
+    sink = _Drain()
+    writer = None
+    schema = source.schema
+    for chunk in source.chunks:
+        if writer is None:
+            schema = schema or _arrow_schema(chunk, source.columns)
+            # Dictionary-encoded pages keep the repeated institution/type strings small
+            writer = pq.ParquetWriter(sink, schema, compression="zstd", use_dictionary=True)
+        writer.write_table(_arrow_table(chunk, schema))
+        yield sink.take()
+    if writer is None:
+        writer = pq.ParquetWriter(sink, schema or _arrow_schema([], source.columns))
+    writer.close()
+    yield sink.take()
+
+
+def stream_export(source: ExportSource, format: str, name: str) -> StreamingResponse:
+    """StreamingResponse encoding `source` as ndjson, csv or parquet."""
+    if format == "parquet" and pq is None:
+        raise HTTPException(status_code=400, detail="Parquet export requires pyarrow to be installed")
+    encode = {"ndjson": _ndjson, "csv": _csv, "parquet": _parquet}[format]
+    return StreamingResponse(
+        encode(source),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{format}"'},
+    )
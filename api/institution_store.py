@@ -0,0 +1,124 @@
+# api/institution_store.py
+"""
+Process-wide, hot-reloading store behind GET /institutions.
+
+sources.json is parsed once and indexed:
+- lower-cased name/type/province per institution,
+- hash indexes on type and province, each pre-ordered by every sort field,
+- a stable presorted ordering of all institutions per sort field.
+
+Reloading on change is handled by SnapshotStore. Queries without a name
+search are answered by slicing a presorted list, so their cost follows the
+page size, not the dataset size.
+"""
+import json
+from typing import Optional, Sequence
+
+from api.export import EXPORT_CHUNK_SIZE, ExportSource
+from api.snapshot_store import SnapshotStore
+
+SORT_FIELDS = ("name", "province", "type")
+
+
+def _lower(value) -> str:
+    return value.lower() if isinstance(value, str) else ""
+
+
+class _Snapshot:
+    """Immutable indexed view of one version of sources.json."""
+
+    def __init__(self, institutions: list[dict]):
+        self.institutions = institutions
+        self.names = [_lower(i.get("name")) for i in institutions]
+
+        positions = range(len(institutions))
+        # sorted() is stable, so ties keep file order like the original handler
+        self.order = {
+            field: sorted(positions, key=lambda p, f=field: _lower(institutions[p].get(f)))
+            for field in SORT_FIELDS
+        }
+        self.rank = {field: self._ranks(order) for field, order in self.order.items()}
+
+        self.by_type = self._index("type")
+        self.by_province = self._index("province")
+
+    @staticmethod
+    def _ranks(order: list[int]) -> list[int]:
+        rank = [0] * len(order)
+        for r, p in enumerate(order):
+            rank[p] = r
+        return rank
+
+    def _index(self, attr: str) -> dict[str, dict[Optional[str], list[int]]]:
+        """value -> {sort field (None = file order) -> positions in that order}."""
+        index: dict[str, dict[Optional[str], list[int]]] = {}
+        for p, inst in enumerate(self.institutions):
+            index.setdefault(_lower(inst.get(attr)), {None: []})[None].append(p)
+        for per_value in index.values():
+            members = set(per_value[None])
+            for field in SORT_FIELDS:
+                per_value[field] = [p for p in self.order[field] if p in members]
+        return index
+
+    def select(self, search, type, province, sort) -> Sequence[int]:
+        """Positions of the matching institutions, in sort order."""
+        sort_field = sort if sort in SORT_FIELDS else None
+        lists = []
+        if type:
+            lists.append(self.by_type.get(type.lower(), {}).get(sort_field, []))
+        if province:
+            lists.append(self.by_province.get(province.lower(), {}).get(sort_field, []))
+
+        if not lists:
+            ordered = self.order[sort_field] if sort_field else range(len(self.institutions))
+        elif len(lists) == 1:
+            ordered = lists[0]
+        else:
+            # Walk the smaller list (already in sort order) and keep members of the other
+            lists.sort(key=len)
+            other = set(lists[1])
+            ordered = [p for p in lists[0] if p in other]
+
+        if search:
+            needle = search.lower()
+            ordered = [p for p in ordered if needle in self.names[p]]
+
+        if sort_field is None and sort:
+            # Fields without a presorted ordering are sorted per request
+            ordered = sorted(ordered, key=lambda p: _lower(self.institutions[p].get(sort)))
+        return ordered
+
+    def query(self, search, type, province, sort, offset, limit) -> tuple[int, list[dict]]:
+        ordered = self.select(search, type, province, sort)
+        page = ordered[offset: offset + limit]
+        return len(ordered), [self.institutions[p] for p in page]
+
+    @property
+    def fields(self) -> list[str]:
+        """Union of record keys in first-seen order (export column order)."""
+        return list(dict.fromkeys(key for inst in self.institutions for key in inst))
+
+
+class InstitutionStore(SnapshotStore):
+    def build(self, raw: bytes) -> _Snapshot:
+        return _Snapshot(json.loads(raw))
+
+    def query(self, search=None, type=None, province=None, sort="name", offset=0, limit=20) -> dict:
+        snap = self.snapshot()
+        if snap is None:
+            return {"total": 0, "results": []}
+        total, results = snap.query(search, type, province, sort, offset, limit)
+        return {"total": total, "results": results}
+
+    def export(self, search=None, type=None, province=None, sort="name", chunk_size=EXPORT_CHUNK_SIZE) -> ExportSource:
+        """Every match, as record chunks generated from one snapshot."""
+        snap = self.snapshot()
+        if snap is None:
+            return ExportSource([], iter(()))
+        ordered = snap.select(search, type, province, sort)
+
+        def chunks():
+            for start in range(0, len(ordered), chunk_size):
+                yield [snap.institutions[p] for p in ordered[start: start + chunk_size]]
+
+        return ExportSource(snap.fields, chunks())
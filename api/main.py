@@ -1,16 +1,31 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 from dotenv import load_dotenv
 import os
+import threading
+
+# Load environment variables (before the routers read DATA_BACKEND)
+load_dotenv()
 
 # Internal imports
-from utils.scheduler import run_scheduler
-from db.db import init_db  # initializes database connection (optional)
-from .routes.institutions import router as institutions_router
-from .routes.programmes import router as programmes_router
+from utils.scheduler import run_scheduler_when_leader  # noqa: E402
+from db.db import init_db  # noqa: E402  initializes database connection (optional)
+from .routes import institutions, programmes  # noqa: E402
+from .routes.institutions import router as institutions_router  # noqa: E402
+from .routes.programmes import router as programmes_router  # noqa: E402
+from .response_cache import ResponseCache  # noqa: E402
+from .metrics import RequestMetrics, metrics_response  # noqa: E402
+
+try:
+    import orjson  # noqa: F401  (faster serialisation of large result pages)
+    DefaultResponse = ORJSONResponse
+except ImportError:
+    DefaultResponse = JSONResponse
+
+# Scheduler lease of this worker (set on startup)
+election = None
 
-# Load environment variables
-load_dotenv()
 
 # --------------------------------------------------
 # FastAPI Initialization
@@ -18,12 +33,22 @@ load_dotenv()
 app = FastAPI(
     title="Institution & Programme API",
     description="API serving universities, TVET colleges, and their programmes",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=DefaultResponse,
 )
 
+
 # --------------------------------------------------
 # Middleware
 # --------------------------------------------------
+# List responses are cached per dataset version (content digest of the data
+# behind each list route), so a scrape publishing new files invalidates them.
+# Added before CORS so cached responses still pass through it.
+cached_versions = {
+    "/institutions/": lambda: institutions.store.version(),
+    "/programmes/": lambda: programmes.store.version(),
+}
+app.add_middleware(ResponseCache, versions=cached_versions)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # For development; restrict in production
@@ -31,6 +56,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Added last, so it is outermost and times cached responses too
+app.add_middleware(RequestMetrics, cached_paths=cached_versions)
+
 
 # --------------------------------------------------
 # Routes
@@ -38,6 +66,7 @@ app.add_middleware(
 app.include_router(institutions_router, prefix="/institutions", tags=["Institutions"])
 app.include_router(programmes_router, prefix="/programmes", tags=["Programmes"])
 
+
 # --------------------------------------------------
 # Root endpoint
 # --------------------------------------------------
@@ -49,6 +78,15 @@ def read_root():
         "environment": os.getenv("ENVIRONMENT", "development")
     }
 
+
+# --------------------------------------------------
+# Metrics (Prometheus text format; see utils/metrics.py)
+# --------------------------------------------------
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    return metrics_response()
+
+
 # --------------------------------------------------
 # Startup and shutdown events
 # --------------------------------------------------
@@ -56,10 +94,10 @@ def read_root():
 def startup_event():
     """
     Runs once when the API starts up.
-    Initializes database, then launches scraper scheduler in background.
+    Initializes database, preloads the data snapshots, then launches scraper scheduler in background.
     """
     print("🚀 Starting up Institution & Programme API...")
-    
+
     # Initialize DB
     try:
         init_db()
@@ -67,10 +105,22 @@ def startup_event():
     except Exception as e:
         print(f"⚠️ Database initialization failed: {e}")
 
-    # Start the scraper scheduler
+    # Warm the in-memory snapshots in the background so startup never waits on them
+    def preload():
+        for store in (institutions.store, programmes.store):
+            if hasattr(store, "snapshot"):
+                try:
+                    store.snapshot()
+                except Exception as e:
+                    print(f"⚠️ Failed to preload {store.path}: {e}")
+
+    threading.Thread(target=preload, name="snapshot-preload", daemon=True).start()
+
+    # Start the scraper scheduler in whichever worker wins the scheduler lease
+    global election
     try:
-        run_scheduler(interval="daily", time_str="02:00")
-        print("⏳ Scheduler started (runs daily at 02:00).")
+        election = run_scheduler_when_leader(interval="daily", time_str="02:00")
+        print("⏳ Scheduler election started (the leader runs daily at 02:00).")
     except Exception as e:
         print(f"⚠️ Failed to start scheduler: {e}")
 
@@ -78,6 +128,9 @@ def startup_event():
 @app.on_event("shutdown")
 def shutdown_event():
     print("🛑 API shutting down...")
+    # Hand the scheduler lease over right away instead of after it expires
+    if election is not None:
+        election.release()
 
 
 # --------------------------------------------------
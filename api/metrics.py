@@ -0,0 +1,66 @@
+# api/metrics.py
+"""
+API request metrics and the GET /metrics endpoint.
+
+RequestMetrics times every HTTP request, including the ones ResponseCache
+answers without reaching a route. The `route` label is the path template
+the router matched ("/programmes/export"), not the raw path, so query
+strings and path parameters never create new series. Routes of an included
+router report their path relative to its prefix, so the prefix is recovered
+from the request path. Responses that no route produced are labelled with
+their path when ResponseCache served them (a fixed set of list paths), and
+"<unmatched>" otherwise.
+"""
+import time
+
+from starlette.responses import Response
+
+from utils.metrics import CONTENT_TYPE, LATENCY_BUCKETS, Counter, Histogram, render
+
+UNMATCHED = "<unmatched>"
+
+REQUEST_DURATION = Histogram("api_request_duration_seconds", "Latency of API requests by route.",
+                             ["method", "route", "status"], buckets=LATENCY_BUCKETS)
+RESPONSE_CACHE = Counter("api_response_cache_requests_total",
+                         "List requests seen by the response cache, by result.", ["result"])
+
+
+class RequestMetrics:
+    """ASGI middleware recording REQUEST_DURATION; add it last so it wraps every other middleware."""
+
+    def __init__(self, app, cached_paths=()):
+        self.app = app
+        self.cached_paths = set(cached_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        status = {"code": 500}
+
+        async def record_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, record_status)
+        finally:
+            REQUEST_DURATION.observe(time.perf_counter() - start, method=method,
+                                     route=self._route(scope), status=status["code"])
+
+    def _route(self, scope) -> str:
+        route, path = scope.get("route"), scope["path"]
+        if route is not None and getattr(route, "path", None):
+            regex = getattr(route, "path_regex", None)
+            for i, char in enumerate(path):
+                if char == "/" and regex is not None and regex.match(path[i:]):
+                    return path[:i] + route.path
+            return route.path
+        return path if path in self.cached_paths else UNMATCHED
+
+
+def metrics_response() -> Response:
+    return Response(render(), media_type=CONTENT_TYPE)
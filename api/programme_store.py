@@ -0,0 +1,220 @@
+# api/programme_store.py
+"""
+Process-wide, hot-reloading columnar store behind GET /programmes.
+
+The catalogue (programmes_clean.feather when published, else the CSV) is
+loaded once into a resident DataFrame, plus:
+- a stable presorted ordering (and rank array) for every column,
+- an inverted index from lower-cased word tokens to row ids,
+- row ids per distinct institution.
+
+Keyword search keeps the route's case-insensitive substring semantics. Every
+word-character run of the keyword must be a substring of some token in a
+matching row. The candidates therefore come from the token index (vocabulary
+entries containing each keyword token, intersected across tokens), and only
+those rows are checked with a plain substring test. Keywords containing
+regex syntax fall back to the original `str.contains` over the resident
+column.
+"""
+import io
+import os
+import re
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from api.export import EXPORT_CHUNK_SIZE, ExportSource, pa
+from api.snapshot_store import SnapshotStore
+from utils.columnar import ARROW_AVAILABLE, columnar_paths, read_frame
+from utils.snapshots import resolve
+
+_TOKEN = re.compile(r"\w+")
+_REGEX_META = set(".^$*+?{}[]\\|()")
+_TOKEN_CACHE_SIZE = 4096
+
+
+def _is_plain(text: str) -> bool:
+    return not (set(text) & _REGEX_META)
+
+
+class _Snapshot:
+    def __init__(self, df: pd.DataFrame):
+        self.df = df.reset_index(drop=True)
+        self.size = len(self.df)
+        self.name_col = next((c for c in ("programme_name", "programme") if c in self.df.columns), None)
+
+        self.order = {}
+        self.rank = {}
+        for col in self.df.columns:
+            order = self.df.sort_values(by=col, kind="mergesort", na_position="last").index.to_numpy()
+            rank = np.empty(self.size, dtype=np.int64)
+            rank[order] = np.arange(self.size)
+            self.order[col] = order
+            self.rank[col] = rank
+        # The default sort "programme_name" orders by whichever name column the file has
+        if self.name_col and "programme_name" not in self.order:
+            self.order["programme_name"] = self.order[self.name_col]
+            self.rank["programme_name"] = self.rank[self.name_col]
+
+        self.names: list[Optional[str]] = []
+        postings: dict[str, list[int]] = {}
+        if self.name_col:
+            for row, value in enumerate(self.df[self.name_col].tolist()):
+                lowered = value.lower() if isinstance(value, str) else None
+                self.names.append(lowered)
+                if lowered:
+                    for token in set(_TOKEN.findall(lowered)):
+                        postings.setdefault(token, []).append(row)
+        self.postings = {token: np.asarray(rows, dtype=np.int64) for token, rows in postings.items()}
+        self._token_rows: dict[str, np.ndarray] = {}
+
+        self.institutions: list[tuple[str, np.ndarray]] = []
+        if "institution" in self.df.columns:
+            codes, uniques = pd.factorize(self.df["institution"])
+            for code, value in enumerate(uniques):
+                if isinstance(value, str):
+                    self.institutions.append((value.lower(), np.flatnonzero(codes == code)))
+
+    # -------------------------
+    # Filters (return sorted row ids)
+    # -------------------------
+    def _rows_containing_token(self, token: str) -> np.ndarray:
+        rows = self._token_rows.get(token)
+        if rows is None:
+            hits = [self.postings[t] for t in self.postings if token in t]
+            rows = np.unique(np.concatenate(hits)) if hits else np.empty(0, dtype=np.int64)
+            if len(self._token_rows) >= _TOKEN_CACHE_SIZE:
+                self._token_rows.clear()
+            self._token_rows[token] = rows
+        return rows
+
+    def keyword_rows(self, keyword: str) -> np.ndarray:
+        if self.name_col is None:
+            return np.empty(0, dtype=np.int64)
+        if not _is_plain(keyword):
+            mask = self.df[self.name_col].str.contains(keyword, case=False, na=False)
+            return np.flatnonzero(mask.to_numpy())
+
+        needle = keyword.lower()
+        tokens = _TOKEN.findall(needle)
+        if tokens:
+            candidates = self._rows_containing_token(tokens[0])
+            for token in tokens[1:]:
+                candidates = np.intersect1d(candidates, self._rows_containing_token(token), assume_unique=True)
+        else:
+            candidates = np.arange(self.size)
+        names = self.names
+        return np.asarray([r for r in candidates.tolist() if names[r] is not None and needle in names[r]], dtype=np.int64)
+
+    def institution_rows(self, institution: str) -> np.ndarray:
+        if not self.institutions:
+            return np.empty(0, dtype=np.int64)
+        if not _is_plain(institution):
+            mask = self.df["institution"].str.contains(institution, case=False, na=False)
+            return np.flatnonzero(mask.to_numpy())
+        needle = institution.lower()
+        hits = [rows for value, rows in self.institutions if needle in value]
+        return np.sort(np.concatenate(hits)) if hits else np.empty(0, dtype=np.int64)
+
+    # -------------------------
+    # Query
+    # -------------------------
+    def filter(self, keyword, institution) -> Optional[np.ndarray]:
+        """Sorted ids of matching rows, or None when there is no filter (all rows)."""
+        rows = None
+        if keyword:
+            rows = self.keyword_rows(keyword)
+        if institution:
+            inst_rows = self.institution_rows(institution)
+            rows = inst_rows if rows is None else np.intersect1d(rows, inst_rows, assume_unique=True)
+        return rows
+
+    def select(self, keyword, institution, sort) -> np.ndarray:
+        """Ids of every matching row, in sort order."""
+        rows = self.filter(keyword, institution)
+        order = self.order.get(sort)
+        if rows is None:
+            return order if order is not None else np.arange(self.size)
+        if order is None:
+            return rows
+        return rows[np.argsort(self.rank[sort][rows])]
+
+    def records(self, rows: np.ndarray) -> list[dict]:
+        records = self.df.iloc[rows].astype(object)
+        records = records.where(records.notna(), None)
+        return records.to_dict(orient="records")
+
+    def query(self, keyword, institution, sort, offset, limit) -> tuple[int, list[dict]]:
+        rows = self.filter(keyword, institution)
+        order = self.order.get(sort)
+        end = offset + limit
+        if rows is None:
+            total = self.size
+            page = order[offset:end] if order is not None else np.arange(offset, min(end, total))
+        else:
+            total = len(rows)
+            if order is None or total == 0:
+                page = rows[offset:end]
+            else:
+                ranks = self.rank[sort][rows]
+                if end < total:
+                    # Only the first `end` rows in sort order are needed
+                    top = np.argpartition(ranks, end - 1)[:end]
+                    page = rows[top[np.argsort(ranks[top])]][offset:end]
+                else:
+                    page = rows[np.argsort(ranks)][offset:end]
+        return total, self.records(page)
+
+
+class ProgrammeStore(SnapshotStore):
+    """
+    Serves the Feather copy of the catalogue when one is published (memory-
+    mapped, dictionary-encoded strings kept as categoricals), else the CSV.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.csv_path = path
+        self.feather_path = columnar_paths(path)[1] if ARROW_AVAILABLE else None
+
+    def current_path(self) -> str:
+        # A change of file changes the stat key, which triggers a reload
+        if self.feather_path:
+            feather_path = resolve(self.feather_path)
+            if os.path.exists(feather_path):
+                return feather_path
+        return resolve(self.csv_path)
+
+    def load(self, path: str) -> _Snapshot:
+        if path.endswith(".feather"):
+            return _Snapshot(read_frame(path))
+        return super().load(path)
+
+    def build(self, raw: bytes) -> _Snapshot:
+        try:
+            df = pd.read_csv(io.BytesIO(raw))
+        except pd.errors.EmptyDataError:
+            df = pd.DataFrame()
+        return _Snapshot(df)
+
+    def query(self, keyword=None, institution=None, sort="programme_name", offset=0, limit=20) -> dict:
+        snap = self.snapshot()
+        if snap is None:
+            return {"total": 0, "results": []}
+        total, results = snap.query(keyword, institution, sort, offset, limit)
+        return {"total": total, "results": results}
+
+    def export(self, keyword=None, institution=None, sort="programme_name", chunk_size=EXPORT_CHUNK_SIZE) -> ExportSource:
+        """Every match, as record chunks generated from one snapshot."""
+        snap = self.snapshot()
+        if snap is None:
+            return ExportSource([], iter(()))
+        rows = snap.select(keyword, institution, sort)
+
+        def chunks():
+            for start in range(0, len(rows), chunk_size):
+                yield snap.records(rows[start: start + chunk_size])
+
+        schema = pa.Schema.from_pandas(snap.df, preserve_index=False) if pa is not None else None
+        return ExportSource(list(snap.df.columns), chunks(), schema)
@@ -0,0 +1,168 @@
+# api/response_cache.py
+"""
+Response cache for the list endpoints, keyed on dataset version + query.
+
+A response is a pure function of the published data and the normalized query
+string. The dataset version (the content digest of the data file backing a
+path) is part of both the cache key and the ETag. So:
+- a conditional request whose If-None-Match still matches gets a 304 without
+  touching the handler,
+- repeat queries are served from memory, compressed once per encoding,
+- publishing new data changes the version, and that path's entries are
+  dropped on the next request.
+"""
+import gzip
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Optional
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+from api.metrics import RESPONSE_CACHE
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+MAX_ENTRIES = 1024          # per path
+MAX_BODY_BYTES = 1 << 20    # larger responses are passed through uncached
+MIN_COMPRESS_BYTES = 1024   # smaller bodies are not worth compressing
+CACHE_CONTROL = "no-cache"  # clients may store, but must revalidate (cheap 304s)
+
+
+class _Entry:
+    def __init__(self, body: bytes, content_type: str):
+        self.content_type = content_type
+        self.bodies = {"identity": body}
+
+    def body(self, encoding: str) -> tuple[str, bytes]:
+        """Body in the requested encoding, compressing on first use; falls back to identity for small bodies."""
+        identity = self.bodies["identity"]
+        if encoding == "identity" or len(identity) < MIN_COMPRESS_BYTES:
+            return "identity", identity
+        if encoding not in self.bodies:
+            if encoding == "br":
+                self.bodies[encoding] = brotli.compress(identity, quality=5)
+            else:
+                self.bodies[encoding] = gzip.compress(identity, compresslevel=6, mtime=0)
+        return encoding, self.bodies[encoding]
+
+
+def _negotiate(accept_encoding: str) -> str:
+    offered = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+    if brotli is not None and "br" in offered:
+        return "br"
+    if "gzip" in offered:
+        return "gzip"
+    return "identity"
+
+
+def _etag_matches(if_none_match: str, tag: str) -> bool:
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        candidate = candidate.removeprefix("W/").strip('"')
+        if candidate.split("-", 1)[0] == tag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """
+    ASGI middleware caching successful GET responses for the given paths.
+
+    `versions` maps a path to a callable returning the current dataset
+    version for it, or None when there is no data (the request then passes
+    straight through). The callables run in the threadpool, since one may
+    reload a snapshot. Paths match exactly, so streamed exports next to
+    the list routes are never buffered.
+    """
+
+    def __init__(self, app, versions: dict[str, Callable[[], Optional[str]]], max_entries: int = MAX_ENTRIES):
+        self.app = app
+        self.versions = versions
+        self.max_entries = max_entries
+        self.entries: dict[str, tuple[str, OrderedDict]] = {}
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0}
+
+    async def __call__(self, scope, receive, send):
+        path = scope["path"] if scope["type"] == "http" and scope["method"] == "GET" else None
+        if path not in self.versions:
+            return await self.app(scope, receive, send)
+        version = await run_in_threadpool(self.versions[path])
+        if version is None:
+            return await self.app(scope, receive, send)
+
+        query = urlencode(sorted(parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)))
+        key = f"{scope['path']}?{query}"
+        tag = hashlib.sha256(f"{version}\0{key}".encode()).hexdigest()[:32]
+        headers = Headers(scope=scope)
+
+        if _etag_matches(headers.get("if-none-match", ""), tag):
+            self.stats["not_modified"] += 1
+            RESPONSE_CACHE.inc(result="not_modified")
+            await send({"type": "http.response.start", "status": 304, "headers": self._headers(tag, None)})
+            return await send({"type": "http.response.body", "body": b""})
+
+        cached_version, entries = self.entries.get(path, (None, None))
+        if cached_version != version:
+            entries = OrderedDict()
+            self.entries[path] = (version, entries)
+
+        entry = entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            RESPONSE_CACHE.inc(result="miss")
+            entry = await self._fill(scope, receive, send)
+            if entry is None:
+                return
+            entries[key] = entry
+            if len(entries) > self.max_entries:
+                entries.popitem(last=False)
+        else:
+            self.stats["hits"] += 1
+            RESPONSE_CACHE.inc(result="hit")
+            entries.move_to_end(key)
+
+        encoding, body = entry.body(_negotiate(headers.get("accept-encoding", "")))
+        response_headers = self._headers(tag, encoding) + [
+            (b"content-type", entry.content_type.encode("latin-1")),
+            (b"content-length", str(len(body)).encode()),
+        ]
+        if encoding != "identity":
+            response_headers.append((b"content-encoding", encoding.encode()))
+        await send({"type": "http.response.start", "status": 200, "headers": response_headers})
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    def _headers(tag: str, encoding: Optional[str]) -> list[tuple[bytes, bytes]]:
+        # Strong ETags differ per content-coding; any coding of the same tag revalidates
+        etag = f'"{tag}"' if encoding in (None, "identity") else f'"{tag}-{encoding}"'
+        return [
+            (b"etag", etag.encode()),
+            (b"cache-control", CACHE_CONTROL.encode()),
+            (b"vary", b"Accept-Encoding"),
+        ]
+
+    async def _fill(self, scope, receive, send) -> Optional[_Entry]:
+        """Run the handler; return a cacheable entry, or replay the response as-is and return None."""
+        messages = []
+
+        async def capture(message):
+            messages.append(message)
+
+        await self.app(scope, receive, capture)
+
+        start = messages[0]
+        body = b"".join(m.get("body", b"") for m in messages[1:])
+        content_type = Headers(raw=start["headers"]).get("content-type", "")
+        if start["status"] == 200 and content_type.startswith("application/json") and len(body) <= MAX_BODY_BYTES:
+            return _Entry(body, content_type)
+
+        for message in messages:
+            await send(message)
+        return None
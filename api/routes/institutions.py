@@ -1,12 +1,22 @@
 from fastapi import APIRouter, Query
-import json
 import os
+from api.institution_store import InstitutionStore
+from api.export import FORMAT_PATTERN, stream_export
 
 router = APIRouter()
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data")
 SOURCES_FILE = os.path.join(DATA_DIR, "sources.json")
 
+# Loaded once per process, reloaded when sources.json changes;
+# DATA_BACKEND=sqlite queries the database (db/db.py) instead
+if os.getenv("DATA_BACKEND", "files") == "sqlite":
+    from db.db import InstitutionTable
+    store = InstitutionTable()
+else:
+    store = InstitutionStore(SOURCES_FILE)
+
+
 @router.get("/")
 def list_institutions(
     limit: int = Query(20, ge=1, le=100, description="Number of results to return"),
@@ -17,27 +27,17 @@ def list_institutions(
     province: str = Query(None, description="Filter by province")
 ):
     """List institutions with pagination, filtering, and sorting."""
-    if not os.path.exists(SOURCES_FILE):
-        return {"total": 0, "results": []}
-
-    with open(SOURCES_FILE, "r", encoding="utf-8") as f:
-        institutions = json.load(f)
-
-    # Optional filters
-    if search:
-        institutions = [i for i in institutions if search.lower() in i["name"].lower()]
-    if type:
-        institutions = [i for i in institutions if i.get("type", "").lower() == type.lower()]
-    if province:
-        institutions = [i for i in institutions if i.get("province", "").lower() == province.lower()]
-
-    # Sorting
-    try:
-        institutions = sorted(institutions, key=lambda x: x.get(sort, "").lower())
-    except KeyError:
-        pass
+    return store.query(search=search, type=type, province=province, sort=sort, offset=offset, limit=limit)
 
-    total = len(institutions)
-    institutions = institutions[offset: offset + limit]
 
-    return {"total": total, "results": institutions}
+@router.get("/export")
+def export_institutions(
+    format: str = Query("ndjson", pattern=FORMAT_PATTERN, description="ndjson | csv | parquet"),
+    sort: str = Query("name", description="Sort by field: name | province | type"),
+    search: str = Query(None, description="Search by institution name"),
+    type: str = Query(None, description="Filter by type: University | TVET"),
+    province: str = Query(None, description="Filter by province")
+):
+    """Stream every matching institution in one response."""
+    source = store.export(search=search, type=type, province=province, sort=sort)
+    return stream_export(source, format, "institutions")
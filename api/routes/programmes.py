@@ -1,12 +1,22 @@
 from fastapi import APIRouter, Query
-import pandas as pd
 import os
+from api.programme_store import ProgrammeStore
+from api.export import FORMAT_PATTERN, stream_export
 
 router = APIRouter()
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data")
 PROGRAMMES_FILE = os.path.join(DATA_DIR, "programmes_clean.csv")
 
+# Loaded once per process, reloaded when programmes_clean.csv changes;
+# DATA_BACKEND=sqlite queries the database (db/db.py) instead
+if os.getenv("DATA_BACKEND", "files") == "sqlite":
+    from db.db import ProgrammeTable
+    store = ProgrammeTable()
+else:
+    store = ProgrammeStore(PROGRAMMES_FILE)
+
+
 @router.get("/")
 def list_programmes(
     keyword: str = Query(None, description="Search by programme name or description"),
@@ -16,22 +26,16 @@ def list_programmes(
     sort: str = Query("programme_name", description="Sort by field name (e.g. programme_name, level, faculty)")
 ):
     """List programmes with pagination, filtering, and sorting."""
-    if not os.path.exists(PROGRAMMES_FILE):
-        return {"total": 0, "results": []}
-
-    df = pd.read_csv(PROGRAMMES_FILE)
-
-    # Filtering
-    if keyword:
-        df = df[df["programme_name"].str.contains(keyword, case=False, na=False)]
-    if institution:
-        df = df[df["institution"].str.contains(institution, case=False, na=False)]
-
-    # Sorting
-    if sort in df.columns:
-        df = df.sort_values(by=sort, ascending=True)
+    return store.query(keyword=keyword, institution=institution, sort=sort, offset=offset, limit=limit)
 
-    total = len(df)
-    df = df.iloc[offset: offset + limit]
 
-    return {"total": total, "results": df.to_dict(orient="records")}
+@router.get("/export")
+def export_programmes(
+    format: str = Query("ndjson", pattern=FORMAT_PATTERN, description="ndjson | csv | parquet"),
+    keyword: str = Query(None, description="Search by programme name or description"),
+    institution: str = Query(None, description="Filter by institution name"),
+    sort: str = Query("programme_name", description="Sort by field name (e.g. programme_name, level, faculty)")
+):
+    """Stream every matching programme in one response."""
+    source = store.export(keyword=keyword, institution=institution, sort=sort)
+    return stream_export(source, format, "programmes")
@@ -0,0 +1,470 @@
+# db/db.py
+"""
+SQLite storage for institutions and programmes.
+
+The database runs in WAL mode, so API readers never block on (or get blocked
+by) the scraper manager writing a batch. Writes go through batched
+`executemany` upserts: institutions are keyed on their name, programmes on
+a hash of the full cleaned row, so rows that differ only in, say, duration
+or faculty are kept apart just as in programmes_clean.csv. Each row also
+keeps its full record as JSON, so the API returns exactly the fields the
+scrapers produced.
+
+Set DATA_BACKEND=sqlite to have the API routes query this database instead
+of data/sources.json and data/programmes_clean.csv.
+"""
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from itertools import islice
+from typing import Iterable, Optional
+
+import pandas as pd
+
+from utils.logger import setup_logger
+
+logger = setup_logger("db")
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+DB_DIR = os.path.dirname(__file__)
+SCHEMA_FILE = os.path.join(DB_DIR, "schema.sql")
+SEED_FILE = os.path.join(DB_DIR, "seed_institutions.csv")
+SOURCES_FILE = os.path.join(DATA_DIR, "sources.json")
+PROGRAMMES_CLEAN_FILE = os.path.join(DATA_DIR, "programmes_clean.csv")
+
+DB_PATH = os.getenv("DB_PATH", os.path.join(DATA_DIR, "uniapply.sqlite"))
+BATCH_SIZE = 1000
+
+# Columns stored outside the JSON record, usable for filtering and ORDER BY
+INSTITUTION_COLUMNS = ("name", "type", "province", "url")
+PROGRAMME_COLUMNS = ("institution", "source_institution", "programme", "programme_type", "programme_key")
+# The API's default sort; the column is called "programme" (as in api/programme_store.py)
+PROGRAMME_SORT_ALIASES = {"programme_name": "programme"}
+
+# Columns added after the first schema; CREATE TABLE IF NOT EXISTS does not add them to older databases
+ADDED_COLUMNS = {
+    "institutions": [("entity_id", "INTEGER")],
+    "programmes": [("institution_id", "INTEGER")],
+}
+ADDED_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_institutions_entity ON institutions (entity_id)",
+    "CREATE INDEX IF NOT EXISTS idx_programmes_institution_id ON programmes (institution_id)",
+]
+
+_local = threading.local()
+
+
+# -------------------------
+# Connections
+# -------------------------
+def connect(path: Optional[str] = None) -> sqlite3.Connection:
+    """
+    Open a connection with WAL journaling and a generous busy timeout.
+
+    Connections may be handed between threads (streamed exports are read
+    from the threadpool), but are never used by two threads at once.
+    """
+    path = path or DB_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def get_connection(path: Optional[str] = None) -> sqlite3.Connection:
+    """Per-thread cached connection, for request handlers."""
+    path = path or DB_PATH
+    conns = _local.__dict__.setdefault("conns", {})
+    if path not in conns:
+        conns[path] = connect(path)
+    return conns[path]
+
+
+def _batches(rows: Iterable, size: int = BATCH_SIZE):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def _text(value) -> str:
+    if value is None or (isinstance(value, float) and value != value):
+        return ""
+    return str(value).strip()
+
+
+def _int(value) -> Optional[int]:
+    """Integer ID from a record or CSV cell; None when blank."""
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _record(row: dict) -> dict:
+    """Row with NaN replaced by None so it serialises as JSON null."""
+    return {k: (None if isinstance(v, float) and v != v else v) for k, v in row.items()}
+
+
+# -------------------------
+# Schema and seeding
+# -------------------------
+def _has_data(path: str) -> bool:
+    return os.path.exists(path) and os.path.getsize(path) > 0
+
+
+def _row_hash(record: dict) -> str:
+    """Key of a cleaned programme row: every column, independent of column order."""
+    return hashlib.sha1(json.dumps(record, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def init_db(path: Optional[str] = None) -> None:
+    """
+    Create the schema, backfill a fresh database from the existing data
+    files, then add any seed institutions that are still missing.
+    """
+    conn = connect(path)
+    try:
+        _create_schema(conn)
+        migrate(conn)
+
+        if _has_data(SOURCES_FILE) and not conn.execute("SELECT 1 FROM institutions LIMIT 1").fetchone():
+            with open(SOURCES_FILE, "r", encoding="utf-8") as f:
+                written = upsert_institutions(json.load(f), conn=conn)
+            logger.info(f"Loaded {written} institutions from {SOURCES_FILE}")
+
+        seeded = seed_institutions(conn)
+        if seeded:
+            logger.info(f"Seeded {seeded} institutions from {SEED_FILE}")
+
+        if _has_data(PROGRAMMES_CLEAN_FILE) and not conn.execute("SELECT 1 FROM programmes LIMIT 1").fetchone():
+            written = load_programmes_csv(PROGRAMMES_CLEAN_FILE, conn=conn)
+            logger.info(f"Loaded {written} programmes from {PROGRAMMES_CLEAN_FILE}")
+    finally:
+        conn.close()
+
+
+def _create_schema(conn: sqlite3.Connection) -> None:
+    with open(SCHEMA_FILE, "r", encoding="utf-8") as f:
+        conn.executescript(f.read())
+
+
+def migrate(conn: sqlite3.Connection) -> None:
+    """
+    Add the columns and indexes that databases created before them are missing.
+
+    Programmes used to be unique on (institution, programme, programme_type),
+    which merged rows differing in any other column. SQLite cannot drop that
+    constraint, so such a table is dropped and created again; it only mirrors
+    programmes_clean.csv, and init_db reloads it from there.
+    """
+    if "row_hash" not in {row["name"] for row in conn.execute("PRAGMA table_info(programmes)")}:
+        with conn:
+            conn.execute("DROP TABLE programmes")
+            conn.execute("DROP TABLE IF EXISTS programmes_fts")
+        _create_schema(conn)
+        logger.info("Recreated the programmes table keyed on row_hash")
+    with conn:
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+            for column, decl in columns:
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+                    logger.info(f"Added column {table}.{column}")
+        for statement in ADDED_INDEXES:
+            conn.execute(statement)
+
+
+def seed_institutions(conn: sqlite3.Connection, seed_file: str = SEED_FILE) -> int:
+    """Insert seed institutions that are not in the database yet; scraped records are never overwritten."""
+    if not os.path.exists(seed_file):
+        return 0
+    with open(seed_file, "r", encoding="utf-8", newline="") as f:
+        rows = [row for row in csv.DictReader(f) if _text(row.get("name"))]
+
+    before = conn.total_changes
+    with conn:
+        for batch in _batches(rows):
+            conn.executemany(
+                "INSERT INTO institutions (name, name_key, type, province, url, data) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (name_key) DO NOTHING",
+                [(_text(r["name"]), _text(r["name"]).lower(), _text(r.get("type")), _text(r.get("province")),
+                  _text(r.get("url")), json.dumps({k: _text(v) for k, v in r.items()}, ensure_ascii=False))
+                 for r in batch],
+            )
+    return conn.total_changes - before
+
+
+# -------------------------
+# Bulk upserts
+# -------------------------
+def upsert_institutions(institutions: Iterable[dict], conn: Optional[sqlite3.Connection] = None) -> int:
+    """
+    Insert or update institutions by lower-cased name; unchanged records are left untouched.
+
+    A record's stable "id" (utils/entities.py) is stored as entity_id.
+    """
+    conn = conn or get_connection()
+    before = conn.total_changes
+    with conn:
+        for batch in _batches(institutions):
+            conn.executemany(
+                "INSERT INTO institutions (name, name_key, type, province, url, data, entity_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (name_key) DO UPDATE SET name = excluded.name, type = excluded.type, "
+                "province = excluded.province, url = excluded.url, data = excluded.data, "
+                "entity_id = excluded.entity_id, updated_at = datetime('now') "
+                "WHERE institutions.data != excluded.data",
+                [(_text(i["name"]), _text(i["name"]).lower(), _text(i.get("type")), _text(i.get("province")),
+                  _text(i.get("url")), json.dumps(_record(i), ensure_ascii=False), _int(i.get("id"))) for i in batch],
+            )
+    return conn.total_changes - before
+
+
+def _upsert_programme_batch(conn: sqlite3.Connection, batch: list[dict]) -> int:
+    records = [_record(row) for row in batch]
+    params = [
+        (*(_text(record.get(col)) for col in PROGRAMME_COLUMNS), json.dumps(record, ensure_ascii=False),
+         _row_hash(record), _int(record.get("institution_id")))
+        for record in records
+    ]
+    # Equal hashes mean equal rows; only the JSON's column order can have changed
+    conn.executemany(
+        "INSERT INTO programmes (institution, source_institution, programme, programme_type, programme_key, data, "
+        "row_hash, institution_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (row_hash) DO UPDATE SET data = excluded.data, updated_at = datetime('now') "
+        "WHERE programmes.data != excluded.data",
+        params,
+    )
+    conn.executemany("INSERT OR IGNORE INTO temp.loaded_programmes VALUES (?)", [(p[6],) for p in params])
+    return len(params)
+
+
+def sync_programmes(
+    rows: Iterable[dict],
+    institutions: Optional[Iterable[str]] = None,
+    conn: Optional[sqlite3.Connection] = None,
+) -> int:
+    """
+    Upsert programme rows in batches and delete the rows that were not in the input.
+
+    With `institutions`, only rows whose source_institution is listed are in
+    scope; everything else is left alone. Without it, the input replaces the
+    whole table. Runs as one transaction, so readers see either the old or
+    the new catalogue. Returns the number of rows loaded.
+    """
+    conn = conn or get_connection()
+    scope = json.dumps(sorted(institutions)) if institutions is not None else None
+    loaded = 0
+    with conn:
+        conn.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS loaded_programmes (row_hash TEXT PRIMARY KEY) WITHOUT ROWID"
+        )
+        conn.execute("DELETE FROM temp.loaded_programmes")
+        for batch in _batches(rows):
+            loaded += _upsert_programme_batch(conn, batch)
+        removed = conn.execute(
+            "DELETE FROM programmes WHERE (? IS NULL OR source_institution IN (SELECT value FROM json_each(?))) "
+            "AND row_hash NOT IN (SELECT row_hash FROM temp.loaded_programmes)",
+            (scope, scope),
+        ).rowcount
+        conn.execute("DELETE FROM temp.loaded_programmes")
+    if removed:
+        logger.info(f"Removed {removed} programmes no longer listed")
+    return loaded
+
+
+def load_programmes_csv(
+    path: str = PROGRAMMES_CLEAN_FILE,
+    institutions: Optional[Iterable[str]] = None,
+    conn: Optional[sqlite3.Connection] = None,
+    chunksize: int = 50_000,
+) -> int:
+    """Stream a cleaned programmes CSV into the database (see sync_programmes)."""
+    names = set(institutions) if institutions is not None else None
+
+    def rows():
+        try:
+            chunks = pd.read_csv(path, chunksize=chunksize)
+            for chunk in chunks:
+                if names is not None:
+                    if "source_institution" not in chunk.columns:
+                        continue
+                    chunk = chunk[chunk["source_institution"].isin(names)]
+                yield from chunk.astype(object).to_dict(orient="records")
+        except pd.errors.EmptyDataError:
+            return
+
+    return sync_programmes(rows(), institutions=names, conn=conn)
+
+
+# -------------------------
+# Queries
+# -------------------------
+def _sort_expr(sort: str, columns: tuple, params: list) -> str:
+    """A real column, or the field pulled from the JSON record for anything else."""
+    if sort in columns:
+        return sort
+    params.append(f'$."{sort}"')
+    return "json_extract(data, ?)"
+
+
+def _institution_filter(search=None, type=None, province=None) -> tuple[str, list]:
+    where, params = [], []
+    if search:
+        where.append("instr(lower(name), ?) > 0")
+        params.append(search.lower())
+    if type:
+        where.append("type = ? COLLATE NOCASE")
+        params.append(type)
+    if province:
+        where.append("province = ? COLLATE NOCASE")
+        params.append(province)
+    return ("WHERE " + " AND ".join(where)) if where else "", params
+
+
+def _institution_order(sort: str, params: list) -> str:
+    return f"lower(coalesce({_sort_expr(sort, INSTITUTION_COLUMNS, params)}, '')), id"
+
+
+def _programme_filter(keyword=None, institution=None) -> tuple[str, list]:
+    """
+    Keywords of three or more characters are answered by the trigram FTS
+    index; shorter ones scan the programme column. Keywords are matched
+    literally (no regex).
+    """
+    where, params = [], []
+    if keyword:
+        if len(keyword) >= 3:
+            where.append("id IN (SELECT rowid FROM programmes_fts WHERE programmes_fts MATCH ?)")
+            params.append('"' + keyword.replace('"', '""') + '"')
+        else:
+            where.append("instr(lower(programme), ?) > 0")
+            params.append(keyword.lower())
+    if institution:
+        where.append("instr(lower(institution), ?) > 0")
+        params.append(institution.lower())
+    return ("WHERE " + " AND ".join(where)) if where else "", params
+
+
+def _programme_order(sort: str, params: list) -> str:
+    sort = PROGRAMME_SORT_ALIASES.get(sort, sort)
+    return f"{_sort_expr(sort, PROGRAMME_COLUMNS, params)} NULLS LAST, id"
+
+
+def _page(conn, table: str, clause: str, params: list, order: str, order_params: list, offset: int, limit: int) -> dict:
+    total = conn.execute(f"SELECT count(*) FROM {table} {clause}", params).fetchone()[0]
+    rows = conn.execute(
+        f"SELECT data FROM {table} {clause} ORDER BY {order} LIMIT ? OFFSET ?",
+        params + order_params + [limit, offset],
+    ).fetchall()
+    return {"total": total, "results": [json.loads(r["data"]) for r in rows]}
+
+
+def query_institutions(conn, search=None, type=None, province=None, sort="name", offset=0, limit=20) -> dict:
+    """Same filters and ordering as GET /institutions over sources.json."""
+    clause, params = _institution_filter(search, type, province)
+    order_params = []
+    order = _institution_order(sort, order_params)
+    return _page(conn, "institutions", clause, params, order, order_params, offset, limit)
+
+
+def query_programmes(conn, keyword=None, institution=None, sort="programme_name", offset=0, limit=20) -> dict:
+    """Same filters and ordering as GET /programmes over programmes_clean.csv (see _programme_filter)."""
+    clause, params = _programme_filter(keyword, institution)
+    order_params = []
+    order = _programme_order(sort, order_params)
+    return _page(conn, "programmes", clause, params, order, order_params, offset, limit)
+
+
+# -------------------------
+# Streaming exports
+# -------------------------
+def _columns(conn, table: str) -> list[str]:
+    """Record keys across the table, roughly in first-seen order."""
+    rows = conn.execute(
+        f"SELECT j.key FROM {table} t, json_each(t.data) j GROUP BY j.key ORDER BY min(t.id), min(j.id)"
+    ).fetchall()
+    return [r[0] for r in rows]
+
+
+def _export(path: Optional[str], table: str, clause: str, params: list, order: str, chunk_size: int):
+    """Columns plus a generator of record chunks read through one cursor (one read snapshot)."""
+    conn = connect(path)
+    columns = _columns(conn, table)
+
+    def chunks():
+        try:
+            cursor = conn.execute(f"SELECT data FROM {table} {clause} ORDER BY {order}", params)
+            while rows := cursor.fetchmany(chunk_size):
+                yield [json.loads(r["data"]) for r in rows]
+        finally:
+            conn.close()
+
+    return columns, chunks()
+
+
+def export_institutions(path=None, search=None, type=None, province=None, sort="name", chunk_size=BATCH_SIZE):
+    clause, params = _institution_filter(search, type, province)
+    order = _institution_order(sort, params)
+    return _export(path, "institutions", clause, params, order, chunk_size)
+
+
+def export_programmes(path=None, keyword=None, institution=None, sort="programme_name", chunk_size=BATCH_SIZE):
+    clause, params = _programme_filter(keyword, institution)
+    order = _programme_order(sort, params)
+    return _export(path, "programmes", clause, params, order, chunk_size)
+
+
+def data_version(path: Optional[str] = None) -> Optional[str]:
+    """Changes whenever a write lands (database or WAL file touched); None if there is no database."""
+    path = path or DB_PATH
+    parts = []
+    for name in (path, path + "-wal"):
+        try:
+            st = os.stat(name)
+        except FileNotFoundError:
+            if name == path:
+                return None
+            continue
+        parts.append(f"{st.st_mtime_ns}:{st.st_size}")
+    return "-".join(parts)
+
+
+class InstitutionTable:
+    """Database-backed stand-in for api.institution_store.InstitutionStore."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+
+    def query(self, **filters) -> dict:
+        return query_institutions(get_connection(self.path), **filters)
+
+    def export(self, **filters):
+        from api.export import ExportSource
+        return ExportSource(*export_institutions(self.path, **filters))
+
+    def version(self) -> Optional[str]:
+        return data_version(self.path)
+
+
+class ProgrammeTable:
+    """Database-backed stand-in for api.programme_store.ProgrammeStore."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+
+    def query(self, **filters) -> dict:
+        return query_programmes(get_connection(self.path), **filters)
+
+    def export(self, **filters):
+        from api.export import ExportSource
+        return ExportSource(*export_programmes(self.path, **filters))
+
+    def version(self) -> Optional[str]:
+        return data_version(self.path)
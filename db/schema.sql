@@ -0,0 +1,57 @@
+-- db/schema.sql
+-- SQLite schema for institutions and programmes. Safe to run on every start.
+
+CREATE TABLE IF NOT EXISTS institutions (
+    id          INTEGER PRIMARY KEY,
+    name        TEXT NOT NULL,
+    name_key    TEXT NOT NULL UNIQUE,          -- lower(trim(name))
+    type        TEXT NOT NULL DEFAULT '',
+    province    TEXT NOT NULL DEFAULT '',
+    url         TEXT NOT NULL DEFAULT '',
+    data        TEXT NOT NULL DEFAULT '{}',    -- full record as scraped (JSON)
+    updated_at  TEXT NOT NULL DEFAULT (datetime('now')),
+    entity_id   INTEGER                        -- stable ID from utils/entities.py
+);
+
+CREATE INDEX IF NOT EXISTS idx_institutions_type ON institutions (type COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_institutions_province ON institutions (province COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_institutions_name ON institutions (name COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS programmes (
+    id                  INTEGER PRIMARY KEY,
+    institution         TEXT NOT NULL DEFAULT '',
+    source_institution  TEXT NOT NULL DEFAULT '',
+    programme           TEXT NOT NULL DEFAULT '',
+    programme_type      TEXT NOT NULL DEFAULT '',
+    programme_key       TEXT NOT NULL DEFAULT '',
+    data                TEXT NOT NULL DEFAULT '{}', -- full cleaned row (JSON)
+    row_hash            TEXT NOT NULL UNIQUE,   -- sha1 of the full cleaned row; rows differing in any column are kept apart
+    updated_at          TEXT NOT NULL DEFAULT (datetime('now')),
+    institution_id      INTEGER                 -- entity_id of the source institution
+);
+
+CREATE INDEX IF NOT EXISTS idx_programmes_institution ON programmes (institution COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_programmes_source ON programmes (source_institution);
+CREATE INDEX IF NOT EXISTS idx_programmes_key ON programmes (programme_key);
+
+-- Programme-name search. The trigram tokenizer gives case-insensitive
+-- substring matches, the same semantics as the file-backed route.
+CREATE VIRTUAL TABLE IF NOT EXISTS programmes_fts USING fts5 (
+    programme,
+    content = 'programmes',
+    content_rowid = 'id',
+    tokenize = 'trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS programmes_ai AFTER INSERT ON programmes BEGIN
+    INSERT INTO programmes_fts (rowid, programme) VALUES (new.id, new.programme);
+END;
+
+CREATE TRIGGER IF NOT EXISTS programmes_ad AFTER DELETE ON programmes BEGIN
+    INSERT INTO programmes_fts (programmes_fts, rowid, programme) VALUES ('delete', old.id, old.programme);
+END;
+
+CREATE TRIGGER IF NOT EXISTS programmes_au AFTER UPDATE OF programme ON programmes BEGIN
+    INSERT INTO programmes_fts (programmes_fts, rowid, programme) VALUES ('delete', old.id, old.programme);
+    INSERT INTO programmes_fts (rowid, programme) VALUES (new.id, new.programme);
+END;
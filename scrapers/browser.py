@@ -0,0 +1,221 @@
+# scrapers/browser.py
+"""
+Shared headless Chrome factory for the Selenium stages.
+
+The DHET map and details scrapers only need the map's DOM. They do not need
+its tiles, images or fonts, and they do not need the page to finish loading:
+
+- Pages load with pageLoadStrategy "eager", so driver.get returns at
+  DOMContentLoaded, and callers wait for the element they actually need
+  (load_page).
+- Requests matching BLOCKED_URL_PATTERNS (map tiles, images, fonts,
+  analytics) are dropped through the DevTools protocol. Leaflet sizes marker
+  <img> elements from their icon options, so markers stay clickable without
+  their picture.
+- Inside `with WarmSession():` (one scraper_manager run), the first stage
+  that calls acquire_driver launches a browser and loads MAP_URL. The stages
+  after it get the same browser back, with the map still loaded, instead of
+  launching Chrome and loading the page again.
+
+Launch and page-ready times are logged, totalled in `stats` and recorded in
+utils/metrics.py, along with the number of browsers open.
+"""
+import os
+import threading
+import time
+from typing import Optional
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from utils.logger import setup_logger
+from utils.metrics import (
+    BROWSER_ACTIVE, BROWSER_LAUNCH_DURATION, BROWSER_LAUNCHES, BROWSER_PAGE_READY, BROWSER_WARM_REUSES,
+)
+
+logger = setup_logger("browser")
+
+# Unset: Selenium Manager finds (or downloads) a matching chromedriver
+CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH")
+
+PAGE_READY_TIMEOUT = 15
+
+BLOCKED_URL_PATTERNS = [
+    # Map tiles
+    "*tile.openstreetmap.org*", "*arcgisonline.com*", "*basemaps.cartocdn.com*", "*/tiles/*", "*/MapServer/tile/*",
+    # Images
+    "*.png", "*.png?*", "*.jpg", "*.jpg?*", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    # Fonts
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot", "*fonts.googleapis.com*", "*fonts.gstatic.com*",
+    # Analytics and ads
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*connect.facebook.net*",
+    "*hotjar.com*", "*clarity.ms*",
+]
+
+stats = {"launches": 0, "launch_seconds": 0.0, "page_loads": 0, "page_ready_seconds": 0.0, "warm_reuses": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(**amounts) -> None:
+    with _stats_lock:
+        for key, amount in amounts.items():
+            stats[key] += amount
+
+
+def new_driver(block: Optional[list[str]] = None) -> webdriver.Chrome:
+    """Launch a lean headless Chrome; `block` replaces BLOCKED_URL_PATTERNS ([] blocks nothing)."""
+    options = Options()
+    options.page_load_strategy = "eager"
+    options.add_argument("--headless=new")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--mute-audio")
+    options.add_argument("--window-size=1920,1080")
+
+    start = time.perf_counter()
+    service = Service(executable_path=CHROMEDRIVER_PATH) if CHROMEDRIVER_PATH else Service()
+    driver = webdriver.Chrome(service=service, options=options)
+    patterns = BLOCKED_URL_PATTERNS if block is None else block
+    if patterns:
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        except WebDriverException as e:
+            logger.warning(f"Could not enable URL blocking: {e}")
+    elapsed = time.perf_counter() - start
+    _count(launches=1, launch_seconds=elapsed)
+    BROWSER_LAUNCHES.inc()
+    BROWSER_ACTIVE.inc()
+    BROWSER_LAUNCH_DURATION.observe(elapsed)
+    logger.info(f"🚀 Chrome launched in {elapsed:.2f}s")
+    return driver
+
+
+def load_page(driver: webdriver.Chrome, url: str, ready_locator: tuple[str, str],
+              timeout: float = PAGE_READY_TIMEOUT) -> bool:
+    """
+    Open `url` and wait until `ready_locator` is present; returns whether the page was reused.
+
+    A driver already showing `url` with the element present (a warm session)
+    is not navigated again, and True is returned. The load time of a fresh
+    page is logged and recorded in `stats`.
+    """
+    try:
+        if driver.current_url == url and driver.find_elements(*ready_locator):
+            _count(warm_reuses=1)
+            BROWSER_WARM_REUSES.inc()
+            logger.info(f"♻️ Reusing the loaded page {url}")
+            return True
+    except WebDriverException:
+        pass
+
+    start = time.perf_counter()
+    driver.get(url)
+    WebDriverWait(driver, timeout).until(EC.presence_of_element_located(ready_locator))
+    elapsed = time.perf_counter() - start
+    _count(page_loads=1, page_ready_seconds=elapsed)
+    BROWSER_PAGE_READY.observe(elapsed)
+    logger.info(f"Page ready in {elapsed:.2f}s: {url}")
+    return False
+
+
+def quit_driver(driver) -> None:
+    BROWSER_ACTIVE.dec()
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+def _alive(driver) -> bool:
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+# -------------------------
+# Warm session
+# -------------------------
+class WarmSession:
+    """
+    One browser kept open for the stages of a run.
+
+    Use as a context manager around the run. Within it, acquire_driver hands
+    out the warm browser (launching it on first use) to one borrower at a
+    time. Concurrent borrowers, such as the other DriverPool workers, get
+    fresh browsers. The warm browser is quit when the block exits.
+    """
+
+    _active: Optional["WarmSession"] = None
+
+    def __init__(self, block: Optional[list[str]] = None):
+        self.block = block
+        self.driver: Optional[webdriver.Chrome] = None
+        self._busy = False
+        self._lock = threading.Lock()
+        self._previous: Optional[WarmSession] = None
+
+    def __enter__(self) -> "WarmSession":
+        self._previous = WarmSession._active
+        WarmSession._active = self
+        return self
+
+    def __exit__(self, *exc) -> None:
+        WarmSession._active = self._previous
+        self.close()
+
+    def checkout(self) -> Optional[webdriver.Chrome]:
+        """The warm browser, or None while someone else holds it."""
+        with self._lock:
+            if self._busy:
+                return None
+            self._busy = True
+        if self.driver is None:
+            try:
+                self.driver = new_driver(self.block)
+            except Exception:
+                with self._lock:
+                    self._busy = False
+                raise
+        return self.driver
+
+    def checkin(self, driver, healthy: bool = True) -> bool:
+        """Take the warm browser back; False if `driver` is not it. A broken one is quit and replaced on next use."""
+        if driver is not self.driver:
+            return False
+        if not healthy or not _alive(driver):
+            quit_driver(driver)
+            self.driver = None
+        with self._lock:
+            self._busy = False
+        return True
+
+    def close(self) -> None:
+        if self.driver is not None:
+            quit_driver(self.driver)
+            self.driver = None
+
+
+def acquire_driver() -> webdriver.Chrome:
+    """The warm browser of the active WarmSession if it is free, else a newly launched one."""
+    session = WarmSession._active
+    if session is not None:
+        driver = session.checkout()
+        if driver is not None:
+            return driver
+    return new_driver()
+
+
+def release_driver(driver, healthy: bool = True) -> None:
+    """Hand a driver from acquire_driver back: the warm one returns to its session, any other is quit."""
+    session = WarmSession._active
+    if session is not None and session.checkin(driver, healthy):
+        return
+    quit_driver(driver)
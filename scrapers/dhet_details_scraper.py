@@ -1,14 +1,16 @@
 # scrapers/dhet_details_scraper.py
 import json
 import os
-import time
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from scrapers.browser import acquire_driver, load_page, release_driver
+from scrapers.dhet_map_scraper import MAP_URL, MARKER_LOCATOR
+from scrapers.driver_pool import DriverPool, DEFAULT_WORKERS, DEFAULT_ITEM_TIMEOUT
 from utils.logger import setup_logger
+from utils.snapshots import atomic_write_json
 
 logger = setup_logger("dhet_details_scraper")
 
@@ -16,22 +18,10 @@ DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
 SOURCES_FILE = os.path.join(DATA_DIR, "sources.json")
 DETAILS_FILE = os.path.join(DATA_DIR, "tvet_details.json")
 
-CHROMEDRIVER_PATH = "path/to/chromedriver"
-MAP_URL = "https://www.dhet.gov.za/SitePages/Map.aspx"
 
-
-def setup_driver() -> webdriver.Chrome:
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
-    service = Service(CHROMEDRIVER_PATH)
-    return webdriver.Chrome(service=service, options=options)
-
-
-def scrape_institution_details(driver: webdriver.Chrome, name: str) -> dict[str, str]:
-    """Scrape a single TVET college from DHET map."""
-    details: dict[str, str] = {
+def empty_details(name: str) -> dict[str, str]:
+    """Details record for a college whose marker could not be scraped."""
+    return {
         "name": name,
         "type": "TVET College",
         "url": None,
@@ -40,11 +30,25 @@ def scrape_institution_details(driver: webdriver.Chrome, name: str) -> dict[str,
         "email": None
     }
 
+
+def load_map(driver: webdriver.Chrome) -> None:
+    """Warm a driver by loading the DHET map once; markers are then looked up in place."""
+    load_page(driver, MAP_URL, MARKER_LOCATOR)
+
+
+def scrape_institution_details(driver: webdriver.Chrome, name: str) -> dict[str, str]:
+    """
+    Scrape a single TVET college from DHET map.
+
+    A missing marker or popup is logged and returns empty details; any other
+    WebDriver error propagates so the pool can recycle the browser.
+    """
+    details = empty_details(name)
+    selector = 'img.leaflet-marker-icon[title="{}"]'.format(name.replace("\\", "\\\\").replace('"', '\\"'))
+
     try:
         marker = WebDriverWait(driver, 5).until(
-            EC.presence_of_element_located(
-                (By.XPATH, f"//img[contains(@class,'leaflet-marker-icon') and @title='{name}']")
-            )
+            EC.presence_of_element_located((By.CSS_SELECTOR, selector))
         )
         driver.execute_script("arguments[0].scrollIntoView(true);", marker)
         marker.click()
@@ -57,33 +61,34 @@ def scrape_institution_details(driver: webdriver.Chrome, name: str) -> dict[str,
         try:
             link_tag = popup.find_element(By.TAG_NAME, "a")
             details["url"] = link_tag.get_attribute("href")
-        except:
+        except NoSuchElementException:
             pass
-    except Exception as e:
+    except (TimeoutException, NoSuchElementException) as e:
         logger.warning(f"Failed to scrape {name}: {e}")
+    finally:
+        # Close the popup so the next lookup on this warm page does not read it
+        driver.execute_script("document.querySelector('.leaflet-container').click()")
 
     return details
 
 
-def main() -> None:
-    driver = setup_driver()
-    driver.get(MAP_URL)
-    WebDriverWait(driver, 15).until(
-        EC.presence_of_element_located((By.CLASS_NAME, "leaflet-marker-icon"))
-    )
+def enrich_tvet_colleges(
+    names: list[str], workers: int = DEFAULT_WORKERS, item_timeout: float = DEFAULT_ITEM_TIMEOUT
+) -> list[dict[str, str]]:
+    """Scrape details for the given colleges on a driver pool, in input order."""
+    pool = DriverPool(acquire_driver, workers=workers, warmup=load_map, item_timeout=item_timeout,
+                      release=release_driver)
+    return pool.map(scrape_institution_details, names, fallback=lambda name, exc: empty_details(name))
+
 
+def main(workers: int = DEFAULT_WORKERS, item_timeout: float = DEFAULT_ITEM_TIMEOUT) -> None:
     with open(SOURCES_FILE, "r", encoding="utf-8") as f:
         institutions = json.load(f)
 
-    enriched = []
-    for inst in institutions:
-        if inst["type"].lower() == "tvet college":
-            enriched.append(scrape_institution_details(driver, inst["name"]))
-
-    driver.quit()
+    names = [inst["name"] for inst in institutions if inst["type"].lower() == "tvet college"]
+    enriched = enrich_tvet_colleges(names, workers=workers, item_timeout=item_timeout)
 
-    with open(DETAILS_FILE, "w", encoding="utf-8") as f:
-        json.dump(enriched, f, indent=4, ensure_ascii=False)
+    atomic_write_json(DETAILS_FILE, enriched)
 
     logger.info(f"Saved {len(enriched)} TVET entries to {DETAILS_FILE}")
 
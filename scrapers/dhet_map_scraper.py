@@ -1,16 +1,15 @@
 # scrapers/dhet_map_scraper.py
 
-import json
 import time
 import os
 from typing import Optional
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from scrapers.browser import acquire_driver, load_page, release_driver
 from utils.logger import setup_logger
+from utils.snapshots import atomic_write_json
 
 logger = setup_logger("dhet_map_scraper")
 
@@ -19,19 +18,7 @@ DATA_DIR = os.path.join(BASE_DIR, "data")
 OUTPUT_FILE = os.path.join(DATA_DIR, "sources.json")
 
 MAP_URL = "https://www.dhet.gov.za/SitePages/Map.aspx"
-CHROMEDRIVER_PATH = "path/to/chromedriver"
-
-
-def setup_driver() -> webdriver.Chrome:
-    """Initialize and return a headless Chrome WebDriver."""
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--window-size=1920,1080")
-
-    service = Service(executable_path=CHROMEDRIVER_PATH)
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    return driver
+MARKER_LOCATOR = (By.CLASS_NAME, "leaflet-marker-icon")
 
 
 def get_marker_name(driver: webdriver.Chrome, marker, index: int) -> Optional[str]:
@@ -59,44 +46,141 @@ def get_marker_name(driver: webdriver.Chrome, marker, index: int) -> Optional[st
     return None
 
 
-def scrape_dhet_institutions() -> list[dict[str, str]]:
-    """Scrape DHET Map for institution names and return as structured data."""
-    logger.info("Starting DHET map scrape...")
+# Reads every Leaflet marker in a single round trip. Markers are matched to
+# their DOM icon so the result lines up with find_elements(leaflet-marker-icon).
+# Returns null when no Leaflet map instance can be found on the page.
+BULK_EXTRACT_JS = """
+var L = window.L;
+if (!L || !L.Map || !L.Marker) { return null; }
+
+var map = null;
+for (var key in window) {
+    try {
+        if (window[key] instanceof L.Map) { map = window[key]; break; }
+    } catch (e) {}
+}
+if (!map) { return null; }
+
+var icons = Array.prototype.slice.call(document.querySelectorAll('.leaflet-marker-icon'));
+var results = [];
+
+map.eachLayer(function (layer) {
+    if (!(layer instanceof L.Marker)) { return; }
+
+    var popupHtml = null;
+    var popup = layer.getPopup ? layer.getPopup() : null;
+    if (popup) {
+        var content = popup.getContent();
+        if (typeof content === 'function') { content = content(layer); }
+        if (content && content.outerHTML !== undefined) { content = content.outerHTML; }
+        popupHtml = content ? String(content) : null;
+    }
+
+    var popupText = null;
+    if (popupHtml) {
+        var holder = document.createElement('div');
+        holder.innerHTML = popupHtml;
+        var field = holder.querySelector('.ms-rtestate-field') || holder;
+        popupText = (field.textContent || '').trim();
+    }
+
+    var latlng = layer.getLatLng ? layer.getLatLng() : null;
+    results.push({
+        index: layer._icon ? icons.indexOf(layer._icon) : -1,
+        title: (layer.options && layer.options.title) || null,
+        popup_html: popupHtml,
+        popup_text: popupText,
+        lat: latlng ? latlng.lat : null,
+        lng: latlng ? latlng.lng : null
+    });
+});
+
+return results;
+"""
+
+
+def extract_markers_bulk(driver: webdriver.Chrome) -> Optional[list[dict]]:
+    """Pull title, popup HTML and lat/lng for every marker in one execute_script call."""
+    try:
+        return driver.execute_script(BULK_EXTRACT_JS)
+    except Exception as e:
+        logger.warning(f"Bulk marker extraction failed: {e}")
+        return None
 
-    driver = setup_driver()
-    driver.get(MAP_URL)
 
-    # Wait for map to load
-    WebDriverWait(driver, 15).until(
-        EC.presence_of_element_located((By.CLASS_NAME, "leaflet-marker-icon"))
-    )
-    time.sleep(2)
+def collect_institutions(driver: webdriver.Chrome, bulk: bool = True) -> list[dict[str, str]]:
+    """
+    Collect institutions from a map page already loaded in the driver.
 
+    In bulk mode every marker is read from the Leaflet layer objects at once;
+    the click loop only runs for markers the bulk pass could not name.
+    """
     markers = driver.find_elements(By.CLASS_NAME, "leaflet-marker-icon")
     logger.info(f"Found {len(markers)} markers on map.")
 
+    entries: list[dict] = []
+    pending = list(range(len(markers)))
+
+    if bulk:
+        extracted = extract_markers_bulk(driver)
+        if extracted is None:
+            logger.info("Leaflet map not reachable from script, using click loop.")
+        else:
+            named = set()
+            for item in extracted:
+                name = (item.get("popup_text") or item.get("title") or "").strip()
+                if not name:
+                    continue
+                entries.append({"name": name, "lat": item.get("lat"), "lng": item.get("lng")})
+                if item.get("index", -1) >= 0:
+                    named.add(item["index"])
+            pending = [i for i in pending if i not in named]
+            logger.info(f"Bulk extracted {len(entries)} markers, {len(pending)} left for click fallback.")
+
+    for i in pending:
+        name = get_marker_name(driver, markers[i], i)
+        if name:
+            entries.append({"name": name, "lat": None, "lng": None})
+
     institutions: list[dict[str, str]] = []
     seen_names = set()
 
-    for i, marker in enumerate(markers):
-        name = get_marker_name(driver, marker, i)
-        if name and name.lower() not in seen_names:
+    for entry in entries:
+        name = entry["name"]
+        if name.lower() not in seen_names:
             seen_names.add(name.lower())
             institutions.append({
                 "name": name,
                 "type": "TVET College",
                 "url": None,
+                "lat": entry["lat"],
+                "lng": entry["lng"],
             })
 
-    driver.quit()
-
     # Sort alphabetically
     institutions.sort(key=lambda x: x["name"])
+    return institutions
+
+
+def scrape_dhet_institutions(bulk: bool = True) -> list[dict[str, str]]:
+    """Scrape DHET Map for institution names and return as structured data."""
+    logger.info("Starting DHET map scrape...")
+
+    # The warm browser of a manager run, if any; the details stage reuses it with the map still loaded
+    driver = acquire_driver()
+    healthy = False
+    try:
+        # Wait for map to load; a freshly loaded map gets time to finish placing its markers
+        reused = load_page(driver, MAP_URL, MARKER_LOCATOR)
+        if not reused:
+            time.sleep(2)
+        institutions = collect_institutions(driver, bulk=bulk)
+        healthy = True
+    finally:
+        release_driver(driver, healthy)
 
     # Save results
-    os.makedirs(DATA_DIR, exist_ok=True)
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(institutions, f, ensure_ascii=False, indent=4)
+    atomic_write_json(OUTPUT_FILE, institutions)
 
     logger.info(f"Saved {len(institutions)} DHET institutions to {OUTPUT_FILE}")
     return institutions
@@ -0,0 +1,207 @@
+# scrapers/driver_pool.py
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Optional, Sequence
+from utils.logger import setup_logger
+
+logger = setup_logger("driver_pool")
+
+# Each headless Chrome already uses several threads, so one browser per two
+# cores keeps the box busy without thrashing.
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+DEFAULT_ITEM_TIMEOUT = 30.0
+DRIVER_START_ATTEMPTS = 3
+DRIVER_START_BACKOFF = 2.0  # seconds before the second attempt, doubled after each failure
+
+_SENTINEL = object()
+
+
+class DriverPool:
+    """
+    A pool of reusable WebDriver workers that shard a list of work items.
+
+    - Every worker owns one driver, created by `factory` and warmed by `warmup`
+      (e.g. loading the map page once) before it takes any items.
+    - Items are fed through a bounded queue, so the producer never runs far
+      ahead of the browsers.
+    - An item that runs past `item_timeout` has its driver killed; the worker
+      then records the fallback result and starts a fresh, warmed driver.
+    - Any other exception is treated as a crash and also recycles the driver.
+    - A driver that fails to start is retried DRIVER_START_ATTEMPTS times
+      with backoff. A worker that still has none stops taking items and
+      leaves the queue to the live workers. Only when no worker is left are
+      the remaining items given the fallback result.
+    - `map` returns results in input order regardless of completion order.
+    - Drivers are handed back through `release(driver, healthy)`, which
+      quits them by default (scrapers/browser.release_driver returns a warm
+      session's browser to it instead).
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        workers: int = DEFAULT_WORKERS,
+        warmup: Optional[Callable[[Any], None]] = None,
+        item_timeout: float = DEFAULT_ITEM_TIMEOUT,
+        queue_size: Optional[int] = None,
+        release: Optional[Callable[[Any, bool], None]] = None,
+    ):
+        self.factory = factory
+        self.release = release or (lambda driver, healthy: self._quit(driver))
+        self.workers = max(1, workers)
+        self.warmup = warmup
+        self.item_timeout = item_timeout
+        self.queue_size = queue_size or self.workers * 2
+        self.recycled = 0
+        self._lock = threading.Lock()
+
+    # -------------------------
+    # Driver lifecycle
+    # -------------------------
+    def _start_driver(self, worker_id: int):
+        start = time.perf_counter()
+        driver = self.factory()
+        try:
+            if self.warmup:
+                self.warmup(driver)
+        except Exception:
+            self.release(driver, False)
+            raise
+        logger.info(f"Worker {worker_id} driver ready in {time.perf_counter() - start:.1f}s")
+        return driver
+
+    @staticmethod
+    def _quit(driver) -> None:
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _start_with_retries(self, worker_id: int):
+        """A ready driver, or None once DRIVER_START_ATTEMPTS starts have failed."""
+        for attempt in range(DRIVER_START_ATTEMPTS):
+            if attempt:
+                time.sleep(DRIVER_START_BACKOFF * 2 ** (attempt - 1))
+            try:
+                return self._start_driver(worker_id)
+            except Exception as e:
+                logger.error(f"Worker {worker_id} could not start a driver "
+                             f"(attempt {attempt + 1}/{DRIVER_START_ATTEMPTS}): {e}")
+        return None
+
+    def _recycle(self, worker_id: int, driver):
+        self.release(driver, False)
+        with self._lock:
+            self.recycled += 1
+        return self._start_with_retries(worker_id)
+
+    # -------------------------
+    # Work distribution
+    # -------------------------
+    def _worker(self, worker_id: int, func, work: queue.Queue, results: list, fallback, state: dict) -> None:
+        driver = self._start_with_retries(worker_id)
+
+        while driver is not None:
+            job = work.get()
+            if job is _SENTINEL:
+                with self._lock:
+                    state["sentinels"] += 1
+                break
+            index, item = job
+
+            timed_out = threading.Event()
+            driver_lost = False
+
+            def kill(d=driver):
+                timed_out.set()
+                self._quit(d)
+
+            timer = threading.Timer(self.item_timeout, kill)
+            timer.daemon = True
+            timer.start()
+            try:
+                results[index] = func(driver, item)
+            except Exception as e:
+                reason = f"timed out after {self.item_timeout:.0f}s" if timed_out.is_set() else f"crashed: {e}"
+                logger.warning(f"Worker {worker_id} item {index} {reason}; recycling driver.")
+                results[index] = fallback(item, e)
+                driver_lost = True
+            finally:
+                timer.cancel()
+
+            # The watchdog may fire just as an item completes; the driver is gone either way
+            if driver_lost or timed_out.is_set():
+                driver = self._recycle(worker_id, driver)
+
+        if driver is not None:
+            self.release(driver, True)
+        else:
+            logger.error(f"Worker {worker_id} has no driver; leaving its items to the other workers")
+        self._leave(work, results, fallback, state)
+
+    def _leave(self, work: queue.Queue, results: list, fallback, state: dict) -> None:
+        """
+        Called by each worker as it exits. The last one drains the queue until
+        every sentinel is seen, failing the items that no live worker can take.
+        """
+        with self._lock:
+            state["alive"] -= 1
+            if state["alive"]:
+                return
+        error = RuntimeError("no driver available")
+        failed = 0
+        while True:
+            with self._lock:
+                if state["sentinels"] == state["workers"]:
+                    break
+            job = work.get()
+            if job is _SENTINEL:
+                with self._lock:
+                    state["sentinels"] += 1
+                continue
+            index, item = job
+            results[index] = fallback(item, error)
+            failed += 1
+        if failed:
+            logger.error(f"No driver left; {failed} items got the fallback result")
+
+    def map(
+        self,
+        func: Callable[[Any, Any], Any],
+        items: Sequence[Any],
+        fallback: Optional[Callable[[Any, Exception], Any]] = None,
+    ) -> list:
+        """Run `func(driver, item)` for every item and return results in input order."""
+        if not items:
+            return []
+
+        fallback = fallback or (lambda item, exc: None)
+        results: list = [None] * len(items)
+        work: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        n_workers = min(self.workers, len(items))
+        state = {"workers": n_workers, "alive": n_workers, "sentinels": 0}
+
+        threads = [
+            threading.Thread(
+                target=self._worker,
+                args=(i, func, work, results, fallback, state),
+                name=f"driver-pool-{i}",
+                daemon=True,
+            )
+            for i in range(n_workers)
+        ]
+        for t in threads:
+            t.start()
+
+        for index, item in enumerate(items):
+            work.put((index, item))
+        for _ in threads:
+            work.put(_SENTINEL)
+
+        for t in threads:
+            t.join()
+
+        logger.info(f"Processed {len(items)} items on {n_workers} drivers ({self.recycled} recycled).")
+        return results
@@ -0,0 +1,236 @@
+# scrapers/fetch_engine.py
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from scrapers.head_parser import CHUNK_SIZE, HEAD_BYTE_CAP, HeadReader, head_cache_key, read_head
+from scrapers.http_cache import HttpCache
+from scrapers.politeness import (
+    MAX_RETRIES, RETRY_STATUSES, USER_AGENT, PolitenessScheduler, RobotsDisallowed, host_key, robots_url,
+)
+from utils.logger import setup_logger
+from utils.metrics import FETCH_BYTES, FETCH_DURATION
+
+logger = setup_logger("fetch_engine")
+
+DEFAULT_MAX_CONCURRENCY = 32
+DEFAULT_PER_HOST = 4
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 15.0
+
+
+class FetchEngine:
+    """
+    Asyncio HTTP fetcher with keep-alive connection pooling.
+
+    - `max_concurrency` caps requests in flight across all hosts.
+    - `per_host` caps requests in flight to one host (scheme + host + port).
+    - Connect and read timeouts are separate so dead hosts fail fast while
+      slow-but-alive pages still get time to stream.
+    - With a `cache`, requests are made conditional and a 304 is answered
+      from the stored body.
+    - With a `politeness` scheduler, robots.txt is honoured, requests wait
+      for their host's token bucket, and a 429/503 is re-sent after the
+      host's backoff (up to MAX_RETRIES times).
+    - `fetch_head` streams a page only until its head has been parsed
+      (scrapers/head_parser.py) and then drops the connection.
+    - With a `breaker` (scrapers/resolver.CircuitBreaker), requests to a
+      domain that keeps failing to connect are refused without touching
+      the network.
+
+    Use as an async context manager so the pooled connections are closed:
+
+        async with FetchEngine() as engine:
+            infos = await engine.gather_institution_info(urls)
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        per_host: int = DEFAULT_PER_HOST,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        cache: Optional[HttpCache] = None,
+        politeness: Optional[PolitenessScheduler] = None,
+        breaker=None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+        self.politeness = politeness
+        self.breaker = breaker
+        self.per_host = per_host
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+        self._robots_locks: Dict[str, asyncio.Lock] = {}
+
+    async def __aenter__(self) -> "FetchEngine":
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency,
+            ),
+            timeout=self.timeout,
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT},
+        )
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.per_host)
+        return self._hosts[host]
+
+    async def _wait_turn(self, url: str) -> None:
+        """Load the host's robots.txt once, then sleep until its token bucket lets `url` go."""
+        politeness = self.politeness
+        async with self._robots_locks.setdefault(host_key(url), asyncio.Lock()):
+            if politeness.needs_robots(url):
+                try:
+                    async with self._global:
+                        robots = await self._client.get(robots_url(url))
+                except httpx.TransportError:
+                    politeness.set_robots(url, None)  # the host is left alone until the retry
+                    raise
+                politeness.set_robots(url, robots.status_code, robots.text)
+        while True:
+            delay, epoch = politeness.reserve(url)
+            await asyncio.sleep(delay)
+            if politeness.current(url, epoch):
+                return
+
+    async def _send(self, url: str, headers: dict, read: Callable[[httpx.Response], Awaitable[Any]]):
+        """
+        GET `url` under the global and per-host caps and politeness rules.
+
+        The body is streamed: `read(response)` consumes as much of it as it
+        needs while the request still holds its slots, then the response is
+        closed. Returns (response, what read returned). Each attempt's latency
+        (headers plus what was read) and bytes downloaded go to utils.metrics.
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            # Pacing waits happen outside the semaphores, so other hosts keep the slots busy
+            if self.politeness is not None:
+                await self._wait_turn(url)
+            async with self._global, self._host_slot(url):
+                start = time.perf_counter()
+                request = self._client.build_request("GET", url, headers=headers)
+                response = await self._client.send(request, stream=True)
+                try:
+                    retry = (self.politeness is not None and response.status_code in RETRY_STATUSES
+                             and attempt < MAX_RETRIES)
+                    result = None if retry else await read(response)
+                finally:
+                    await response.aclose()
+                    FETCH_DURATION.observe(time.perf_counter() - start, client="httpx")
+                    FETCH_BYTES.inc(response.num_bytes_downloaded, client="httpx")
+            if self.politeness is not None:
+                self.politeness.record(url, response.status_code, response.headers.get("Retry-After"))
+            if not retry:
+                return response, result
+
+    async def _fetch(self, url: str, key: str, read: Callable[[httpx.Response], Awaitable[Any]]):
+        """
+        Shared error handling for fetch and fetch_head: (response, read result, cached entry or None),
+        or None on any HTTP or network error.
+        """
+        if self._client is None:
+            raise RuntimeError("FetchEngine must be used inside 'async with'")
+
+        if self.breaker is not None and not self.breaker.allow(url):
+            logger.info(f"Skipping {url}: circuit open for its domain")
+            return None
+
+        headers = self.cache.conditional_headers(key) if self.cache else {}
+        try:
+            response, result = await self._send(url, headers, read)
+            if self.breaker is not None:
+                self.breaker.success(url)  # the host answered, whatever the status
+            if response.status_code == 304 and self.cache:
+                entry = self.cache.revalidated(key, response.headers)
+                if entry is not None:
+                    return response, result, entry
+            response.raise_for_status()
+        except (httpx.HTTPError, RobotsDisallowed) as e:
+            if self.breaker is not None and isinstance(e, httpx.TransportError):
+                self.breaker.failure(url)
+            logger.warning(f"Error fetching {url}: {e!r}")
+            return None
+        return response, result, None
+
+    async def fetch(self, url: str) -> Optional[httpx.Response]:
+        """GET a whole page; returns None on any HTTP or network error."""
+        async def read(response):
+            return await response.aread()
+
+        fetched = await self._fetch(url, url, read)
+        if fetched is None:
+            return None
+        response, content, entry = fetched
+        if entry is not None:
+            return httpx.Response(200, headers=entry["headers"], content=entry["body"], request=response.request)
+        if self.cache and response.status_code == 200:
+            self.cache.store(url, response.headers, content)
+        return response  # read in full by aread, so .content and .text stay available after closing
+
+    async def fetch_head(self, url: str, max_bytes: Optional[int] = HEAD_BYTE_CAP) -> Optional[HeadReader]:
+        """
+        Read a page only up to the end of its head (or `max_bytes`), then drop the connection.
+
+        Returns the HeadReader (its `url` is the final URL after redirects), or
+        None on any HTTP or network error. With a cache, the head is stored and
+        revalidated under head_cache_key(url).
+        """
+        key = head_cache_key(url)
+
+        async def read(response):
+            head = HeadReader(response.headers.get("Content-Type"), max_bytes)
+            if response.status_code == 200:
+                async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                    if head.feed(chunk):
+                        break
+            return head.close()
+
+        fetched = await self._fetch(url, key, read)
+        if fetched is None:
+            return None
+        response, head, entry = fetched
+        if entry is not None:
+            head = read_head([entry["body"]], entry["headers"].get("Content-Type"), max_bytes)
+        elif self.cache and response.status_code == 200:
+            self.cache.store(key, response.headers, head.prefix)
+        head.url = str(response.url)
+        return head
+
+    async def get_institution_info(self, url: str) -> Optional[Dict[str, str]]:
+        """Async counterpart of scrapers.scraper.get_institution_info with the same return contract."""
+        from scrapers.scraper import head_institution_info
+
+        head = await self.fetch_head(url)
+        if head is None:
+            return None
+        return head_institution_info(url, head)
+
+    async def gather_institution_info(self, urls: Iterable[str]) -> list[Optional[Dict[str, str]]]:
+        """Fetch every URL concurrently; results line up with the input order."""
+        return await asyncio.gather(*(self.get_institution_info(url) for url in urls))
+
+
+def fetch_institution_infos(urls: Iterable[str], **engine_options) -> list[Optional[Dict[str, str]]]:
+    """Blocking helper for callers outside an event loop."""
+    async def run():
+        async with FetchEngine(**engine_options) as engine:
+            return await engine.gather_institution_info(list(urls))
+
+    return asyncio.run(run())
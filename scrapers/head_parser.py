@@ -0,0 +1,163 @@
+# scrapers/head_parser.py
+"""
+Streaming extraction of <title> and the favicon link from an HTML page.
+
+Institution homepages are often several megabytes, but the two values
+scraper.py needs sit in the first few kilobytes. HeadReader is fed the
+response body chunk by chunk and reports `done` once both values are known,
+the head has ended (</head> or <body>), or `max_bytes` have been read. The
+caller then closes the connection instead of downloading the rest.
+
+Parsing is incremental (html.parser.HTMLParser from the standard library),
+so no document tree is ever built. For well-formed pages the results match
+scraper.parse_institution_info on the full page: the first <title>, and the
+href of the first <link> whose rel contains "icon". A favicon linked from
+the body is not found, since reading stops when the head ends.
+"""
+import codecs
+import re
+from html.parser import HTMLParser
+from typing import Iterable, Optional
+
+HEAD_BYTE_CAP = 256 * 1024  # stop reading after this many (decoded) bytes even if the head has not ended
+CHUNK_SIZE = 16 * 1024
+SNIFF_BYTES = 1024  # how far into the page a <meta charset> is looked for (as in the HTML spec's prescan)
+
+_CHARSET = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.I)
+_META_CHARSET = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?([\w.:-]+)", re.I)
+
+
+def head_cache_key(url: str) -> str:
+    """HttpCache key for the stored head of `url`; a fragment, so it never clashes with a full-page entry."""
+    return f"{url}#head"
+
+
+def charset_of(content_type: Optional[str]) -> Optional[str]:
+    """Charset declared in a Content-Type header, if any."""
+    match = _CHARSET.search(content_type or "")
+    return match.group(1) if match else None
+
+
+class _HeadParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title: Optional[str] = None
+        self.icon: Optional[str] = None
+        self.has_icon = False
+        self.done = False
+        self._title_parts: Optional[list[str]] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title" and self.title is None:
+            self._title_parts = []
+        elif tag == "link" and not self.has_icon:
+            attrs = dict(attrs)
+            if "icon" in (attrs.get("rel") or "").lower().split():
+                self.has_icon = True
+                self.icon = attrs.get("href")
+        elif tag == "body":
+            self.done = True
+        self._check()
+
+    def handle_endtag(self, tag):
+        if tag == "title" and self._title_parts is not None:
+            self.title = "".join(self._title_parts).strip()
+            self._title_parts = None
+        elif tag == "head":
+            self.done = True
+        self._check()
+
+    def handle_data(self, data):
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+
+    def _check(self):
+        if self.title is not None and self.has_icon:
+            self.done = True
+
+
+class HeadReader:
+    """
+    Incremental reader of a page's head.
+
+    Feed raw body chunks with `feed()` until it returns True, then call
+    `close()`. `bytes_read` counts what was consumed, and `prefix` holds
+    those bytes (enough to re-parse the head, e.g. from a cache).
+    """
+
+    def __init__(self, content_type: Optional[str] = None, max_bytes: Optional[int] = HEAD_BYTE_CAP):
+        self.encoding = charset_of(content_type)
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self.truncated = False
+        self.url: Optional[str] = None  # final URL after redirects, set by the fetcher
+        self._chunks: list[bytes] = []
+        self._decoder = None
+        self._parser = _HeadParser()
+
+    @property
+    def done(self) -> bool:
+        return self._parser.done or self.truncated
+
+    @property
+    def title(self) -> Optional[str]:
+        return self._parser.title
+
+    @property
+    def icon(self) -> Optional[str]:
+        return self._parser.icon
+
+    @property
+    def has_icon(self) -> bool:
+        return self._parser.has_icon
+
+    @property
+    def prefix(self) -> bytes:
+        return b"".join(self._chunks)
+
+    def feed(self, chunk: bytes) -> bool:
+        """Parse one more chunk; True once nothing further needs to be read."""
+        if self.done:
+            return True
+        if self.max_bytes is not None and self.bytes_read + len(chunk) >= self.max_bytes:
+            chunk = chunk[: self.max_bytes - self.bytes_read]
+            self.truncated = True
+        self.bytes_read += len(chunk)
+        self._chunks.append(chunk)
+        if self._decoder is None:
+            # Hold the first SNIFF_BYTES back so a <meta charset> can be found before decoding
+            if self.encoding is None and self.bytes_read < SNIFF_BYTES and not self.truncated:
+                return False
+            self._decoder = self._make_decoder(self.prefix)
+            chunk = self.prefix
+        self._parser.feed(self._decoder.decode(chunk))
+        return self.done
+
+    def close(self) -> "HeadReader":
+        if self._decoder is None:
+            self._decoder = self._make_decoder(self.prefix)
+            self._parser.feed(self._decoder.decode(self.prefix))
+        self._parser.feed(self._decoder.decode(b"", final=True))
+        self._parser.close()
+        return self
+
+    def _make_decoder(self, start: bytes):
+        # Header charset first, then a <meta charset> near the start, then UTF-8
+        encoding = self.encoding
+        if encoding is None:
+            match = _META_CHARSET.search(start[:SNIFF_BYTES])
+            encoding = match.group(1).decode("ascii") if match else "utf-8"
+        try:
+            return codecs.getincrementaldecoder(encoding)(errors="replace")
+        except LookupError:
+            return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+
+def read_head(chunks: Iterable[bytes], content_type: Optional[str] = None,
+              max_bytes: Optional[int] = HEAD_BYTE_CAP) -> HeadReader:
+    """Feed `chunks` into a HeadReader until it is done; the rest of the iterable is not consumed."""
+    head = HeadReader(content_type, max_bytes)
+    for chunk in chunks:
+        if head.feed(chunk):
+            break
+    return head.close()
@@ -0,0 +1,293 @@
+# scrapers/http_cache.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+import requests
+
+from scrapers.politeness import (
+    MAX_RETRIES, RETRY_STATUSES, ROBOTS_TIMEOUT, USER_AGENT, PolitenessScheduler, RobotsDisallowed, get_scheduler,
+)
+from utils.logger import setup_logger
+from utils.metrics import FETCH_BYTES, FETCH_DURATION, HTTP_CACHE_HIT_RATIO, HTTP_CACHE_REQUESTS
+
+logger = setup_logger("http_cache")
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+CACHE_FILE = os.path.join(DATA_DIR, "http_cache.sqlite")
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_AGE = 90 * 24 * 3600
+EVICT_TO = 0.9  # share of max_bytes a size eviction shrinks the store to, so the next store() does not evict again
+
+# Bodies are stored decoded, so transfer/encoding headers must not be replayed
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    validated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_validated ON responses (validated_at);
+"""
+
+
+class HttpCache:
+    """
+    Persistent store of GET responses keyed by URL, revalidated with ETag/Last-Modified.
+
+    A response is only stored when it carries a validator. On the next
+    request `conditional_headers` supplies If-None-Match / If-Modified-Since,
+    and a 304 is answered from the stored body.
+
+    Eviction is by age (entries not revalidated within `max_age` seconds) and
+    by size (least recently validated first once the store exceeds
+    `max_bytes`). It runs when the cache is opened and closed, and from
+    store() once the stored bytes pass `max_bytes`. Hit, miss, store and
+    eviction counts are kept per process.
+    """
+
+    def __init__(self, path: str = CACHE_FILE, max_bytes: int = DEFAULT_MAX_BYTES, max_age: float = DEFAULT_MAX_AGE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._size = 0  # bytes stored, as of the last eviction plus every store since
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self.evict()
+
+    # -------------------------
+    # Lookup / store
+    # -------------------------
+    def lookup(self, url: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, headers, body FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, headers, body = row
+        return {"etag": etag, "last_modified": last_modified, "headers": json.loads(headers), "body": body}
+
+    def conditional_headers(self, url: str) -> dict[str, str]:
+        """Validator headers for a URL, or {} when nothing is cached."""
+        entry = self.lookup(url)
+        if entry is None:
+            return {}
+        headers = {}
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url: str, headers, body: bytes) -> None:
+        """Save a 200 response; skipped when the server sent no validator."""
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not etag and not last_modified:
+            self._count(misses=1)
+            return
+
+        kept = {k: v for k, v in headers.items() if k.lower() not in _DROP_HEADERS}
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, json.dumps(kept), body, len(body), now, now),
+            )
+            self._conn.commit()
+            self._size += len(body)
+            full = self._size > self.max_bytes
+        self._count(misses=1, stores=1)
+        if full:
+            self.evict()
+
+    def revalidated(self, url: str, headers) -> Optional[dict]:
+        """Record a 304 for a URL and return the cached entry to serve."""
+        entry = self.lookup(url)
+        if entry is None:
+            self._count(misses=1)
+            return None
+
+        etag = headers.get("ETag") or entry["etag"]
+        last_modified = headers.get("Last-Modified") or entry["last_modified"]
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET etag = ?, last_modified = ?, validated_at = ? WHERE url = ?",
+                (etag, last_modified, time.time(), url),
+            )
+            self._conn.commit()
+        self._count(hits=1)
+        return entry
+
+    # -------------------------
+    # Maintenance
+    # -------------------------
+    def _count(self, **amounts) -> None:
+        with self._stats_lock:
+            for key, amount in amounts.items():
+                self.stats[key] += amount
+
+    def evict(self) -> int:
+        """
+        Drop stale entries; then, above max_bytes, the least recently validated
+        ones until under EVICT_TO of it.
+        """
+        removed = 0
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM responses WHERE validated_at < ?", (time.time() - self.max_age,))
+            removed += cur.rowcount
+
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                rows = self._conn.execute("SELECT url, size FROM responses ORDER BY validated_at").fetchall()
+                doomed = []
+                for url, size in rows:
+                    if total <= self.max_bytes * EVICT_TO:
+                        break
+                    doomed.append((url,))
+                    total -= size
+                self._conn.executemany("DELETE FROM responses WHERE url = ?", doomed)
+                removed += len(doomed)
+            self._conn.commit()
+            self._size = total
+
+        self._count(evictions=removed)
+        if removed:
+            logger.info(f"Evicted {removed} cached responses from {self.path}")
+        return removed
+
+    def hit_ratio(self) -> float:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def close(self) -> None:
+        self.evict()
+        logger.info(
+            f"HTTP cache: {self.stats['hits']} hits, {self.stats['misses']} misses "
+            f"({self.hit_ratio():.0%} hit ratio), {self.stats['stores']} stored"
+        )
+        with self._lock:
+            self._conn.close()
+
+
+class SessionRobotsDisallowed(RobotsDisallowed, requests.RequestException):
+    """RobotsDisallowed raised from CachedSession, catchable as a requests error."""
+
+
+class CachedSession(requests.Session):
+    """
+    requests.Session that revalidates GETs against an HttpCache.
+
+    With a `politeness` scheduler (scrapers/politeness.py) every request
+    first waits for its host's turn, and robots.txt is checked first (it is
+    fetched through the cache too). A 429/503 is re-sent up to MAX_RETRIES
+    times after the host's backoff. A URL that robots.txt disallows raises
+    RobotsDisallowed, which is a requests.RequestException.
+
+    GETs accept a `cache_key` (default: the URL) to store an entry under a
+    different key. A streamed GET (stream=True) is never stored, because its
+    body is not read here. The caller stores what it read, unless the
+    response has `from_cache` set, and counts the bytes it read in
+    utils.metrics.FETCH_BYTES.
+    """
+
+    def __init__(self, cache: "HttpCache", politeness: Optional[PolitenessScheduler] = None):
+        super().__init__()
+        self.cache = cache
+        self.politeness = politeness
+        self.headers["User-Agent"] = USER_AGENT
+
+    def request(self, method, url, *args, **kwargs):
+        if self.politeness is None:
+            return self._request(method, url, *args, **kwargs)
+
+        def fetch_robots(robots):
+            response = self._request("GET", robots, timeout=kwargs.get("timeout", ROBOTS_TIMEOUT))
+            return response.status_code, response.text
+
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                self.politeness.wait(url, fetch_robots)
+            except RobotsDisallowed as e:
+                raise SessionRobotsDisallowed(str(e)) from e
+            response = self._request(method, url, *args, **kwargs)
+            self.politeness.record(url, response.status_code, response.headers.get("Retry-After"))
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                return response
+            response.close()
+
+    def _request(self, method, url, *args, **kwargs):
+        if method.upper() != "GET":
+            return super().request(method, url, *args, **kwargs)
+
+        key = kwargs.pop("cache_key", None) or url
+        headers = dict(kwargs.pop("headers", None) or {})
+        headers.update(self.cache.conditional_headers(key))
+        start = time.perf_counter()
+        response = super().request(method, url, *args, headers=headers, **kwargs)
+        FETCH_DURATION.observe(time.perf_counter() - start, client="requests")
+        response.from_cache = False
+
+        if response.status_code == 304:
+            entry = self.cache.revalidated(key, response.headers)
+            if entry is not None:
+                response.status_code = 200
+                response.reason = "OK (cached)"
+                response.headers = requests.structures.CaseInsensitiveDict(entry["headers"])
+                response._content = entry["body"]
+                response._content_consumed = True  # iter_content serves the cached body, even when streamed
+                response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+                response.from_cache = True
+        elif response.status_code == 200 and not kwargs.get("stream"):
+            self.cache.store(key, response.headers, response.content)
+        if not kwargs.get("stream") and not response.from_cache:
+            FETCH_BYTES.inc(len(response.content), client="requests")
+
+        return response
+
+
+_cache: Optional[HttpCache] = None
+_session: Optional[CachedSession] = None
+
+
+def get_cache() -> HttpCache:
+    """Process-wide cache under data/ shared by scraper.py and the *_scraper.py plugins."""
+    global _cache
+    if _cache is None:
+        _cache = HttpCache()
+    return _cache
+
+
+def session() -> CachedSession:
+    """Shared keep-alive session backed by the process-wide cache and politeness scheduler."""
+    global _session
+    if _session is None:
+        _session = CachedSession(get_cache(), politeness=get_scheduler())
+    return _session
+
+
+def _cache_lookups() -> dict:
+    if _cache is None:
+        return {}
+    return {("hit",): _cache.stats["hits"], ("miss",): _cache.stats["misses"]}
+
+
+# Read from the process-wide cache when metrics are rendered
+HTTP_CACHE_REQUESTS.set_function(_cache_lookups)
+HTTP_CACHE_HIT_RATIO.set_function(lambda: _cache.hit_ratio() if _cache is not None else 0.0)
@@ -0,0 +1,252 @@
+# scrapers/politeness.py
+"""
+Per-host politeness: token-bucket pacing, robots.txt and adaptive backoff.
+
+One PolitenessScheduler is shared by every HTTP path in a scrape (the cached
+requests session in http_cache.py and the async FetchEngine). Request
+pacing is therefore per host, no matter which code sends the request.
+
+- Each host has a token bucket. It starts at DEFAULT_RATE requests per
+  second, or at 1 / Crawl-delay when the host's robots.txt sets one.
+- robots.txt is fetched once per host (kept ROBOTS_TTL seconds). URLs it
+  disallows for our user agent are refused with RobotsDisallowed. As in
+  RFC 9309, a 4xx means no restrictions. A 5xx or a failed fetch means the
+  whole host is disallowed until robots.txt is tried again, ROBOTS_RETRY
+  seconds later.
+- A 429 or 503 halves the host's rate and pauses it for Retry-After (or
+  an exponential backoff). Successful responses then raise the rate again
+  in small steps, up to its ceiling. Each host settles at the fastest
+  pace it tolerates (additive increase, multiplicative decrease).
+  Throttled answers that arrive while the host is already paused were
+  sent before the pause, so they do not cut the rate again.
+
+Callers ask `reserve(url)` for a (delay, epoch) pair and sleep for the delay
+(time.sleep or asyncio.sleep). If `current(url, epoch)` has turned false
+in the meantime, a pause started and invalidated the reservation, so they
+reserve again. Finally they report the status with `record()`.
+"""
+import email.utils
+import threading
+import time
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+from utils.logger import setup_logger
+
+logger = setup_logger("politeness")
+
+USER_AGENT = "uniapplicationscraper/1.0 (+https://github.com/SakhileKhuzwayo222/uniapplicationscraper)"
+ROBOTS_AGENT = "uniapplicationscraper"
+
+DEFAULT_RATE = 2.0      # requests per second per host without a Crawl-delay
+DEFAULT_BURST = 2       # requests a host may get back to back
+MIN_RATE = 1 / 60       # never slower than one request a minute
+RATE_STEP = 0.1         # added to a host's rate per successful response
+BACKOFF_BASE = 2.0      # seconds paused after the first 429/503, doubled per strike
+MAX_BACKOFF = 300.0
+MAX_RETRIES = 2         # re-sends of a request answered with 429/503
+ROBOTS_TTL = 24 * 3600
+ROBOTS_RETRY = 600.0    # seconds before an unreachable robots.txt (5xx, network error) is tried again
+ROBOTS_TIMEOUT = 10.0
+
+RETRY_STATUSES = {429, 503}
+
+
+class RobotsDisallowed(Exception):
+    """robots.txt forbids fetching this URL."""
+
+
+def host_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def robots_url(url: str) -> str:
+    return f"{host_key(url)}/robots.txt"
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _Host:
+    """
+    Token bucket of one host, kept as a virtual schedule (GCRA): `tat` is
+    when the bucket would be full again. A request may go as soon as
+    `tat` is at most (burst - 1) intervals ahead, so queued reservations
+    simply line up behind each other.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tat = 0.0              # theoretical arrival time (monotonic)
+        self.not_before = 0.0       # monotonic time the host is paused until
+        self.strikes = 0            # consecutive 429/503 answers
+        self.epoch = 0              # bumped by every pause; older reservations are void
+        self.robots: Optional[RobotFileParser] = None
+        self.robots_expires = 0.0   # wall time robots.txt is due to be read again
+        self.robots_error: Optional[str] = None  # why the whole host is disallowed, if it is
+        self.robots_lock = threading.Lock()
+
+    def take(self, now: float) -> float:
+        """Reserve the next slot; returns the wait for this request."""
+        interval = 1 / self.rate
+        tat = max(self.tat, now, self.not_before)
+        self.tat = tat + interval
+        return max(0.0, tat - (self.burst - 1) * interval - now, self.not_before - now)
+
+    def pause(self, now: float, seconds: float) -> None:
+        """Hold every request until now + seconds, with no burst after it, and void waiting reservations."""
+        self.not_before = now + seconds
+        self.tat = self.not_before + (self.burst - 1) / self.rate
+        self.epoch += 1
+
+
+class PolitenessScheduler:
+    """Shared per-host pacing state; thread-safe, and usable from asyncio (it never blocks)."""
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST, agent: str = ROBOTS_AGENT):
+        self.rate = rate
+        self.burst = burst
+        self.agent = agent
+        self._hosts: dict[str, _Host] = {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "throttled": 0, "disallowed": 0, "waited": 0.0}
+
+    def _host(self, url: str) -> _Host:
+        key = host_key(url)
+        with self._lock:
+            if key not in self._hosts:
+                self._hosts[key] = _Host(self.rate, self.burst)
+            return self._hosts[key]
+
+    # -------------------------
+    # robots.txt
+    # -------------------------
+    def needs_robots(self, url: str) -> bool:
+        return time.time() >= self._host(url).robots_expires
+
+    def robots_lock(self, url: str) -> threading.Lock:
+        """Per-host lock, so concurrent first requests fetch robots.txt once."""
+        return self._host(url).robots_lock
+
+    def set_robots(self, url: str, status: Optional[int], text: str = "") -> None:
+        """
+        Apply a fetched robots.txt, following RFC 9309. A 2xx body is parsed.
+        Any other status below 500 means everything is allowed. A 5xx, or
+        status None for a fetch that failed, disallows the whole host until
+        ROBOTS_RETRY seconds have passed.
+        """
+        host = self._host(url)
+        parser, error, ttl = None, None, ROBOTS_TTL
+        if status is None or status >= 500:
+            error = f"robots.txt unreachable ({status or 'network error'})"
+            ttl = ROBOTS_RETRY
+            logger.warning(f"{host_key(url)}: {error}; not crawling it for {ROBOTS_RETRY:.0f}s")
+        elif 200 <= status < 300:
+            parser = RobotFileParser()
+            parser.parse(text.splitlines())
+        delay = parser.crawl_delay(self.agent) if parser is not None else None
+        with self._lock:
+            host.robots = parser
+            host.robots_error = error
+            host.robots_expires = time.time() + ttl
+            if delay:
+                host.max_rate = min(self.rate, 1 / float(delay))
+                host.rate = min(host.rate, host.max_rate)
+                host.burst = 1
+                logger.info(f"{host_key(url)} asks for a {delay}s crawl delay")
+
+    def load_robots(self, url: str, fetch: Callable[[str], tuple[int, str]]) -> None:
+        """Fetch robots.txt through `fetch(robots_url) -> (status, text)` unless it is cached."""
+        with self.robots_lock(url):
+            if self.needs_robots(url):
+                try:
+                    status, text = fetch(robots_url(url))
+                except OSError:  # requests errors are OSErrors
+                    self.set_robots(url, None)
+                    raise
+                self.set_robots(url, status, text)
+
+    def allowed(self, url: str) -> bool:
+        host = self._host(url)
+        if host.robots_error is not None:
+            return False
+        return host.robots is None or host.robots.can_fetch(self.agent, url)
+
+    # -------------------------
+    # Pacing
+    # -------------------------
+    def reserve(self, url: str) -> tuple[float, int]:
+        """(seconds to wait before sending `url`, host epoch); raises RobotsDisallowed if robots.txt forbids it."""
+        if not self.allowed(url):
+            self.stats["disallowed"] += 1
+            error = self._host(url).robots_error
+            raise RobotsDisallowed(f"{error}, skipping {url}" if error else f"robots.txt disallows {url}")
+        host = self._host(url)
+        with self._lock:
+            wait = host.take(time.monotonic())
+            self.stats["requests"] += 1
+            self.stats["waited"] += wait
+            return wait, host.epoch
+
+    def current(self, url: str, epoch: int) -> bool:
+        """False once the host has paused since the reservation made at `epoch`."""
+        return self._host(url).epoch == epoch
+
+    def wait(self, url: str, fetch_robots: Optional[Callable[[str], tuple[int, str]]] = None) -> None:
+        """Blocking: load robots.txt if needed, then sleep until `url` may be sent."""
+        if fetch_robots is not None:
+            self.load_robots(url, fetch_robots)
+        while True:
+            delay, epoch = self.reserve(url)
+            time.sleep(delay)
+            if self.current(url, epoch):
+                return
+
+    def record(self, url: str, status: int, retry_after: Optional[str] = None) -> None:
+        """Adapt the host's pace to a response status."""
+        host = self._host(url)
+        with self._lock:
+            if status in RETRY_STATUSES:
+                self.stats["throttled"] += 1
+                now = time.monotonic()
+                if host.not_before > now:
+                    return  # sent before the current pause began
+                host.strikes += 1
+                host.rate = max(MIN_RATE, host.rate / 2)
+                pause = parse_retry_after(retry_after)
+                if pause is None:
+                    pause = BACKOFF_BASE * 2 ** (host.strikes - 1)
+                pause = min(pause, MAX_BACKOFF)
+                host.pause(now, pause)
+                logger.warning(f"{host_key(url)} answered {status}, pausing {pause:.1f}s at {host.rate:.2f} req/s")
+            elif status < 500:
+                host.strikes = 0
+                host.rate = min(host.max_rate, host.rate + RATE_STEP)
+
+    def host_rate(self, url: str) -> float:
+        return self._host(url).rate
+
+
+_scheduler: Optional[PolitenessScheduler] = None
+
+
+def get_scheduler() -> PolitenessScheduler:
+    """Process-wide scheduler shared by scraper.py, the fetch engine and the *_scraper.py plugins."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = PolitenessScheduler()
+    return _scheduler
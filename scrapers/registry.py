@@ -0,0 +1,152 @@
+# scrapers/registry.py
+"""
+Declarative registry of institution-specific programme scrapers.
+
+Each plugin is described here by lightweight metadata: the institutions it
+covers (by name and/or website domain), what it can scrape, and its cost
+class. The plugin module itself is only imported once one of its
+institutions is actually scheduled, so the manager and the scheduler do
+not pay for Selenium, pandas or BeautifulSoup imports they will not use.
+
+`*_scraper.py` files that are not declared below are still picked up, and
+are matched by their file name against institution name words and acronyms
+(e.g. `dut_scraper.py` -> "Durban University of Technology").
+"""
+import importlib
+import os
+import re
+from typing import Optional
+from urllib.parse import urlsplit
+
+SCRAPER_DIR = os.path.dirname(__file__)
+
+# Modules that end in _scraper.py but are pipeline stages, not programme plugins
+STAGE_MODULES = {"scraper", "scraper_manager", "dhet_scraper", "dhet_map_scraper", "dhet_details_scraper"}
+
+# Default per-institution time budget (seconds) and per-plugin concurrency by cost class
+COST_CLASSES = {
+    "light": {"timeout": 120, "max_concurrency": 4},    # plain HTTP + HTML parsing
+    "browser": {"timeout": 300, "max_concurrency": 1},  # drives a headless browser
+}
+
+NAME_STOPWORDS = {"of", "the", "and", "for"}
+
+
+def name_keys(name: str) -> set[str]:
+    """Lookup keys for an institution name: its words plus its acronyms."""
+    words = re.findall(r"[a-z0-9]+", name.lower())
+    keys = {w for w in words if w not in NAME_STOPWORDS}
+    if words:
+        keys.add("".join(w[0] for w in words))
+        keys.add("".join(w[0] for w in words if w not in NAME_STOPWORDS))
+    return keys
+
+
+def url_host(url: Optional[str]) -> Optional[str]:
+    if not url:
+        return None
+    host = urlsplit(url).hostname or ""
+    return host[4:] if host.startswith("www.") else host or None
+
+
+class ScraperPlugin:
+    """Metadata for one plugin module; the module is imported lazily by `load()`."""
+
+    def __init__(
+        self,
+        module: str,
+        institutions: tuple = (),
+        domains: tuple = (),
+        capabilities: tuple = ("programmes",),
+        cost: str = "light",
+        timeout: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+    ):
+        if cost not in COST_CLASSES:
+            raise ValueError(f"Unknown cost class '{cost}' for {module}")
+        self.module = module
+        self.institutions = tuple(n.strip().lower() for n in institutions)
+        self.domains = tuple(d.lower() for d in domains)
+        self.capabilities = tuple(capabilities)
+        self.cost = cost
+        self.timeout = timeout or COST_CLASSES[cost]["timeout"]
+        self.max_concurrency = max_concurrency or COST_CLASSES[cost]["max_concurrency"]
+        self.base = module.rsplit(".", 1)[-1].replace("_scraper", "")
+        self._module = None
+
+    def load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self.module)
+        return self._module
+
+    def __repr__(self):
+        return f"ScraperPlugin({self.module!r}, cost={self.cost!r})"
+
+
+# -------------------------
+# Declared plugins
+# -------------------------
+PLUGINS = [
+    ScraperPlugin(
+        "scrapers.dut_scraper",
+        institutions=("Durban University of Technology",),
+        domains=("dut.ac.za",),
+    ),
+    ScraperPlugin(
+        "scrapers.ukzn_scraper",
+        institutions=("University of KwaZulu-Natal",),
+        domains=("ukzn.ac.za",),
+    ),
+]
+
+
+class PluginRegistry:
+    """Matches institutions to plugins through hash lookups on name, domain and name keys."""
+
+    def __init__(self, plugins: list):
+        self.plugins = list(plugins)
+        self._by_name: dict[str, list] = {}
+        self._by_domain: dict[str, list] = {}
+        self._by_key: dict[str, list] = {}
+        for plugin in self.plugins:
+            for name in plugin.institutions:
+                self._by_name.setdefault(name, []).append(plugin)
+            for domain in plugin.domains:
+                self._by_domain.setdefault(domain, []).append(plugin)
+            self._by_key.setdefault(plugin.base, []).append(plugin)
+
+    def plugins_for(self, inst: dict, capability: str = "programmes") -> list:
+        found = list(self._by_name.get(inst["name"].strip().lower(), []))
+
+        host = url_host(inst.get("url"))
+        while host:
+            found.extend(self._by_domain.get(host, []))
+            host = host.partition(".")[2] if "." in host else None
+
+        for key in name_keys(inst["name"]):
+            found.extend(self._by_key.get(key, []))
+
+        unique = []
+        for plugin in found:
+            if plugin not in unique and capability in plugin.capabilities:
+                unique.append(plugin)
+        return unique
+
+    def match(self, institutions: list, capability: str = "programmes") -> list:
+        """(plugin, institution) pairs to schedule, in institution order."""
+        return [(plugin, inst) for inst in institutions for plugin in self.plugins_for(inst, capability)]
+
+
+def discover_plugins() -> list:
+    """Declared plugins plus a name-matched default entry for any undeclared *_scraper.py file."""
+    declared = {plugin.module for plugin in PLUGINS}
+    plugins = list(PLUGINS)
+    for file in sorted(os.listdir(SCRAPER_DIR)):
+        base = file[:-3]
+        if file.endswith("_scraper.py") and base not in STAGE_MODULES and f"scrapers.{base}" not in declared:
+            plugins.append(ScraperPlugin(f"scrapers.{base}"))
+    return plugins
+
+
+def get_registry() -> PluginRegistry:
+    return PluginRegistry(discover_plugins())
@@ -0,0 +1,324 @@
+# scrapers/resolver.py
+"""
+Resolver stage for guessed institution homepages.
+
+scraper.py used to guess https://www.<name>.ac.za/ for every institution and
+fetch the guess, which mostly pointed at hosts that do not exist. Every
+run paid for those failures again. This stage makes them cheap:
+
+1. Known URLs first. Homepages confirmed by an earlier run are read back
+   from db/seed_institutions.csv (the positive cache) and tried before
+   any guess.
+2. Negative cache. Hosts that failed to resolve, connect or answer are
+   stored in data/resolver_cache.json with a retry time. A host is skipped,
+   without any network traffic, until that time. The TTL doubles with each
+   consecutive failure and is jittered, so retries spread across runs.
+3. DNS pre-checks. The remaining candidate hosts are resolved concurrently
+   with a short timeout. Only hosts that resolve are fetched. Transient
+   DNS errors are retried with jittered exponential backoff.
+4. Circuit breaker. The fetch engine stops sending requests to a domain
+   after repeated connection failures within a run (see CircuitBreaker).
+
+Confirmed homepages are written back to the seed file, and the
+institutions table is seeded from that file (db/db.py).
+"""
+import asyncio
+import csv
+import json
+import os
+import random
+import re
+import socket
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+from scrapers.http_cache import HttpCache
+from scrapers.registry import url_host
+from utils.logger import setup_logger
+from utils.metrics import INSTITUTION_FETCH_DURATION
+from utils.snapshots import atomic_write, atomic_write_json
+
+logger = setup_logger("resolver")
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+RESOLVER_CACHE_FILE = os.path.join(BASE_DIR, "data", "resolver_cache.json")
+SEED_FILE = os.path.join(BASE_DIR, "db", "seed_institutions.csv")
+SEED_COLUMNS = ["name", "type", "province", "url"]
+
+DNS_TIMEOUT = 3.0
+DNS_CONCURRENCY = 32
+DNS_RETRIES = 2             # extra attempts after a transient DNS error
+DNS_RETRY_BASE = 0.5        # seconds; full jitter up to base * 2**attempt
+
+# First negative TTL per failure kind; doubles per consecutive failure up to NEGATIVE_MAX_TTL
+NEGATIVE_TTL = {"dns": 24 * 3600, "fetch": 6 * 3600, "content": 24 * 3600}
+NEGATIVE_MAX_TTL = 30 * 24 * 3600
+
+BREAKER_THRESHOLD = 3       # consecutive failures that open a domain's circuit
+BREAKER_COOLDOWN = 60.0     # seconds before an open circuit lets one probe through
+
+_HOSTNAME = re.compile(r"^(?=.{1,253}$)([a-z0-9]([a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,63}$")
+_TRANSIENT_DNS_ERRORS = {socket.EAI_AGAIN}
+
+
+def backoff(base: float, failures: int, cap: float) -> float:
+    """Exponential backoff with "equal jitter": a random point in the upper half of base * 2**(failures - 1)."""
+    ttl = min(cap, base * 2 ** max(0, failures - 1))
+    return random.uniform(ttl / 2, ttl)
+
+
+def candidate_urls(name: str) -> list[str]:
+    """Guessed homepages for an institution name, most likely first."""
+    slug = name.lower().replace(" ", "")
+    return [f"https://www.{slug}.ac.za/", f"https://{slug}.ac.za/"]
+
+
+def domain_of(url: str) -> str:
+    """Circuit-breaker key: the host without a leading www."""
+    return url_host(url) or urlsplit(url).netloc
+
+
+# -------------------------
+# Circuit breaker
+# -------------------------
+class CircuitBreaker:
+    """
+    Per-domain breaker for one run.
+
+    Closed: requests pass. After BREAKER_THRESHOLD consecutive failures the
+    circuit opens, and requests to the domain fail at once. When a jittered
+    cooldown (doubling each time it reopens) has passed, it goes half-open:
+    one probe is let through. Success closes the circuit, failure reopens it.
+    """
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._domains: dict[str, dict] = {}
+        self.stats = {"rejected": 0, "opened": 0}
+
+    def allow(self, url: str) -> bool:
+        state = self._domains.get(domain_of(url))
+        if state is None or state["failures"] < self.threshold:
+            return True
+        now = time.monotonic()
+        if now >= state["open_until"] and not state["probing"]:
+            state["probing"] = True  # half-open: let exactly one request through
+            return True
+        self.stats["rejected"] += 1
+        return False
+
+    def success(self, url: str) -> None:
+        self._domains.pop(domain_of(url), None)
+
+    def failure(self, url: str) -> None:
+        domain = domain_of(url)
+        state = self._domains.setdefault(domain, {"failures": 0, "opens": 0, "open_until": 0.0, "probing": False})
+        state["failures"] += 1
+        state["probing"] = False
+        if state["failures"] >= self.threshold:
+            state["opens"] += 1
+            state["open_until"] = time.monotonic() + backoff(self.cooldown, state["opens"], NEGATIVE_MAX_TTL)
+            self.stats["opened"] += 1
+            if state["opens"] == 1:
+                logger.warning(f"Circuit open for {domain} after {state['failures']} failures")
+
+
+# -------------------------
+# Persistent caches
+# -------------------------
+class ResolverCache:
+    """Negative cache (data/resolver_cache.json) and positive cache (db/seed_institutions.csv)."""
+
+    def __init__(self, path: str = RESOLVER_CACHE_FILE, seed_file: str = SEED_FILE):
+        self.path = path
+        self.seed_file = seed_file
+        self.hosts: dict[str, dict] = {}
+        self.seed_rows: list[dict] = []
+        self.confirmed: dict[str, dict] = {}
+        self.stats = {"skipped": 0, "negative": 0, "confirmed": 0}
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.hosts = json.load(f).get("hosts", {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable resolver cache {path}: {e}")
+        if os.path.exists(seed_file):
+            with open(seed_file, "r", encoding="utf-8", newline="") as f:
+                self.seed_rows = [row for row in csv.DictReader(f) if (row.get("name") or "").strip()]
+
+    def known_url(self, name: str) -> Optional[str]:
+        key = name.strip().lower()
+        for row in self.seed_rows:
+            if row["name"].strip().lower() == key and (row.get("url") or "").strip():
+                return row["url"].strip()
+        return None
+
+    def is_dead(self, host: str) -> bool:
+        entry = self.hosts.get(host)
+        return entry is not None and entry["retry_at"] > time.time()
+
+    def fail(self, host: str, reason: str) -> None:
+        entry = self.hosts.get(host, {"failures": 0})
+        failures = entry["failures"] + 1
+        ttl = backoff(NEGATIVE_TTL[reason], failures, NEGATIVE_MAX_TTL)
+        self.hosts[host] = {"reason": reason, "failures": failures, "retry_at": time.time() + ttl}
+        self.stats["negative"] += 1
+
+    def confirm(self, inst: dict, url: str) -> None:
+        self.hosts.pop(urlsplit(url).hostname or "", None)
+        self.confirmed[inst["name"].strip().lower()] = {
+            "name": inst["name"], "type": inst.get("type") or "", "province": inst.get("province") or "", "url": url,
+        }
+        self.stats["confirmed"] += 1
+
+    def save(self) -> None:
+        now = time.time()
+        # Entries whose retry time passed long ago carry no information any more
+        hosts = {h: e for h, e in self.hosts.items() if e["retry_at"] > now - NEGATIVE_MAX_TTL}
+        atomic_write_json(self.path, {"hosts": hosts}, indent=2)
+        self._write_seed()
+
+    def _write_seed(self) -> None:
+        """Add or update confirmed homepages in the seed file; other rows are kept as they are."""
+        pending = dict(self.confirmed)
+        changed = False
+        rows = []
+        for row in self.seed_rows:
+            update = pending.pop(row["name"].strip().lower(), None)
+            if update is not None and (row.get("url") or "").strip() != update["url"]:
+                row = {**row, "url": update["url"], "type": row.get("type") or update["type"]}
+                changed = True
+            rows.append(row)
+        for update in sorted(pending.values(), key=lambda r: r["name"].lower()):
+            rows.append(update)
+            changed = True
+        if not changed:
+            return
+
+        fieldnames = SEED_COLUMNS + [c for row in rows for c in row if c not in SEED_COLUMNS]
+        fieldnames = list(dict.fromkeys(fieldnames))
+
+        def write(f):
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore", lineterminator="\n")
+            writer.writeheader()
+            writer.writerows(rows)
+
+        atomic_write(self.seed_file, write, newline="")
+        self.seed_rows = rows
+        logger.info(f"Wrote {len(self.confirmed)} confirmed homepages to {self.seed_file}")
+
+
+# -------------------------
+# DNS pre-checks
+# -------------------------
+async def dns_resolves(host: str, timeout: float = DNS_TIMEOUT, retries: int = DNS_RETRIES) -> bool:
+    """True if `host` has an address; transient errors and timeouts are retried with jittered backoff."""
+    if not _HOSTNAME.match(host):
+        return False
+    loop = asyncio.get_running_loop()
+    for attempt in range(retries + 1):
+        try:
+            await asyncio.wait_for(loop.getaddrinfo(host, 443, type=socket.SOCK_STREAM), timeout)
+            return True
+        except socket.gaierror as e:
+            if e.errno not in _TRANSIENT_DNS_ERRORS:
+                return False
+        except asyncio.TimeoutError:
+            pass
+        if attempt < retries:
+            await asyncio.sleep(random.uniform(0, DNS_RETRY_BASE * 2 ** attempt))
+    return False
+
+
+# -------------------------
+# Resolver stage
+# -------------------------
+def _candidates(inst: dict, cache: ResolverCache) -> list[str]:
+    """Candidate homepages of `inst`, its last confirmed URL first."""
+    urls = candidate_urls(inst["name"])
+    known = cache.known_url(inst["name"])
+    if known:
+        urls = [known] + [u for u in urls if u != known]
+    return urls
+
+
+async def _resolve_hosts(candidates: list[list[str]], cache: ResolverCache) -> set[str]:
+    """Resolve every candidate host not in the negative cache, all at once; returns the ones that resolve."""
+    hosts = {urlsplit(u).hostname for urls in candidates for u in urls}
+    live_hosts = {h for h in hosts if h and not cache.is_dead(h)}
+    cache.stats["skipped"] += len(hosts) - len(live_hosts)
+    dns_slots = asyncio.Semaphore(DNS_CONCURRENCY)
+
+    async def check(host):
+        async with dns_slots:
+            return host, await dns_resolves(host)
+
+    resolved = set()
+    for host, ok in await asyncio.gather(*(check(h) for h in live_hosts)):
+        if ok:
+            resolved.add(host)
+        else:
+            cache.fail(host, "dns")
+    logger.info(
+        f"{len(resolved)} of {len(hosts)} candidate hosts resolve "
+        f"({len(hosts) - len(live_hosts)} skipped from the negative cache)"
+    )
+    return resolved
+
+
+async def _resolve_infos(institutions: list[dict], cache: ResolverCache, http_cache: Optional[HttpCache],
+                         engine_options: dict) -> list[Optional[dict]]:
+    from scrapers.fetch_engine import FetchEngine
+    from scrapers.scraper import head_institution_info
+
+    candidates = [_candidates(inst, cache) for inst in institutions]
+    resolved = await _resolve_hosts(candidates, cache)
+
+    engine_options.setdefault("breaker", CircuitBreaker())
+    async with FetchEngine(cache=http_cache, **engine_options) as engine:
+        async def first_live(inst, urls):
+            for url in urls:
+                host = urlsplit(url).hostname
+                if host not in resolved:
+                    continue
+                head = await engine.fetch_head(url)
+                if head is None:
+                    cache.fail(host, "fetch")  # refused, timed out or an HTTP error
+                    continue
+                info = head_institution_info(url, head)
+                if info is None:
+                    cache.fail(host, "content")  # answers, but not with a homepage
+                    continue
+                cache.confirm(inst, head.url)
+                return info
+            return None
+
+        async def timed(inst, urls):
+            with INSTITUTION_FETCH_DURATION.time(institution=inst["name"]):
+                return await first_live(inst, urls)
+
+        return await asyncio.gather(*(timed(inst, urls) for inst, urls in zip(institutions, candidates)))
+
+
+def resolve_institution_infos(institutions: list[dict], cache: Optional[ResolverCache] = None,
+                              http_cache: Optional[HttpCache] = None, **engine_options) -> list[Optional[dict]]:
+    """
+    Find and fetch each institution's homepage; results line up with `institutions`.
+
+    Same per-item contract as get_institution_info (a dict, {} without a
+    logo, None when nothing was found). `cache` is the resolver's own cache
+    and `http_cache` the conditional HTTP cache handed to the FetchEngine;
+    other keyword arguments go to the FetchEngine as well. The resolver
+    cache is saved afterwards.
+    """
+    cache = cache or ResolverCache()
+    infos = asyncio.run(_resolve_infos(list(institutions), cache, http_cache, engine_options))
+    cache.save()
+    logger.info(
+        f"Resolver: {cache.stats['confirmed']} homepages confirmed, {cache.stats['skipped']} dead hosts skipped, "
+        f"{cache.stats['negative']} new negative entries"
+    )
+    return infos
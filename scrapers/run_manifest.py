@@ -0,0 +1,83 @@
+# scrapers/run_manifest.py
+import hashlib
+import json
+import os
+import time
+from typing import Any, Optional
+from utils.logger import setup_logger
+
+logger = setup_logger("run_manifest")
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+MANIFEST_FILE = os.path.join(DATA_DIR, "run_manifest.json")
+
+
+def content_hash(value: Any) -> str:
+    """Stable hash of any JSON-serialisable value (key order does not matter)."""
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RunManifest:
+    """
+    Records, per stage and per key (an institution name or "*" for a whole
+    stage), the content hash of the last successful output and when it ran.
+
+    The manager uses it to decide what an incremental run can skip:
+
+        {
+            "programmes": {
+                "durban university of technology": {"hash": "...", "source_hash": "...", "last_success": 1700000000.0}
+            },
+            "sources": {"*": {...}}
+        }
+    """
+
+    def __init__(self, path: str = MANIFEST_FILE):
+        self.path = path
+        self.entries: dict[str, dict[str, dict]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Ignoring unreadable manifest {path}: {e}")
+
+    @staticmethod
+    def _key(key: str) -> str:
+        return key.strip().lower()
+
+    def get(self, stage: str, key: str = "*") -> Optional[dict]:
+        return self.entries.get(stage, {}).get(self._key(key))
+
+    def is_fresh(self, stage: str, key: str = "*", source_hash: Optional[str] = None, max_age: float = 0) -> bool:
+        """
+        True when the stage last succeeded for this key within max_age seconds
+        and, if given, from the same source content.
+        """
+        entry = self.get(stage, key)
+        if entry is None:
+            return False
+        if source_hash is not None and entry.get("source_hash") != source_hash:
+            return False
+        return time.time() - entry.get("last_success", 0) < max_age
+
+    def is_unchanged(self, stage: str, key: str, output_hash: str) -> bool:
+        """True when a freshly produced output matches the last recorded one."""
+        entry = self.get(stage, key)
+        return entry is not None and entry.get("hash") == output_hash
+
+    def record(self, stage: str, key: str = "*", output_hash: Optional[str] = None, source_hash: Optional[str] = None) -> None:
+        entry = self.entries.setdefault(stage, {}).setdefault(self._key(key), {})
+        if output_hash is not None:
+            entry["hash"] = output_hash
+        if source_hash is not None:
+            entry["source_hash"] = source_hash
+        entry["last_success"] = time.time()
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
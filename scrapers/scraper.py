@@ -1,41 +1,84 @@
-from dhet_map_scraper import scrape_dhet_institutions
+from scrapers.dhet_map_scraper import scrape_dhet_institutions
+from scrapers.fetch_engine import DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT
+from scrapers.head_parser import CHUNK_SIZE, HEAD_BYTE_CAP, HeadReader, head_cache_key, read_head
+from scrapers import http_cache
+from scrapers.politeness import get_scheduler
+from scrapers.resolver import candidate_urls, resolve_institution_infos
+from utils.metrics import FETCH_BYTES
 from bs4 import BeautifulSoup
 import requests
 from urllib.parse import urljoin
-from typing import Dict
+from typing import Dict, Optional
 
 
-def get_institution_info(url: str) -> Dict[str, str] | None:
+def get_institution_info(url: str, max_bytes: Optional[int] = HEAD_BYTE_CAP) -> Optional[Dict[str, str]]:
     """
     Fetches institution information from a webpage.
 
+    Only the page's head is downloaded: the body is streamed until the title
+    and favicon are known or `max_bytes` have been read (see
+    scrapers/head_parser.py), and the connection is then closed.
+
     Args:
         url (str): The URL of the webpage to scrape.
+        max_bytes (Optional[int]): Cap on body bytes read; None reads until the head ends.
 
     Returns:
         Optional[Dict[str, str]]: A dictionary containing the institution's name, type, URL, and logo URL.
     """
+    key = head_cache_key(url)
     try:
-        response = requests.get(url)
-        response.raise_for_status()
+        with http_cache.session().get(
+            url, timeout=(DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT), stream=True, cache_key=key
+        ) as response:
+            response.raise_for_status()
+            head = read_head(response.iter_content(CHUNK_SIZE), response.headers.get("Content-Type"), max_bytes)
+            if not response.from_cache:
+                http_cache.get_cache().store(key, response.headers, head.prefix)
+                FETCH_BYTES.inc(head.bytes_read, client="requests")
     except requests.RequestException as e:
         print(f"Error fetching {url}: {e}")
         return None
 
-    soup = BeautifulSoup(response.text, "html.parser")
+    return head_institution_info(url, head)
+
+
+def parse_institution_info(url: str, html: str) -> Optional[Dict[str, str]]:
+    """
+    Extracts the institution's name and logo from a complete homepage.
+
+    Builds a full document tree; get_institution_info and the fetch engine use
+    the streaming head_institution_info instead, which returns the same shape:
+    a dict, {} when no logo was found, or None without a title.
+    """
+    soup = BeautifulSoup(html, "html.parser")
     name_tag = soup.title
-    if name_tag is None:
+    logo_tag = soup.find("link", rel="icon")
+    return _institution_info(
+        url,
+        name_tag.get_text() if name_tag is not None else None,
+        logo_tag is not None,
+        logo_tag.get("href") if logo_tag is not None else None,
+    )
+
+
+def head_institution_info(url: str, head: HeadReader) -> Optional[Dict[str, str]]:
+    """Same as parse_institution_info, from a streamed HeadReader."""
+    return _institution_info(url, head.title, head.has_icon, head.icon)
+
+
+def _institution_info(url: str, title: Optional[str], has_icon: bool, href: Optional[str]) -> Optional[Dict[str, str]]:
+    if title is None:
         print(f"Error: Could not find title tag in {url}")
         return None
 
-    name = name_tag.string.strip() if name_tag else "Unknown"
+    name = title.strip()
 
-    logo_tag = soup.find("link", rel="icon")
-    if logo_tag is None:
+    if not has_icon:
         print(f"Error: Could not find logo tag in {url}")
         logo = None
     else:
-        logo = logo_tag.get("href")
+        logo = href
         if logo and not str(logo).startswith("http"):
             logo = str(logo)  # Convert logo to str
             logo = urljoin(url, logo)
@@ -50,23 +93,32 @@ def get_institution_info(url: str) -> Dict[str, str] | None:
         "logo": logo
     } if logo is not None else {}
 
-def main():
+
+def guess_institution_url(name: str) -> str:
+    """Guess an institution's homepage from its name (the first of resolver.candidate_urls)."""
+    return candidate_urls(name)[0]
+
+
+def scrape_institutions() -> list[Dict[str, str]]:
+    """Fetch every guessed institution homepage concurrently and return the ones that resolved."""
     # Step 1: Get institution names from DHET
-    institution_names = scrape_dhet_institutions()  # returns a list of names
+    institutions = scrape_dhet_institutions()  # returns a list of dicts
+
+    # Step 2: Resolve homepages: confirmed URLs first, then guesses (see guess_institution_url)
+    # whose hosts resolve and are not in the negative cache (scrapers/resolver.py).
+    # All hosts are fetched at once, so the sweep takes about as long as the slowest host;
+    # each host is still paced by the shared politeness scheduler
+    infos = resolve_institution_infos(institutions, politeness=get_scheduler(), http_cache=http_cache.get_cache())
+    return [info for info in infos if info]
 
-    # Step 2: Convert names to URLs (this can be refined with a more advanced function)
-    institution_pages = [f"https://www.{name.lower().replace(' ', '')}.ac.za/" for name in institution_names]
 
-    all_institutions = []
-    for page in institution_pages:
-        info = get_institution_info(page)
-        if info:
-            all_institutions.append(info)
+def main():
+    all_institutions = scrape_institutions()
 
     # Step 3: Print or save results
     for inst in all_institutions:
         print(inst)
 
+
 if __name__ == "__main__":
     main()
-
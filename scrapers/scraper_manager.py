@@ -1,13 +1,23 @@
 # scrapers/scraper_manager.py
 import os
+import csv
+import time
+import queue
+import argparse
 import importlib
-import logging
 import json
+import threading
+from collections import deque
 import pandas as pd
 from utils.logger import setup_logger
-from utils.cleaner import clean_programmes
-from scrapers.mistral_ai_parser import MistralAIParser
-from scrapers.dhet_details_scraper import main as enrich_tvet_details
+from utils.cleaner import clean_programmes, clean_programmes_csv
+from utils.entities import EntityIndex, merge_institutions
+from utils.metrics import INSTITUTION_SCRAPE_DURATION, INSTITUTION_SCRAPE_FAILURES, stage_timer, write_textfile
+from utils.columnar import ARROW_AVAILABLE, columnar_paths, read_frame, write_columnar
+from scrapers.registry import get_registry
+from scrapers.run_manifest import RunManifest, content_hash
+from utils.snapshots import SnapshotError, atomic_write, atomic_write_csv, atomic_write_json, publish
+from db.db import init_db, connect, upsert_institutions, load_programmes_csv
 
 # Setup logger
 logger = setup_logger('scraper_manager')
@@ -18,6 +28,23 @@ DATA_DIR = os.path.join(BASE_DIR, 'data')
 SOURCES_FILE = os.path.join(DATA_DIR, 'sources.json')
 PROGRAMMES_RAW_FILE = os.path.join(DATA_DIR, 'programmes_raw.csv')
 PROGRAMMES_CLEAN_FILE = os.path.join(DATA_DIR, 'programmes_clean.csv')
+PROGRAMMES_PARQUET_FILE, PROGRAMMES_FEATHER_FILE = columnar_paths(PROGRAMMES_CLEAN_FILE)
+TVET_DETAILS_FILE = os.path.join(DATA_DIR, 'tvet_details.json')
+
+# How long an incremental run trusts a stage's last success before redoing it
+SOURCES_MAX_AGE = 7 * 24 * 3600
+TVET_DETAILS_MAX_AGE = 7 * 24 * 3600
+PROGRAMMES_MAX_AGE = 7 * 24 * 3600
+
+# Programme scraper jobs running at once; per-plugin time budgets and
+# concurrency come from the plugin registry (scrapers/registry.py).
+SCRAPER_WORKERS = 8
+
+# Serializes writes of the data files, the database sync and snapshot
+# publishing when the scheduler runs several jobs in one process (utils/jobs.py)
+WRITE_LOCK = threading.RLock()
+
+STAGES = ('sources', 'tvet_details', 'programmes')
 
 
 def run_general_scraper():
@@ -45,92 +72,506 @@ def run_dhet_scraper():
 
 
 def merge_and_save_sources(tvets, universities):
-    """Merge universities and TVET colleges and save to sources.json."""
-    merged = tvets + universities
-    seen = set()
-    unique_institutions = []
+    """
+    Merge universities and TVET colleges and save to sources.json.
 
-    for inst in merged:
-        name_lower = inst['name'].strip().lower()
-        if name_lower not in seen:
-            seen.add(name_lower)
-            unique_institutions.append(inst)
+    Variant spellings of one institution collapse into a single record with
+    a stable "id" (see utils/entities.py).
+    """
+    index = EntityIndex()
+    unique_institutions = merge_institutions(tvets + universities, index)
+    index.save()
 
-    with open(SOURCES_FILE, 'w', encoding='utf-8') as f:
-        json.dump(unique_institutions, f, indent=4, ensure_ascii=False)
+    atomic_write_json(SOURCES_FILE, unique_institutions)
 
-    logger.info(f"Saved {len(unique_institutions)} institutions to {SOURCES_FILE}")
+    logger.info(
+        f"Saved {len(unique_institutions)} institutions to {SOURCES_FILE} "
+        f"({index.stats['fuzzy']} variant spellings matched, {index.stats['new']} new IDs)"
+    )
     return unique_institutions
 
 
-def run_institution_scrapers(institutions):
-    """Run all institution-specific scrapers dynamically and collect programme data."""
-    programme_data = []
-
-    scraper_dir = os.path.dirname(__file__)
-    for file in os.listdir(scraper_dir):
-        if file.endswith('_scraper.py') and file not in ('scraper.py', 'scraper_manager.py', 'dhet_scraper.py'):
-            module_name = f"scrapers.{file[:-3]}"
-            try:
-                module = importlib.import_module(module_name)
-                for inst in institutions:
-                    # Match scraper to institution by name
-                    scraper_base = module_name.split('.')[-1].replace('_scraper', '')
-                    if scraper_base in inst['name'].lower():
-                        data = module.scrape_programmes(inst)  # returns list of dicts
-                        programme_data.extend(data)
-                        logger.info(f"Scraped {len(data)} programmes from {inst['name']}")
-            except Exception as e:
-                logger.error(f"Error running {module_name}: {e}")
-
-    if programme_data:
+class _ScrapeJob:
+    def __init__(self, plugin, inst):
+        self.plugin = plugin
+        self.module_name = plugin.module
+        self.inst = inst
+        self.timeout = plugin.timeout
+        self.max_concurrency = plugin.max_concurrency
+        self.started = None
+
+
+def _run_job(job, finished):
+    try:
+        # Plugin modules are imported only once one of their institutions runs
+        finished.put((job, job.plugin.load().scrape_programmes(job.inst), None))
+    except Exception as e:
+        finished.put((job, None, e))
+
+
+def run_scrape_jobs(jobs, workers=SCRAPER_WORKERS):
+    """
+    Run scraper jobs on daemon threads and yield (job, rows, error) as each finishes.
+
+    At most `workers` jobs run at once and at most the plugin's max_concurrency
+    per scraper module. A job that outlives its plugin's timeout is reported as
+    a TimeoutError and abandoned, freeing its slot; a late result is ignored.
+    """
+    pending = deque(jobs)
+    running = set()
+    per_module = {}
+    finished = queue.Queue()
+
+    def release(job):
+        running.discard(job)
+        per_module[job.module_name] -= 1
+
+    while pending or running:
+        # Start whatever fits under the global and per-scraper limits
+        for _ in range(len(pending)):
+            if len(running) >= workers:
+                break
+            job = pending.popleft()
+            if per_module.get(job.module_name, 0) >= job.max_concurrency:
+                pending.append(job)
+                continue
+            per_module[job.module_name] = per_module.get(job.module_name, 0) + 1
+            job.started = time.monotonic()
+            running.add(job)
+            threading.Thread(target=_run_job, args=(job, finished), daemon=True).start()
+
+        try:
+            job, rows, error = finished.get(timeout=0.5)
+            if job in running:
+                release(job)
+                yield job, rows, error
+        except queue.Empty:
+            pass
+
+        now = time.monotonic()
+        for job in [j for j in running if now - j.started > j.timeout]:
+            release(job)
+            yield job, None, TimeoutError(f"no result after {job.timeout}s")
+
+
+def scrape_institution_programmes(institutions, workers=SCRAPER_WORKERS):
+    """Run matching institution-specific scrapers concurrently and return programme rows keyed by institution name."""
+    results = {}
+    jobs = [_ScrapeJob(plugin, inst) for plugin, inst in get_registry().match(institutions)]
+    logger.info(f"Scheduled {len(jobs)} programme scraper jobs")
+
+    for job, data, error in run_scrape_jobs(jobs, workers=workers):
+        name = job.inst['name']
+        if error is not None:
+            INSTITUTION_SCRAPE_FAILURES.inc(institution=name)
+            logger.error(f"Error running {job.module_name} for {name}: {error}")
+            continue
+        elapsed = time.monotonic() - job.started
+        INSTITUTION_SCRAPE_DURATION.observe(elapsed, institution=name)
+        # Tag rows with their source so incremental runs can replace them
+        rows = [dict(row, source_institution=name, institution_id=job.inst.get('id')) for row in data]
+        results.setdefault(name, []).extend(rows)
+        logger.info(f"Scraped {len(data)} programmes from {name} in {elapsed:.1f}s")
+
+    return results
+
+
+def write_raw_programmes(programme_data):
+    """Write raw rows straight to CSV without building a DataFrame; columns are the union in first-seen order."""
+    fieldnames = list(dict.fromkeys(key for row in programme_data for key in row))
+
+    def write(f):
+        writer = csv.DictWriter(f, fieldnames=fieldnames, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(programme_data)
+
+    atomic_write(PROGRAMMES_RAW_FILE, write, newline='')
+
+
+def publish_columnar():
+    """Publish Parquet/Feather copies of programmes_clean.csv (skipped without pyarrow)."""
+    try:
+        paths = write_columnar(PROGRAMMES_CLEAN_FILE)
+    except Exception as e:
+        logger.error(f"Error publishing columnar programmes: {e}")
+        return
+    if paths:
+        logger.info(f"Published {' and '.join(paths)}")
+
+
+def run_institution_scrapers(institutions, chunksize=None):
+    """
+    Run all institution-specific scrapers dynamically and collect programme data.
+
+    With a chunksize, the raw CSV is cleaned in chunks of that many rows
+    (see utils.cleaner.clean_programmes_csv), so memory stays flat as the
+    catalogue grows.
+    """
+    results = scrape_institution_programmes(institutions)
+    programme_data = [row for rows in results.values() for row in rows]
+
+    if programme_data and chunksize:
+        write_raw_programmes(programme_data)
+        logger.info(f"Saved {len(programme_data)} raw programmes to {PROGRAMMES_RAW_FILE}")
+        del programme_data
+
+        written = clean_programmes_csv(PROGRAMMES_RAW_FILE, PROGRAMMES_CLEAN_FILE, chunksize=chunksize)
+        logger.info(f"Saved {written} cleaned programmes to {PROGRAMMES_CLEAN_FILE} (chunks of {chunksize})")
+        publish_columnar()
+
+    elif programme_data:
         df = pd.DataFrame(programme_data)
-        df.to_csv(PROGRAMMES_RAW_FILE, index=False, encoding='utf-8')
+        atomic_write_csv(df, PROGRAMMES_RAW_FILE)
         logger.info(f"Saved {len(df)} raw programmes to {PROGRAMMES_RAW_FILE}")
 
         cleaned_df = clean_programmes(df)
-        cleaned_df.to_csv(PROGRAMMES_CLEAN_FILE, index=False, encoding='utf-8')
+        atomic_write_csv(cleaned_df, PROGRAMMES_CLEAN_FILE)
         logger.info(f"Saved {len(cleaned_df)} cleaned programmes to {PROGRAMMES_CLEAN_FILE}")
+        publish_columnar()
 
+    return results
 
-def main():
-    logger.info("=== Starting scraping sequence ===")
 
-    # 1️⃣ Scrape universities
-    universities = run_general_scraper()
+# -------------------------
+# Incremental mode
+# -------------------------
+def _read_csv(path):
+    """Read a programmes CSV as strings; missing or empty files give an empty frame."""
+    try:
+        return pd.read_csv(path, dtype=str, keep_default_na=False)
+    except (FileNotFoundError, pd.errors.EmptyDataError):
+        return pd.DataFrame()
 
-    # 2️⃣ Scrape TVET colleges
-    tvet_colleges = run_dhet_scraper()
 
-    # 3️⃣ Merge sources
+def _read_clean():
+    """Current cleaned programmes as strings, from the memory-mapped Feather copy when it is up to date."""
+    if (ARROW_AVAILABLE and os.path.exists(PROGRAMMES_FEATHER_FILE) and os.path.exists(PROGRAMMES_CLEAN_FILE)
+            and os.path.getmtime(PROGRAMMES_FEATHER_FILE) >= os.path.getmtime(PROGRAMMES_CLEAN_FILE)):
+        return read_frame(PROGRAMMES_FEATHER_FILE, as_strings=True)
+    return _read_csv(PROGRAMMES_CLEAN_FILE)
+
+
+def _drop_institutions(df, names):
+    if df.empty or 'source_institution' not in df.columns:
+        return df
+    return df[~df['source_institution'].isin(names)]
+
+
+def update_programmes(changed):
+    """Replace only the changed institutions' rows in the raw and clean CSVs."""
+    names = set(changed)
+    new_raw = pd.DataFrame([row for rows in changed.values() for row in rows])
+
+    raw_df = pd.concat([_drop_institutions(_read_csv(PROGRAMMES_RAW_FILE), names), new_raw], ignore_index=True)
+    atomic_write_csv(raw_df, PROGRAMMES_RAW_FILE)
+    logger.info(f"Rewrote {len(new_raw)} raw programmes for {len(names)} institutions in {PROGRAMMES_RAW_FILE}")
+
+    clean_df = _drop_institutions(_read_clean(), names)
+    known_keys = clean_df['programme_key'].unique() if 'programme_key' in clean_df.columns else ()
+    cleaned_new = clean_programmes(new_raw, known_keys=known_keys) if not new_raw.empty else new_raw
+
+    clean_df = pd.concat([clean_df, cleaned_new], ignore_index=True)
+    sort_cols = [col for col in ["programme_key", "institution", "programme"] if col in clean_df.columns]
+    if sort_cols:
+        clean_df.sort_values(by=sort_cols, inplace=True)
+    clean_df.reset_index(drop=True, inplace=True)
+    atomic_write_csv(clean_df, PROGRAMMES_CLEAN_FILE)
+    logger.info(f"Saved {len(clean_df)} cleaned programmes to {PROGRAMMES_CLEAN_FILE}")
+    publish_columnar()
+
+
+def refresh_sources(manifest, force=False):
+    """Rebuild sources.json unless the last build is still fresh."""
+    if not force and os.path.exists(SOURCES_FILE) and manifest.is_fresh('sources', max_age=SOURCES_MAX_AGE):
+        with open(SOURCES_FILE, 'r', encoding='utf-8') as f:
+            institutions = json.load(f)
+        logger.info(f"Sources are fresh, reusing {len(institutions)} institutions from {SOURCES_FILE}")
+        return institutions
+
+    universities = run_general_scraper()
+    tvet_colleges = run_dhet_scraper()
     institutions = merge_and_save_sources(tvet_colleges, universities)
+    if institutions:
+        manifest.record('sources', output_hash=content_hash(institutions))
+    return institutions
 
-    # 4️⃣ Enrich TVET college details
-    from scrapers.dhet_details_scraper import main as enrich_tvet_details
-    enrich_tvet_details()
 
-    # 5️⃣ Optionally load enriched TVETs and update institutions
-    tvet_details_file = os.path.join(DATA_DIR, 'tvet_details.json')
-    if os.path.exists(tvet_details_file):
-        with open(tvet_details_file, 'r', encoding='utf-8') as f:
+def refresh_tvet_details(institutions, manifest, force=False):
+    """Enrich only TVET colleges whose source record changed or whose details went stale."""
+    tvets = [inst for inst in institutions if inst['type'].lower() == 'tvet college']
+    due = [
+        inst for inst in tvets
+        if force or not manifest.is_fresh('tvet_details', inst['name'], content_hash(inst), TVET_DETAILS_MAX_AGE)
+    ]
+    if not due:
+        logger.info("TVET details are fresh, skipping enrichment.")
+        return
+
+    details_by_name = {}
+    if os.path.exists(TVET_DETAILS_FILE):
+        with open(TVET_DETAILS_FILE, 'r', encoding='utf-8') as f:
+            details_by_name = {d['name'].lower(): d for d in json.load(f)}
+
+    from scrapers.dhet_details_scraper import enrich_tvet_colleges
+    enriched = enrich_tvet_colleges([inst['name'] for inst in due])
+    for inst, details in zip(due, enriched):
+        details_by_name[inst['name'].lower()] = details
+        # Colleges whose marker could not be read are retried next run
+        if details.get('address'):
+            manifest.record('tvet_details', inst['name'], content_hash(details), content_hash(inst))
+
+    merged = [details_by_name[inst['name'].lower()] for inst in tvets if inst['name'].lower() in details_by_name]
+    atomic_write_json(TVET_DETAILS_FILE, merged)
+    logger.info(f"Enriched {len(due)} of {len(tvets)} TVET colleges")
+
+
+def publish_snapshot(force=False):
+    """Publish the finished data files as a new validated snapshot and make it current (utils/snapshots.py)."""
+    files = [SOURCES_FILE, TVET_DETAILS_FILE, PROGRAMMES_CLEAN_FILE, PROGRAMMES_PARQUET_FILE, PROGRAMMES_FEATHER_FILE]
+    try:
+        return publish(files, force=force)
+    except SnapshotError as e:
+        logger.error(f"Snapshot not published, the API keeps serving the current one: {e}")
+    except OSError as e:
+        logger.error(f"Error publishing snapshot: {e}")
+    return None
+
+
+def apply_tvet_details(institutions):
+    """
+    Replace basic TVET entries with their enriched details from tvet_details.json, in place.
+
+    Every institution gets its stable "id" first. Details are then matched on
+    that id through a hash index, so a pass is O(institutions + details).
+    """
+    index = EntityIndex()
+    for inst in institutions:
+        if inst.get('id') is None:
+            inst['id'] = index.resolve(inst['name'])
+    if os.path.exists(TVET_DETAILS_FILE):
+        with open(TVET_DETAILS_FILE, 'r', encoding='utf-8') as f:
             tvet_details = json.load(f)
-        # Replace basic TVET entries with enriched ones
+        details_by_id = {}
+        for enriched in tvet_details:
+            entity_id = index.lookup(enriched['name'])
+            if entity_id is not None:
+                details_by_id.setdefault(entity_id, enriched)
         for i, inst in enumerate(institutions):
-            if inst['type'].lower() == 'tvet college':
-                for enriched in tvet_details:
-                    if inst['name'].lower() == enriched['name'].lower():
-                        institutions[i] = enriched
-                        break
+            if inst['type'].lower() == 'tvet college' and inst['id'] in details_by_id:
+                institutions[i] = {**details_by_id[inst['id']], 'id': inst['id']}
+    index.save()
+    return institutions
+
+
+def load_institutions():
+    """Current institutions from sources.json, with TVET details applied."""
+    with open(SOURCES_FILE, 'r', encoding='utf-8') as f:
+        return apply_tvet_details(json.load(f))
+
+
+def run_incremental_institution_scrapers(institutions, manifest, force=False):
+    """Re-scrape stale institutions and rewrite programmes only for those whose rows changed; returns their names."""
+    due = [
+        inst for inst in institutions
+        if force or not manifest.is_fresh('programmes', inst['name'], content_hash(inst), PROGRAMMES_MAX_AGE)
+    ]
+    logger.info(f"{len(due)} of {len(institutions)} institutions due for a programme scrape")
+    if not due:
+        return set()
+
+    by_name = {inst['name']: inst for inst in due}
+    changed = {}
+    for name, rows in scrape_institution_programmes(due).items():
+        rows_hash = content_hash(rows)
+        if not manifest.is_unchanged('programmes', name, rows_hash):
+            changed[name] = rows
+        manifest.record('programmes', name, rows_hash, content_hash(by_name[name]))
+
+    if changed:
+        update_programmes(changed)
+    else:
+        logger.info("No programme changes, leaving programme files untouched.")
+    return set(changed)
+
+
+def sync_database(institutions, changed=None):
+    """
+    Mirror institutions and cleaned programmes into the SQLite database.
+
+    `changed` limits the programme sync to those source institutions (None
+    syncs the whole clean CSV). The files stay the source of truth, so a
+    failure here is logged and the run carries on.
+    """
+    try:
+        init_db()
+        conn = connect()
+        try:
+            updated = upsert_institutions(institutions, conn=conn)
+            loaded = 0
+            if changed is None or changed:
+                loaded = load_programmes_csv(PROGRAMMES_CLEAN_FILE, institutions=changed, conn=conn)
+        finally:
+            conn.close()
+        logger.info(f"Database synced: {updated} institutions updated, {loaded} programmes loaded")
+    except Exception as e:
+        logger.error(f"Error syncing database: {e}")
+
+
+# -------------------------
+# Scheduler jobs
+# -------------------------
+def run_stage(stage, force=False):
+    """
+    Run one pipeline stage on its own (a scheduler job), then sync and publish what it changed.
+
+    'sources' rebuilds sources.json, 'tvet_details' enriches the TVET colleges
+    that are due and 'programmes' re-scrapes the institutions that are due.
+    With `force`, freshness is ignored.
+    """
+    if stage not in STAGES:
+        raise ValueError(f"Unknown stage '{stage}', expected one of {', '.join(STAGES)}")
+    from scrapers.browser import WarmSession  # Selenium loads only when a stage actually runs
+    with WRITE_LOCK, WarmSession(), stage_timer(stage):
+        manifest = RunManifest()
+        changed = set()
+        if stage == 'sources':
+            institutions = apply_tvet_details(refresh_sources(manifest, force=force))
+        elif stage == 'tvet_details':
+            refresh_tvet_details(load_institutions(), manifest, force=force)
+            institutions = load_institutions()
+        else:
+            institutions = load_institutions()
+            changed = run_incremental_institution_scrapers(institutions, manifest, force=force)
+        manifest.save()
+
+        if institutions:
+            sync_database(institutions, changed)
+            publish_snapshot()
+    return sorted(changed)
+
+
+def refresh_institution(name):
+    """
+    Re-scrape one institution's programmes (a per-institution scheduler job).
+
+    The scrape runs outside WRITE_LOCK, so it overlaps with other jobs. Only
+    when the rows differ from the last recorded ones are the programme
+    files rewritten, the database synced and a snapshot published. Returns
+    whether anything changed.
+    """
+    institutions = load_institutions()
+    key = name.strip().lower()
+    inst = next((i for i in institutions if i['name'].strip().lower() == key), None)
+    if inst is None:
+        raise ValueError(f"Unknown institution '{name}'")
+    if not get_registry().plugins_for(inst):
+        raise ValueError(f"No programme scraper matches '{inst['name']}'")
+
+    results = scrape_institution_programmes([inst])
+    if inst['name'] not in results:
+        raise RuntimeError(f"Programme scrape for {inst['name']} failed")
+    rows = results[inst['name']]
+
+    with WRITE_LOCK:
+        manifest = RunManifest()  # re-read: other jobs may have recorded runs meanwhile
+        rows_hash = content_hash(rows)
+        changed = not manifest.is_unchanged('programmes', inst['name'], rows_hash)
+        if changed:
+            update_programmes({inst['name']: rows})
+            sync_database(institutions, {inst['name']})
+            publish_snapshot()
+        else:
+            logger.info(f"No programme changes for {inst['name']}")
+        manifest.record('programmes', inst['name'], rows_hash, content_hash(inst))
+        manifest.save()
+    return changed
+
+
+def main(incremental=False, chunksize=None, force_publish=False):
+    """
+    Run the whole pipeline, holding WRITE_LOCK so scheduler jobs never write in between.
+
+    The DHET map and details stages share one warm browser (scrapers/browser.py).
+    Stage durations are recorded in utils/metrics.py and written to its
+    METRICS_FILE at the end, also when a stage fails.
+    """
+    from scrapers.browser import WarmSession  # Selenium loads only when the pipeline actually runs
+    try:
+        with WRITE_LOCK, WarmSession(), stage_timer('pipeline'):
+            _run_pipeline(incremental, chunksize, force_publish)
+    finally:
+        try:
+            write_textfile()
+        except OSError as e:
+            logger.warning(f"Could not write metrics: {e}")
+
+
+def _run_pipeline(incremental, chunksize, force_publish):
+    logger.info(f"=== Starting {'incremental' if incremental else 'full'} scraping sequence ===")
+    manifest = RunManifest()
+
+    if incremental:
+        # 1️⃣-3️⃣ Reuse sources unless stale, 4️⃣ enrich only changed TVETs
+        with stage_timer('sources'):
+            institutions = refresh_sources(manifest)
+        with stage_timer('tvet_details'):
+            refresh_tvet_details(institutions, manifest)
+    else:
+        # 1️⃣ Scrape universities
+        with stage_timer('universities'):
+            universities = run_general_scraper()
+
+        # 2️⃣ Scrape TVET colleges
+        with stage_timer('tvet_colleges'):
+            tvet_colleges = run_dhet_scraper()
+
+        # 3️⃣ Merge sources
+        with stage_timer('merge'):
+            institutions = merge_and_save_sources(tvet_colleges, universities)
+        if institutions:
+            manifest.record('sources', output_hash=content_hash(institutions))
+
+        # 4️⃣ Enrich TVET college details
+        from scrapers.dhet_details_scraper import main as enrich_tvet_details
+        with stage_timer('tvet_details'):
+            enrich_tvet_details()
+
+    # 5️⃣ Optionally load enriched TVETs and update institutions
+    apply_tvet_details(institutions)
 
     # 6️⃣ Run institution-specific programme scrapers
+    changed = None
     if institutions:
-        run_institution_scrapers(institutions)
+        if incremental:
+            with stage_timer('programmes'):
+                changed = run_incremental_institution_scrapers(institutions, manifest)
+        else:
+            with stage_timer('programmes'):
+                results = run_institution_scrapers(institutions, chunksize=chunksize)
+            by_name = {inst['name']: inst for inst in institutions}
+            for name, rows in results.items():
+                manifest.record('programmes', name, content_hash(rows), content_hash(by_name[name]))
+
+        # 7️⃣ Mirror into the database
+        with stage_timer('database'):
+            sync_database(institutions, changed)
 
+        # 8️⃣ Publish a validated snapshot for the API
+        with stage_timer('publish'):
+            publish_snapshot(force=force_publish)
+
+    manifest.save()
     logger.info("=== Scraping sequence completed ===")
     logger.info(f"Programmes saved to {PROGRAMMES_CLEAN_FILE}")
 
 
 if __name__ == "__main__":
-    main()
-
-    
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the institution and programme scraping pipeline.")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only re-scrape institutions whose source changed or whose data is stale")
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help="Clean programmes in streaming chunks of this many rows")
+    parser.add_argument('--force-publish', action='store_true',
+                        help="Publish even if the new snapshot is much smaller than the current one")
+    args = parser.parse_args()
+    main(incremental=args.incremental, chunksize=args.chunksize, force_publish=args.force_publish)
@@ -0,0 +1,54 @@
+# scrapers/test_scraper.py
+"""
+scrape_institutions end to end against local fake hosts (tools/fake_hosts.py).
+
+The DHET list is stubbed and candidate URLs point at the fake hosts, so
+no request leaves the machine. The resolver and HTTP caches live under
+pytest's tmp_path.
+"""
+import functools
+
+import pytest
+
+from scrapers import http_cache, resolver, scraper
+from scrapers.http_cache import HttpCache
+from scrapers.politeness import PolitenessScheduler
+from tools.fake_hosts import start_hosts, stop_hosts
+from utils.metrics import INSTITUTION_FETCH_DURATION
+
+
+@pytest.fixture
+def fake_hosts():
+    bases, servers = start_hosts(["ok", "error:404", "refused"])
+    yield bases
+    stop_hosts(servers)
+
+
+def test_scrape_institutions(fake_hosts, tmp_path, monkeypatch):
+    good, missing, refused = fake_hosts
+    candidates = {"Good University": [good], "Missing University": [missing], "Down University": [refused]}
+    monkeypatch.setattr(scraper, "scrape_dhet_institutions",
+                        lambda: [{"name": name, "type": "University"} for name in candidates])
+    monkeypatch.setattr(resolver, "candidate_urls", lambda name: list(candidates[name]))
+
+    async def dns_resolves(host, *args, **kwargs):
+        return host == "127.0.0.1"
+
+    monkeypatch.setattr(resolver, "dns_resolves", dns_resolves)
+    seed = tmp_path / "seed.csv"
+    seed.write_text("name,type,province,url\n", encoding="utf-8")
+    monkeypatch.setattr(resolver, "ResolverCache", functools.partial(
+        resolver.ResolverCache, str(tmp_path / "resolver_cache.json"), str(seed)))
+    cache = HttpCache(str(tmp_path / "http_cache.sqlite"))
+    monkeypatch.setattr(http_cache, "_cache", cache)
+    monkeypatch.setattr(scraper, "get_scheduler", PolitenessScheduler)
+
+    infos = scraper.scrape_institutions()
+
+    assert [info["url"] for info in infos] == [good]
+    assert infos[0]["logo"] == good + "favicon.ico"
+    # The homepage went through the HTTP cache (a miss: the fake host sends no validator)
+    assert cache.stats["misses"] == 1
+    assert good in seed.read_text(encoding="utf-8")
+    timed = {key[0] for key in INSTITUTION_FETCH_DURATION._current()}
+    assert set(candidates) <= timed
@@ -1,6 +1,7 @@
 import os
 import json
 import pandas as pd
+from utils.columnar import ARROW_AVAILABLE, columnar_paths, read_table
 
 # Paths (dynamic)
 BASE_DIR = os.path.dirname(__file__)
@@ -8,6 +9,7 @@ DATA_DIR = os.path.join(BASE_DIR, "../data")
 SOURCES_FILE = os.path.join(DATA_DIR, "sources.json")
 TVET_DETAILS_FILE = os.path.join(DATA_DIR, "tvet_details.json")
 PROGRAMMES_CLEAN_FILE = os.path.join(DATA_DIR, "programmes_clean.csv")
+PROGRAMMES_PARQUET_FILE, PROGRAMMES_FEATHER_FILE = columnar_paths(PROGRAMMES_CLEAN_FILE)
 
 
 def test_json_file(file_path, expected_type=list, description="JSON file"):
@@ -56,6 +58,29 @@ def test_csv_file(file_path, description="CSV file"):
     return True
 
 
+def check_columnar_file(file_path, expected_rows=None, description="Columnar file"):
+    """Columnar file test over a memory-mapped read; only the schema and one column are touched."""
+    if not os.path.exists(file_path):
+        print(f"[❌] {file_path} not found. Run the scraper first.")
+        return False
+
+    try:
+        table = read_table(file_path, columns=["institution"])
+    except Exception as e:
+        print(f"[❌] Error reading {file_path}: {e}")
+        return False
+
+    if table.num_rows == 0:
+        print(f"[❌] {file_path} is empty!")
+        return False
+    if expected_rows is not None and table.num_rows != expected_rows:
+        print(f"[❌] {file_path} has {table.num_rows} rows, expected {expected_rows}.")
+        return False
+
+    print(f"[✅] {description} loaded successfully, {table.num_rows} rows found.")
+    return True
+
+
 def main():
     print("=== Testing Scraper Outputs ===\n")
     all_ok = True
@@ -72,6 +97,12 @@ def main():
     ok = test_csv_file(PROGRAMMES_CLEAN_FILE, description="programmes_clean.csv")
     all_ok &= ok
 
+    # Test the Parquet/Feather copies (published when pyarrow is installed)
+    if ARROW_AVAILABLE:
+        rows = read_table(PROGRAMMES_FEATHER_FILE, columns=[]).num_rows if os.path.exists(PROGRAMMES_FEATHER_FILE) else None
+        all_ok &= check_columnar_file(PROGRAMMES_FEATHER_FILE, description="programmes_clean.feather")
+        all_ok &= check_columnar_file(PROGRAMMES_PARQUET_FILE, expected_rows=rows, description="programmes_clean.parquet")
+
     if all_ok:
         print("\n[🎉] All scraper outputs look good!")
     else:
@@ -80,4 +111,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
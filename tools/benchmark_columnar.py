@@ -0,0 +1,75 @@
+# tools/benchmark_columnar.py
+"""
+Benchmark loading the cleaned programme catalogue: parsing programmes_clean.csv
+vs memory-mapping the dictionary-encoded Feather copy (utils.columnar).
+
+Reports, per format: time to a ready API snapshot (ProgrammeStore), resident
+size of the snapshot's DataFrame, and a single-column projected read.
+
+Usage (from the project root):
+    python -m tools.benchmark_columnar --rows 200000 500000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+from api.programme_store import ProgrammeStore
+from utils.columnar import read_frame, write_columnar
+
+INSTITUTIONS = [f"Institution {i}" for i in range(60)]
+TYPES = ["Degree", "Diploma", "Higher Certificate", "Advanced Diploma", "Postgraduate Diploma"]
+FACULTIES = ["Science", "Engineering", "Commerce", "Humanities", "Health Sciences", "Law", "Education"]
+
+
+def synthetic_catalogue(n: int, rng: random.Random) -> pd.DataFrame:
+    return pd.DataFrame({
+        "institution": [rng.choice(INSTITUTIONS) for _ in range(n)],
+        "programme": [f"{rng.choice(TYPES)} in {rng.choice(FACULTIES)} {i % 2000}" for i in range(n)],
+        "programme_type": [rng.choice(TYPES) for _ in range(n)],
+        "duration": [f"{rng.randint(1, 4)} years" for _ in range(n)],
+        "faculty": [rng.choice(FACULTIES) for _ in range(n)],
+        "programme_key": [f"key {i % 2000}" for i in range(n)],
+    })
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[200000])
+    args = parser.parse_args()
+
+    rng = random.Random(16)
+    for n in args.rows:
+        tmp_dir = tempfile.mkdtemp(prefix="columnar_")
+        csv_path = os.path.join(tmp_dir, "programmes_clean.csv")
+        synthetic_catalogue(n, rng).to_csv(csv_path, index=False)
+
+        csv_store = ProgrammeStore(csv_path)
+        csv_store.feather_path = None  # force the CSV path
+        csv_snap, csv_load = timed(csv_store.snapshot)
+
+        (_, feather_path), publish = timed(lambda: write_columnar(csv_path))
+        feather_snap, feather_load = timed(ProgrammeStore(csv_path).snapshot)
+
+        _, csv_column = timed(lambda: pd.read_csv(csv_path, usecols=["programme_key"]))
+        _, feather_column = timed(lambda: read_frame(feather_path, columns=["programme_key"]))
+
+        csv_mb = csv_snap.df.memory_usage(deep=True).sum() / 1e6
+        feather_mb = feather_snap.df.memory_usage(deep=True).sum() / 1e6
+        print(f"{n} rows (publish {publish:.2f}s; csv {os.path.getsize(csv_path) / 1e6:.1f} MB, "
+              f"feather {os.path.getsize(feather_path) / 1e6:.1f} MB)")
+        print(f"  snapshot   csv {csv_load:7.2f}s {csv_mb:8.1f} MB   feather {feather_load:7.2f}s {feather_mb:8.1f} MB")
+        print(f"  one column csv {csv_column:7.3f}s               feather {feather_column:7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
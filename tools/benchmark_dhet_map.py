@@ -0,0 +1,59 @@
+# tools/benchmark_dhet_map.py
+"""
+Benchmark bulk vs click-loop marker extraction against the offline map fixture.
+
+Usage (from the project root):
+    python -m tools.benchmark_dhet_map --markers 300 --missing 0
+"""
+import argparse
+import os
+import pathlib
+import time
+
+from scrapers import browser
+from scrapers.browser import load_page, new_driver, quit_driver
+from scrapers.dhet_map_scraper import MARKER_LOCATOR, collect_institutions
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "dhet_map.html")
+
+
+def run_mode(url: str, bulk: bool) -> tuple[float, int]:
+    """Load the fixture fresh and time one extraction pass."""
+    driver = new_driver()
+    try:
+        load_page(driver, url, MARKER_LOCATOR)
+        start = time.perf_counter()
+        institutions = collect_institutions(driver, bulk=bulk)
+        return time.perf_counter() - start, len(institutions)
+    finally:
+        quit_driver(driver)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--markers", type=int, default=300, help="Markers rendered by the fixture")
+    parser.add_argument("--missing", type=int, default=0, help="Every Nth marker has no popup/title")
+    parser.add_argument("--skip-click", action="store_true", help="Only time the bulk mode")
+    args = parser.parse_args()
+
+    url = f"{pathlib.Path(FIXTURE).resolve().as_uri()}?markers={args.markers}&missing={args.missing}"
+    print(f"Fixture: {url}\n")
+
+    bulk_time, bulk_count = run_mode(url, bulk=True)
+    print(f"bulk   : {bulk_time:8.2f}s  ({bulk_count} institutions)")
+
+    if not args.skip_click:
+        click_time, click_count = run_mode(url, bulk=False)
+        print(f"click  : {click_time:8.2f}s  ({click_count} institutions)")
+        if bulk_time > 0:
+            print(f"speedup: {click_time / bulk_time:8.1f}x")
+
+    stats = browser.stats
+    launch = stats['launch_seconds'] / max(1, stats['launches'])
+    ready = stats['page_ready_seconds'] / max(1, stats['page_loads'])
+    print(f"\nbrowser: {stats['launches']} launches averaging {launch:.2f}s, "
+          f"{stats['page_loads']} page loads averaging {ready:.2f}s to ready")
+
+
+if __name__ == "__main__":
+    main()
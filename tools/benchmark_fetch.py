@@ -0,0 +1,53 @@
+# tools/benchmark_fetch.py
+"""
+Compare the sequential get_institution_info sweep with the async fetch engine.
+
+Starts a set of fake hosts (see tools/fake_hosts.py) with a mix of fast,
+slow, failing, hanging and refused hosts, then times both paths over them.
+
+Usage (from the project root):
+    python -m tools.benchmark_fetch --hosts 40 --slow 2.0
+"""
+import argparse
+import time
+
+from scrapers.fetch_engine import fetch_institution_infos
+from scrapers.scraper import get_institution_info
+from tools.fake_hosts import start_hosts, stop_hosts
+
+# Repeating mix of host behaviours
+MIX = ["ok", "ok", "slow:{slow}", "ok", "error:503", "slow:{slow}", "ok", "refused", "error:404", "hang"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hosts", type=int, default=40, help="Number of fake hosts")
+    parser.add_argument("--slow", type=float, default=2.0, help="Delay of slow hosts in seconds")
+    parser.add_argument("--read-timeout", type=float, default=5.0, help="Read timeout for the async engine")
+    parser.add_argument("--skip-sequential", action="store_true", help="Only time the async engine")
+    args = parser.parse_args()
+
+    profiles = [MIX[i % len(MIX)].format(slow=args.slow) for i in range(args.hosts)]
+    urls, servers = start_hosts(profiles)
+    print(f"{len(urls)} hosts: {', '.join(sorted(set(profiles)))}\n")
+
+    try:
+        start = time.perf_counter()
+        results = fetch_institution_infos(urls, read_timeout=args.read_timeout)
+        async_time = time.perf_counter() - start
+        ok = sum(1 for r in results if r)
+        print(f"async engine : {async_time:8.2f}s  ({ok} institutions)")
+
+        if not args.skip_sequential:
+            start = time.perf_counter()
+            results = [get_institution_info(url) for url in urls]
+            seq_time = time.perf_counter() - start
+            ok = sum(1 for r in results if r)
+            print(f"sequential   : {seq_time:8.2f}s  ({ok} institutions)")
+            print(f"speedup      : {seq_time / async_time:8.1f}x")
+    finally:
+        stop_hosts(servers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# tools/benchmark_grouping.py
+"""
+Benchmark programme key grouping: the original all-pairs loop vs the
+candidate-blocked engine in utils.programme_grouping.
+
+Synthetic catalogues mimic merged university listings: the same programmes
+recur across institutions with varying type labels and occasional typos.
+Where the legacy loop runs, the two outputs are also checked for equality.
+
+Usage (from the project root):
+    python -m tools.benchmark_grouping --sizes 10000 100000 1000000 --legacy-max 10000
+"""
+import argparse
+import random
+import time
+from difflib import SequenceMatcher
+
+from utils.cleaner import generate_programme_key
+from utils.programme_grouping import group_keys
+
+SUBJECTS = [
+    "accounting", "agriculture", "architecture", "biochemistry", "biology", "chemistry", "civil engineering",
+    "computer science", "construction management", "dental technology", "economics", "education",
+    "electrical engineering", "environmental health", "finance", "food technology", "geology", "graphic design",
+    "hospitality management", "human resources", "industrial engineering", "information technology",
+    "journalism", "law", "logistics", "marketing", "mathematics", "mechanical engineering", "medicine",
+    "nursing", "pharmacy", "physics", "psychology", "public management", "public relations", "retail business",
+    "social work", "sport science", "statistics", "surveying", "taxation", "tourism management",
+    "town planning", "veterinary science", "visual arts", "zoology",
+]
+QUALIFIERS = ["", "applied", "advanced", "professional", "digital", "international", "rural", "clinical"]
+TYPES = ["bachelor", "national diploma", "higher certificate", "honours", "masters", "phd", "postgraduate diploma"]
+
+
+def typo(text: str, rng: random.Random) -> str:
+    i = rng.randrange(len(text))
+    return text[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + text[i + 1:]
+
+
+def synthetic_keys(n: int, pool_size: int = 3000, typo_rate: float = 0.05, seed: int = 7) -> list[str]:
+    """
+    Draw n programme keys from a pool of recurring titles with a skewed
+    (Zipf-like) popularity, adding a typo to a small share of rows.
+    """
+    rng = random.Random(seed)
+    pool = []
+    for _ in range(pool_size):
+        subject = rng.choice(SUBJECTS)
+        if rng.random() < 0.3:
+            subject = f"{subject} and {rng.choice(SUBJECTS)}"
+        pool.append((f"{rng.choice(QUALIFIERS)} {subject}".strip(), rng.choice(TYPES)))
+    weights = [1 / (rank + 1) for rank in range(pool_size)]
+
+    keys = []
+    for name, ptype in rng.choices(pool, weights=weights, k=n):
+        if rng.random() < typo_rate:
+            name = typo(name, rng)
+        keys.append(generate_programme_key(name, ptype))
+    return keys
+
+
+def legacy_group_keys(keys: list[str], threshold: float = 0.85) -> list[str]:
+    """The original loop from utils.cleaner.group_similar_programmes."""
+    seen = {}
+    result = []
+    for key in keys:
+        found_key = None
+        for existing_key in seen:
+            if SequenceMatcher(None, key, existing_key).ratio() >= threshold:
+                found_key = seen[existing_key]
+                break
+        if found_key:
+            result.append(found_key)
+        else:
+            seen[key] = key
+            result.append(key)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--legacy-max", type=int, default=10_000, help="Largest size to run the O(n^2) loop on")
+    parser.add_argument("--threshold", type=float, default=0.85)
+    args = parser.parse_args()
+
+    print(f"{'programmes':>12} {'distinct':>9} {'groups':>7} {'legacy':>10} {'blocked':>10} {'speedup':>8}")
+    for n in args.sizes:
+        keys = synthetic_keys(n)
+
+        start = time.perf_counter()
+        grouped = group_keys(keys, args.threshold)
+        blocked_time = time.perf_counter() - start
+
+        legacy = "skipped"
+        speedup = ""
+        if n <= args.legacy_max:
+            start = time.perf_counter()
+            expected = legacy_group_keys(keys, args.threshold)
+            legacy_time = time.perf_counter() - start
+            if expected != grouped:
+                raise SystemExit(f"Mismatch against the legacy loop at n={n}")
+            legacy = f"{legacy_time:9.2f}s"
+            speedup = f"{legacy_time / blocked_time:7.1f}x"
+
+        print(f"{n:>12} {len(set(keys)):>9} {len(set(grouped)):>7} {legacy:>10} {blocked_time:9.2f}s {speedup:>8}")
+
+
+if __name__ == "__main__":
+    main()
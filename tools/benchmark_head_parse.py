@@ -0,0 +1,123 @@
+# tools/benchmark_head_parse.py
+"""
+Compare the full-page BeautifulSoup parse with the streaming head parser.
+
+For every saved page, the current path (the whole body, parsed by
+scraper.parse_institution_info) is timed against the head-only path
+(scrapers/head_parser.py fed CHUNK_SIZE chunks, stopping at the head). Both
+must give the same institution info. Bytes are what each path consumes from
+the response. The head-only fetch closes the connection at that point, so
+this also approximates the bytes transferred.
+
+Without saved pages, synthetic homepages are used: a realistic head
+(inline CSS and scripts) followed by bodies of 0.5 to 4 MB.
+
+Usage (from the project root):
+    python -m tools.benchmark_head_parse --save data/pages https://www.wits.ac.za/ https://www.uct.ac.za/
+    python -m tools.benchmark_head_parse --pages data/pages
+    python -m tools.benchmark_head_parse --repeat 5
+"""
+import argparse
+import glob
+import os
+import re
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+from scrapers.head_parser import CHUNK_SIZE, HEAD_BYTE_CAP, read_head
+from scrapers.politeness import USER_AGENT
+from scrapers.scraper import head_institution_info, parse_institution_info
+
+SYNTHETIC_SIZES = [512 * 1024, 1024 * 1024, 2 * 1024 * 1024, 4 * 1024 * 1024]
+
+
+def synthetic_page(size: int, n: int) -> bytes:
+    head = (
+        "<!DOCTYPE html><html lang='en'><head><meta charset='utf-8'>"
+        "<meta name='viewport' content='width=device-width, initial-scale=1'>"
+        + "".join(f"<link rel='stylesheet' href='/css/{i}.css'>" for i in range(12))
+        + "<style>" + ".c{color:#123;margin:0 auto;padding:4px}" * 300 + "</style>"
+        + "<script>" + "window.dataLayer=window.dataLayer||[];" * 200 + "</script>"
+        + f"<title>Synthetic University {n}</title>"
+        "<link rel='shortcut icon' href='/favicon.ico'></head><body>"
+    )
+    block = "<div class='c'><p>Programmes, admissions and research news.</p></div>"
+    body = block * max(1, (size - len(head)) // len(block))
+    return (head + body + "</body></html>").encode()
+
+
+def save_pages(directory: str, urls: list[str]) -> None:
+    os.makedirs(directory, exist_ok=True)
+    for url in urls:
+        response = requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=30)
+        response.raise_for_status()
+        name = re.sub(r"[^\w.-]+", "_", urlsplit(url).netloc + urlsplit(url).path).strip("_") + ".html"
+        with open(os.path.join(directory, name), "wb") as f:
+            f.write(response.content)
+        print(f"saved {url} -> {name} ({len(response.content):,} bytes)")
+
+
+def load_pages(directory: str) -> list[tuple[str, bytes]]:
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, "rb") as f:
+            body = f.read()
+        if body:
+            pages.append((os.path.basename(path), body))
+    return pages
+
+
+def cpu(func, repeat: int):
+    """(result, CPU seconds per call)"""
+    start = time.process_time()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.process_time() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", default=os.path.join("data", "pages"), help="Directory of saved *.html pages")
+    parser.add_argument("--save", nargs="+", metavar="URL", help="Download these homepages into --pages first")
+    parser.add_argument("--max-bytes", type=int, default=HEAD_BYTE_CAP, help="Byte cap of the head parser")
+    parser.add_argument("--repeat", type=int, default=3, help="Parses per page and path")
+    args = parser.parse_args()
+
+    if args.save:
+        save_pages(args.pages, args.save)
+    pages = load_pages(args.pages)
+    if not pages:
+        print(f"No saved pages in {args.pages}; using synthetic homepages\n")
+        pages = [(f"synthetic-{size // 1024}k.html", synthetic_page(size, i)) for i, size in enumerate(SYNTHETIC_SIZES)]
+
+    url = "https://www.example.ac.za/"
+    totals = {"full_bytes": 0, "head_bytes": 0, "full_cpu": 0.0, "head_cpu": 0.0}
+    mismatches = 0
+    print(f"{'page':<32} {'full bytes':>12} {'head bytes':>11} {'full ms':>9} {'head ms':>8}  same")
+    for name, body in pages:
+        text = body.decode("utf-8", errors="replace")
+        chunks = [body[i:i + CHUNK_SIZE] for i in range(0, len(body), CHUNK_SIZE)]
+        full, full_cpu = cpu(lambda: parse_institution_info(url, text), args.repeat)
+        head, head_cpu = cpu(lambda: read_head(iter(chunks), "text/html", args.max_bytes), args.repeat)
+        same = full == head_institution_info(url, head)
+        mismatches += not same
+        print(f"{name[:32]:<32} {len(body):>12,} {head.bytes_read:>11,} {full_cpu * 1000:>9.1f} "
+              f"{head_cpu * 1000:>8.2f}  {'yes' if same else 'NO'}")
+        totals["full_bytes"] += len(body)
+        totals["head_bytes"] += head.bytes_read
+        totals["full_cpu"] += full_cpu
+        totals["head_cpu"] += head_cpu
+
+    n = len(pages)
+    print(f"\nper institution: {totals['full_bytes'] / n:,.0f} -> {totals['head_bytes'] / n:,.0f} bytes "
+          f"({totals['full_bytes'] / max(1, totals['head_bytes']):.0f}x fewer), "
+          f"{totals['full_cpu'] / n * 1000:.1f} -> {totals['head_cpu'] / n * 1000:.2f} ms CPU "
+          f"({totals['full_cpu'] / max(1e-9, totals['head_cpu']):.0f}x less)")
+    if mismatches:
+        print(f"{mismatches} page(s) gave different results (e.g. a favicon linked from the body)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# tools/benchmark_politeness.py
+"""
+Show the politeness scheduler pacing requests per host.
+
+Starts fake hosts (see tools/fake_hosts.py) and sends the same number of
+requests to each through the shared scheduler, once with the cached
+requests session and once with the async fetch engine:
+
+    ok          paced at the default rate (DEFAULT_RATE req/s)
+    robots:<s>  paced at the host's Crawl-delay; /private/ is never fetched
+    throttle:<r> starts at the default rate, backs off on 429s and settles near <r> req/s
+
+Usage (from the project root):
+    python -m tools.benchmark_politeness --requests 20
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from collections import Counter
+
+import requests
+
+from scrapers.fetch_engine import FetchEngine
+from scrapers.http_cache import CachedSession, HttpCache
+from scrapers.politeness import PolitenessScheduler
+from tools.fake_hosts import start_hosts, stop_hosts
+
+
+def run_session(urls: list[str], scheduler: PolitenessScheduler, cache: HttpCache) -> Counter:
+    session = CachedSession(cache, politeness=scheduler)
+    outcomes = Counter()
+    for url in urls:
+        try:
+            outcomes[session.get(url, timeout=5).status_code] += 1
+        except requests.RequestException as e:
+            outcomes[type(e).__name__] += 1
+    return outcomes
+
+
+async def run_engine(urls: list[str], scheduler: PolitenessScheduler) -> Counter:
+    async with FetchEngine(politeness=scheduler) as engine:
+        responses = await asyncio.gather(*(engine.fetch(url) for url in urls))
+    return Counter(r.status_code if r is not None else "failed" for r in responses)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20, help="Requests per host")
+    parser.add_argument("--crawl-delay", type=int, default=1, help="Crawl-delay of the robots host (whole seconds)")
+    parser.add_argument("--throttle", type=float, default=1.0, help="Requests per second the throttling host accepts")
+    args = parser.parse_args()
+
+    profiles = {"ok": "ok", "robots": f"robots:{args.crawl_delay}", "throttle": f"throttle:{args.throttle}"}
+    bases, servers = start_hosts(list(profiles.values()))
+    cache = HttpCache(path=os.path.join(tempfile.mkdtemp(), "http_cache.sqlite"))
+    try:
+        for label, runner in (("session", "sync"), ("engine", "async")):
+            print(f"\n--- {label} ---")
+            for name, base in zip(profiles, bases):
+                scheduler = PolitenessScheduler()
+                urls = [f"{base}page/{i}" for i in range(args.requests)]
+                if name == "robots":
+                    urls.append(f"{base}private/secret")
+                start = time.perf_counter()
+                if runner == "sync":
+                    outcomes = run_session(urls, scheduler, cache)
+                else:
+                    outcomes = asyncio.run(run_engine(urls, scheduler))
+                elapsed = time.perf_counter() - start
+                print(f"{profiles[name]:>14}: {len(urls)} requests in {elapsed:6.2f}s "
+                      f"({len(urls) / elapsed:5.2f} req/s), outcomes {dict(outcomes)}, "
+                      f"throttled {scheduler.stats['throttled']}, final rate {scheduler.host_rate(base):.2f} req/s")
+    finally:
+        stop_hosts(servers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# tools/fake_hosts.py
+"""
+Local HTTP servers that stand in for institution homepages.
+
+Each server listens on its own port, so the fetch engine treats it as a
+separate host. A profile controls how the host behaves:
+
+    ok          answers at once with a small homepage
+    slow:<s>    answers after <s> seconds
+    error:<n>   answers with HTTP status <n>
+    hang        never answers within any sensible read timeout
+    refused     nothing listens on the port (connection refused)
+    robots:<s>  robots.txt sets Crawl-delay <s> and disallows /private/
+    throttle:<r> answers 429 (Retry-After: 1) above <r> requests per second
+
+Hosts other than robots:<s> answer /robots.txt with 404.
+
+Run standalone to poke at it by hand:
+    python -m tools.fake_hosts ok slow:2 error:503 hang refused
+"""
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+PAGE = """<!DOCTYPE html>
+<html><head>
+<title>Fake Institution {port}</title>
+<link rel="icon" href="/favicon.ico">
+</head><body>{padding}</body></html>
+"""
+
+
+class _Bucket:
+    """Token bucket of the "throttle" profile: `rate` requests per second, no burst."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def over_limit(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(1.0, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return True
+            self.tokens -= 1
+            return False
+
+
+def _robots_reply(kind: str, arg: str) -> Optional[tuple[int, bytes]]:
+    """(status, body) served for /robots.txt, or None when the profile serves it like any other path."""
+    if kind == "robots":
+        return 200, f"User-agent: *\nCrawl-delay: {arg or 1}\nDisallow: /private/\n".encode()
+    if kind in ("ok", "slow", "throttle"):
+        return 404, b"not found"
+    return None
+
+
+def make_handler(profile: str, page_bytes: int):
+    kind, _, arg = profile.partition(":")
+    bucket = _Bucket(float(arg or 1)) if kind == "throttle" else None
+    robots = _robots_reply(kind, arg)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def reply(self, status: int, body: bytes, headers: dict = None):
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/robots.txt" and robots is not None:
+                return self.reply(*robots)
+            if bucket is not None and bucket.over_limit():
+                return self.reply(429, b"slow down", {"Retry-After": "1"})
+            if kind == "slow":
+                time.sleep(float(arg or 1))
+            elif kind == "hang":
+                time.sleep(3600)
+                return
+            elif kind == "error":
+                return self.reply(int(arg or 500), b"error")
+
+            port = self.server.server_address[1]
+            body = PAGE.format(port=port, padding="x" * page_bytes).encode()
+            self.reply(200, body, {"Content-Type": "text/html; charset=utf-8"})
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that stop reading early (head-only fetches) reset the connection; that is expected
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def free_port() -> int:
+    """Reserve and release a port nothing is listening on."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_hosts(profiles: list[str], page_bytes: int = 2048) -> tuple[list[str], list[ThreadingHTTPServer]]:
+    """Start one server per profile; returns their base URLs and the servers to shut down."""
+    urls, servers = [], []
+    for profile in profiles:
+        if profile == "refused":
+            urls.append(f"http://127.0.0.1:{free_port()}/")
+            continue
+        server = _Server(("127.0.0.1", 0), make_handler(profile, page_bytes))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        urls.append(f"http://127.0.0.1:{server.server_address[1]}/")
+    return urls, servers
+
+
+def stop_hosts(servers: list[ThreadingHTTPServer]) -> None:
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    profiles = sys.argv[1:] or ["ok", "slow:2", "error:503", "hang", "refused"]
+    urls, servers = start_hosts(profiles)
+    for profile, url in zip(profiles, urls):
+        print(f"{profile:>12}  {url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        stop_hosts(servers)
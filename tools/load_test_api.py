@@ -0,0 +1,213 @@
+# tools/load_test_api.py
+"""
+Load test the list endpoints: the original file-per-request handlers
+("before") against the current routes ("after") and the current routes
+behind the response cache ("cached"), served side by side by a local
+uvicorn instance over a synthetic dataset.
+
+Usage (from the project root):
+    python -m tools.load_test_api --institutions 5000 --programmes 50000 --requests 2000 --concurrency 16
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pandas as pd
+import uvicorn
+from fastapi import FastAPI, Query
+
+from api.institution_store import InstitutionStore
+from api.programme_store import ProgrammeStore
+from api.response_cache import ResponseCache
+from api.routes import institutions, programmes
+from tools.fake_hosts import free_port
+
+PROVINCES = ["Eastern Cape", "Free State", "Gauteng", "KwaZulu-Natal", "Limpopo",
+             "Mpumalanga", "North West", "Northern Cape", "Western Cape"]
+TYPES = ["University", "TVET College", "University of Technology"]
+QUALIFICATIONS = ["Bachelor of", "Diploma in", "Advanced Diploma in", "Higher Certificate in", "Master of"]
+FIELDS = ["Science", "Engineering", "Accounting", "Nursing", "Education", "Law", "Computer Science",
+          "Civil Engineering", "Marketing", "Public Management", "Information Technology", "Agriculture"]
+WORDS = ["Central", "Northern", "Southern", "Coastal", "Metro", "Valley", "Capital", "Highveld", "Lowveld", "Karoo"]
+
+
+def make_institutions(n: int, rng: random.Random) -> list[dict]:
+    return [
+        {
+            "name": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(TYPES)} {i}",
+            "type": rng.choice(TYPES),
+            "province": rng.choice(PROVINCES),
+            "url": f"https://www.inst{i}.ac.za/",
+        }
+        for i in range(n)
+    ]
+
+
+def institution_queries(rng: random.Random, n: int) -> list[dict]:
+    queries = []
+    for _ in range(n):
+        q = {"limit": rng.choice([20, 50, 100]), "offset": rng.choice([0, 0, 20, 200]),
+             "sort": rng.choice(["name", "province", "type"])}
+        if rng.random() < 0.4:
+            q["type"] = rng.choice(TYPES)
+        if rng.random() < 0.4:
+            q["province"] = rng.choice(PROVINCES)
+        if rng.random() < 0.3:
+            q["search"] = rng.choice(WORDS).lower()
+        queries.append(q)
+    return queries
+
+
+def make_programmes(n: int, institution_names: list[str], rng: random.Random) -> pd.DataFrame:
+    return pd.DataFrame({
+        "institution": [rng.choice(institution_names) for _ in range(n)],
+        "programme": [f"{rng.choice(QUALIFICATIONS)} {rng.choice(FIELDS)} {i % 97}" for i in range(n)],
+        "programme_type": [rng.choice(["Degree", "Diploma", "Certificate"]) for _ in range(n)],
+        "duration": [rng.choice([1, 2, 3, 4]) for _ in range(n)],
+        "faculty": [rng.choice(FIELDS) for _ in range(n)],
+    })
+
+
+def programme_queries(rng: random.Random, n: int) -> list[dict]:
+    queries = []
+    for _ in range(n):
+        q = {"limit": rng.choice([20, 50, 100]), "offset": rng.choice([0, 0, 20, 200]),
+             "sort": rng.choice(["programme", "institution", "duration"])}
+        if rng.random() < 0.5:
+            q["keyword"] = rng.choice(FIELDS).split()[0].lower()
+        if rng.random() < 0.3:
+            q["institution"] = rng.choice(WORDS).lower()
+        queries.append(q)
+    return queries
+
+
+def legacy_router(sources_file: str, programmes_file: str) -> FastAPI:
+    """The original handlers, re-reading the data file on every request."""
+    app = FastAPI()
+
+    @app.get("/institutions/")
+    def list_institutions(
+        limit: int = Query(20, ge=1, le=100),
+        offset: int = Query(0, ge=0),
+        sort: str = Query("name"),
+        search: str = Query(None),
+        type: str = Query(None),
+        province: str = Query(None),
+    ):
+        with open(sources_file, "r", encoding="utf-8") as f:
+            items = json.load(f)
+        if search:
+            items = [i for i in items if search.lower() in i["name"].lower()]
+        if type:
+            items = [i for i in items if i.get("type", "").lower() == type.lower()]
+        if province:
+            items = [i for i in items if i.get("province", "").lower() == province.lower()]
+        items = sorted(items, key=lambda x: x.get(sort, "").lower())
+        return {"total": len(items), "results": items[offset: offset + limit]}
+
+    @app.get("/programmes/")
+    def list_programmes(
+        keyword: str = Query(None),
+        institution: str = Query(None),
+        limit: int = Query(20, ge=1, le=100),
+        offset: int = Query(0, ge=0),
+        sort: str = Query("programme_name"),
+    ):
+        df = pd.read_csv(programmes_file)
+        if keyword:
+            df = df[df["programme"].str.contains(keyword, case=False, na=False)]
+        if institution:
+            df = df[df["institution"].str.contains(institution, case=False, na=False)]
+        if sort in df.columns:
+            df = df.sort_values(by=sort, ascending=True)
+        total = len(df)
+        df = df.iloc[offset: offset + limit]
+        return {"total": total, "results": df.to_dict(orient="records")}
+
+    return app
+
+
+def serve(app) -> tuple[str, uvicorn.Server]:
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}", server
+
+
+def run(base_url: str, path: str, queries: list[dict], concurrency: int) -> list[float]:
+    local = threading.local()
+
+    def one(params):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = httpx.Client(base_url=base_url, timeout=60)
+        start = time.perf_counter()
+        client.get(path, params=params).raise_for_status()
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        return list(pool.map(one, queries))
+
+
+def report(label: str, latencies: list[float]) -> None:
+    cuts = statistics.quantiles(latencies, n=100)
+    print(f"{label:<28} p50 {cuts[49]:8.2f} ms   p99 {cuts[98]:8.2f} ms   ({len(latencies)} requests)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--institutions", type=int, default=5000)
+    parser.add_argument("--programmes", type=int, default=50000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    tmp_dir = tempfile.mkdtemp(prefix="load_test_")
+    sources_file = os.path.join(tmp_dir, "sources.json")
+    programmes_file = os.path.join(tmp_dir, "programmes_clean.csv")
+    items = make_institutions(args.institutions, rng)
+    with open(sources_file, "w", encoding="utf-8") as f:
+        json.dump(items, f)
+    make_programmes(args.programmes, [i["name"] for i in items], rng).to_csv(programmes_file, index=False)
+
+    institutions.store = InstitutionStore(sources_file)
+    programmes.store = ProgrammeStore(programmes_file)
+    current = FastAPI()
+    current.include_router(institutions.router, prefix="/institutions")
+    current.include_router(programmes.router, prefix="/programmes")
+
+    legacy_url, legacy_server = serve(legacy_router(sources_file, programmes_file))
+    current_url, current_server = serve(current)
+    cached_url, cached_server = serve(ResponseCache(current, versions={
+        "/institutions/": institutions.store.version,
+        "/programmes/": programmes.store.version,
+    }))
+
+    queries = institution_queries(rng, args.requests)
+    print(f"{args.institutions} institutions, {args.programmes} programmes, "
+          f"{args.requests} requests, concurrency {args.concurrency}\n")
+    report("before /institutions/", run(legacy_url, "/institutions/", queries, args.concurrency))
+    report("after  /institutions/", run(current_url, "/institutions/", queries, args.concurrency))
+    report("cached /institutions/", run(cached_url, "/institutions/", queries, args.concurrency))
+
+    # The original handler re-parses the CSV per request; keep its share of requests small
+    queries = programme_queries(rng, args.requests)
+    report("before /programmes/", run(legacy_url, "/programmes/", queries[: max(100, args.requests // 10)], args.concurrency))
+    report("after  /programmes/", run(current_url, "/programmes/", queries, args.concurrency))
+    report("cached /programmes/", run(cached_url, "/programmes/", queries, args.concurrency))
+
+    legacy_server.should_exit = current_server.should_exit = cached_server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
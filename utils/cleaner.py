@@ -1,34 +1,53 @@
+import csv
+import heapq
+import os
+import sqlite3
+import tempfile
+import numpy as np
 import pandas as pd
 import re
-from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Callable, Iterable, Optional
 from unidecode import unidecode
+from utils.programme_grouping import ProgrammeKeyGrouper
+
+# Precompiled patterns shared by the normalizers
+_WHITESPACE = re.compile(r'\s+')
+_DIGITS = re.compile(r'\d+')
+_DURATION = re.compile(r'(\d+)\s*(year|month|semester|week|day)s?')
+_NON_ALNUM = re.compile(r'[^a-z0-9\s]')
+_NOISE_WORDS = re.compile(r'\b(bachelor|bsc|ba|bcom|degree|programme|program|course|of|in|national|diploma|certificate)\b')
+
+# Output order of the cleaned programmes
+SORT_COLUMNS = ["programme_key", "institution", "programme"]
 
 
 # -------------------------
 # Normalization Helpers
 # -------------------------
+PROGRAMME_TYPE_MAPPINGS = {
+    'national diploma': 'Diploma',
+    'diploma': 'Diploma',
+    'higher certificate': 'Higher Certificate',
+    'certificate': 'Certificate',
+    'bachelor': 'Bachelor’s Degree',
+    'bsc': 'Bachelor’s Degree',
+    'ba': 'Bachelor’s Degree',
+    'bcom': 'Bachelor’s Degree',
+    'beng': 'Bachelor’s Degree',
+    'honours': 'Honours Degree',
+    'postgraduate diploma': 'Postgraduate Diploma',
+    'masters': 'Master’s Degree',
+    'msc': 'Master’s Degree',
+    'phd': 'Doctorate',
+    'doctorate': 'Doctorate',
+}
+
+
 def normalize_programme_type(value: str) -> str:
     value = value.lower()
 
-    mappings = {
-        'national diploma': 'Diploma',
-        'diploma': 'Diploma',
-        'higher certificate': 'Higher Certificate',
-        'certificate': 'Certificate',
-        'bachelor': 'Bachelor’s Degree',
-        'bsc': 'Bachelor’s Degree',
-        'ba': 'Bachelor’s Degree',
-        'bcom': 'Bachelor’s Degree',
-        'beng': 'Bachelor’s Degree',
-        'honours': 'Honours Degree',
-        'postgraduate diploma': 'Postgraduate Diploma',
-        'masters': 'Master’s Degree',
-        'msc': 'Master’s Degree',
-        'phd': 'Doctorate',
-        'doctorate': 'Doctorate',
-    }
-
-    for key, val in mappings.items():
+    for key, val in PROGRAMME_TYPE_MAPPINGS.items():
         if key in value:
             return val
     return value.title()
@@ -39,18 +58,18 @@ def normalize_duration(value: str) -> str:
         return "Unknown"
 
     value = value.lower().strip()
-    match = re.search(r'(\d+)\s*(year|month|semester|week|day)s?', value)
+    match = _DURATION.search(value)
     if match:
         num, unit = match.groups()
         return f"{num} {unit}{'s' if int(num) > 1 else ''}"
 
     if "yr" in value:
-        num = re.findall(r'\d+', value)
+        num = _DIGITS.findall(value)
         if num:
             return f"{num[0]} years"
 
     if "mon" in value:
-        num = re.findall(r'\d+', value)
+        num = _DIGITS.findall(value)
         if num:
             return f"{num[0]} months"
 
@@ -61,22 +80,24 @@ def normalize_name(name: str) -> str:
     if not isinstance(name, str):
         return "Unknown"
     name = unidecode(name)
-    name = re.sub(r'\s+', ' ', name.strip())
+    name = _WHITESPACE.sub(' ', name.strip())
     return name.title()
 
 
 # -------------------------
 # Programme Similarity Logic
 # -------------------------
+@lru_cache(maxsize=65536)
 def simplify_text(text: str) -> str:
     """
     Removes noise, abbreviations, and standardizes text for matching.
+    Memoised: the same names and types recur across thousands of rows.
     """
     text = text.lower()
     text = unidecode(text)
-    text = re.sub(r'[^a-z0-9\s]', '', text)
-    text = re.sub(r'\b(bachelor|bsc|ba|bcom|degree|programme|program|course|of|in|national|diploma|certificate)\b', '', text)
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = _NON_ALNUM.sub('', text)
+    text = _NOISE_WORDS.sub('', text)
+    text = _WHITESPACE.sub(' ', text).strip()
     return text
 
 
@@ -90,31 +111,34 @@ def generate_programme_key(programme_name: str, programme_type: str = "") -> str
     return combined.replace(" ", "_")
 
 
-def group_similar_programmes(df: pd.DataFrame, threshold: float = 0.85) -> pd.DataFrame:
+def group_similar_programmes(
+    df: pd.DataFrame,
+    threshold: float = 0.85,
+    known_keys: Iterable[str] = (),
+    grouper: Optional[ProgrammeKeyGrouper] = None,
+) -> pd.DataFrame:
     """
     Groups similar programmes using fuzzy matching.
     - Adds a new column 'programme_key'
     - Programmes with similarity >= threshold share the same key
+    - known_keys (e.g. from an earlier clean) are matched before any new key is minted
+    - Candidates are blocked through a bigram index (see utils.programme_grouping)
+    - Pass a grouper to carry the seen keys across several frames (chunks)
     """
-    keys = {}
+    if grouper is None:
+        grouper = ProgrammeKeyGrouper(threshold, known_keys)
+    blank = pd.Series("", index=df.index)
+    names = df["programme"] if "programme" in df.columns else blank
+    ptypes = df["programme_type"] if "programme_type" in df.columns else blank
+
+    # One key per distinct (name, type) pair, then grouped in row order
+    key_cache = {}
     programme_keys = []
-
-    for _, row in df.iterrows():
-        name = row.get("programme", "")
-        ptype = row.get("programme_type", "")
-        key = generate_programme_key(name, ptype)
-
-        found_key = None
-        for existing_key in keys:
-            if SequenceMatcher(None, key, existing_key).ratio() >= threshold:
-                found_key = keys[existing_key]
-                break
-
-        if found_key:
-            programme_keys.append(found_key)
-        else:
-            keys[key] = key
-            programme_keys.append(key)
+    for name, ptype in zip(names, ptypes):
+        key = key_cache.get((name, ptype))
+        if key is None:
+            key = key_cache[(name, ptype)] = generate_programme_key(name, ptype)
+        programme_keys.append(grouper.assign(key))
 
     df["programme_key"] = programme_keys
     return df
@@ -123,10 +147,24 @@ def group_similar_programmes(df: pd.DataFrame, threshold: float = 0.85) -> pd.Da
 # -------------------------
 # Main Cleaning Pipeline
 # -------------------------
-def clean_programmes(df: pd.DataFrame) -> pd.DataFrame:
-    if df.empty:
-        return df
-
+def map_distinct(series: pd.Series, func: Callable) -> pd.Series:
+    """
+    Same result as series.apply(func), but func runs once per distinct value
+    and the results are broadcast back through the factorized codes.
+    """
+    codes, uniques = pd.factorize(series)
+    mapped = [func(value) for value in uniques]
+    missing = codes == -1
+    if missing.any():
+        # factorize gives missing values code -1, which indexes this last slot
+        mapped.append(func(series[missing].iloc[0]))
+    values = np.empty(len(mapped), dtype=object)
+    values[:] = mapped
+    return pd.Series(values[codes], index=series.index, name=series.name)
+
+
+def normalize_programmes(df: pd.DataFrame) -> pd.DataFrame:
+    """Standardize column names, strip strings and normalize the core fields."""
     # Standardize column names
     df.columns = [col.strip().lower().replace(" ", "_") for col in df.columns]
 
@@ -136,27 +174,41 @@ def clean_programmes(df: pd.DataFrame) -> pd.DataFrame:
 
     # Normalize core fields
     if "programme" in df.columns:
-        df["programme"] = df["programme"].apply(normalize_name)
+        df["programme"] = map_distinct(df["programme"], normalize_name)
 
     if "programme_type" in df.columns:
-        df["programme_type"] = df["programme_type"].apply(normalize_programme_type)
+        df["programme_type"] = map_distinct(df["programme_type"], normalize_programme_type)
 
     if "duration" in df.columns:
-        df["duration"] = df["duration"].apply(normalize_duration)
+        df["duration"] = map_distinct(df["duration"], normalize_duration)
 
     if "institution" in df.columns:
-        df["institution"] = df["institution"].apply(normalize_name)
+        df["institution"] = map_distinct(df["institution"], normalize_name)
 
-    # Drop duplicates & handle missing
-    df.drop_duplicates(inplace=True)
+    return df
+
+
+def fill_missing(df: pd.DataFrame) -> pd.DataFrame:
     df.replace(["", "nan", "none", "null"], "Unknown", inplace=True)
     df.fillna("Unknown", inplace=True)
+    return df
+
+
+def clean_programmes(df: pd.DataFrame, known_keys: Iterable[str] = ()) -> pd.DataFrame:
+    if df.empty:
+        return df
+
+    df = normalize_programmes(df)
+
+    # Drop duplicates & handle missing
+    df.drop_duplicates(inplace=True)
+    df = fill_missing(df)
 
     # Generate and group programme keys
-    df = group_similar_programmes(df)
+    df = group_similar_programmes(df, known_keys=known_keys)
 
     # Sort and reset
-    sort_cols = [col for col in ["programme_key", "institution", "programme"] if col in df.columns]
+    sort_cols = [col for col in SORT_COLUMNS if col in df.columns]
     if sort_cols:
         df.sort_values(by=sort_cols, inplace=True)
     df.reset_index(drop=True, inplace=True)
@@ -164,3 +216,97 @@ def clean_programmes(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+# -------------------------
+# Streaming Pipeline
+# -------------------------
+class SeenRowStore:
+    """On-disk set of row hashes, so duplicate removal works across chunks in bounded memory."""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS seen (hash INTEGER PRIMARY KEY)")
+
+    def keep_new(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Drop rows already seen in this or an earlier chunk, and remember the rest."""
+        hashes = pd.util.hash_pandas_object(df, index=False).to_numpy().view(np.int64)
+        keep = np.zeros(len(df), dtype=bool)
+        with self._conn:
+            for i, value in enumerate(hashes.tolist()):
+                cur = self._conn.execute("INSERT OR IGNORE INTO seen VALUES (?)", (value,))
+                keep[i] = cur.rowcount == 1
+        return df[keep]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def _read_run(path: str, sort_idx: list[int]):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        next(reader)
+        for row in reader:
+            yield tuple(row[i] for i in sort_idx), row
+
+
+def clean_programmes_csv(
+    raw_path: str,
+    clean_path: str,
+    chunksize: int = 50_000,
+    threshold: float = 0.85,
+    known_keys: Iterable[str] = (),
+) -> int:
+    """
+    Streaming version of clean_programmes for CSVs too large to hold in memory.
+
+    The raw CSV is read in fixed-size chunks. Each chunk is normalized,
+    de-duplicated against an on-disk store of row hashes and grouped with a
+    programme key grouper shared by all chunks. It is then sorted and spilled
+    to a temporary run file. The runs are merged into clean_path.
+
+    Peak memory is one chunk plus the distinct programme keys. The output
+    matches clean_programmes up to the order of rows that tie on the sort
+    columns. Returns the number of rows written.
+    """
+    grouper = ProgrammeKeyGrouper(threshold, known_keys)
+    header: Optional[list[str]] = None
+    written = 0
+
+    with tempfile.TemporaryDirectory(prefix="clean_programmes_") as tmp_dir:
+        seen = SeenRowStore(os.path.join(tmp_dir, "seen.sqlite"))
+        runs = []
+        try:
+            reader = pd.read_csv(raw_path, chunksize=chunksize, dtype=object, keep_default_na=False)
+            for chunk in reader:
+                chunk = normalize_programmes(chunk)
+                chunk = seen.keep_new(chunk.drop_duplicates())
+                if chunk.empty:
+                    continue
+                chunk = fill_missing(chunk)
+                chunk = group_similar_programmes(chunk, grouper=grouper)
+
+                sort_cols = [col for col in SORT_COLUMNS if col in chunk.columns]
+                chunk.sort_values(by=sort_cols, inplace=True)
+                header = list(chunk.columns)
+
+                run_path = os.path.join(tmp_dir, f"run_{len(runs):05d}.csv")
+                chunk.to_csv(run_path, index=False, encoding="utf-8", lineterminator="\n")
+                runs.append(run_path)
+        except pd.errors.EmptyDataError:
+            pass
+        finally:
+            seen.close()
+
+        # Merge into a temporary file next to clean_path, then swap it in atomically
+        tmp_path = f"{clean_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8", newline="") as out:
+            writer = csv.writer(out, lineterminator="\n")
+            if header is not None:
+                writer.writerow(header)
+                sort_idx = [header.index(col) for col in SORT_COLUMNS if col in header]
+                merged = heapq.merge(*(_read_run(path, sort_idx) for path in runs), key=lambda item: item[0])
+                for _, row in merged:
+                    writer.writerow(row)
+                    written += 1
+        os.replace(tmp_path, clean_path)
+
+    return written
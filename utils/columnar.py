@@ -0,0 +1,99 @@
+# utils/columnar.py
+"""
+Typed columnar copies of the cleaned programme catalogue.
+
+Next to programmes_clean.csv the manager publishes:
+- programmes_clean.feather: Arrow IPC, uncompressed, so readers can
+  memory-map it and use the buffers in place (zero copy),
+- programmes_clean.parquet: zstd-compressed, for download and archival.
+
+Repeated string columns (institution, programme_type, faculty, ...) are
+dictionary-encoded in both. A cached reader therefore keeps one copy of each
+distinct value plus small integer codes, instead of one Python string per
+row. Everything here needs pyarrow; callers check ARROW_AVAILABLE and keep
+using the CSV without it.
+"""
+import os
+from typing import Optional, Sequence
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+
+def columnar_paths(csv_path: str) -> tuple[str, str]:
+    """(parquet, feather) paths published alongside a CSV."""
+    stem = os.path.splitext(csv_path)[0]
+    return f"{stem}.parquet", f"{stem}.feather"
+
+
+def _dictionary_encode(table: "pa.Table") -> "pa.Table":
+    table = table.combine_chunks()  # one dictionary per column (IPC files cannot replace dictionaries)
+    columns = [
+        col.dictionary_encode() if pa.types.is_string(col.type) or pa.types.is_large_string(col.type) else col
+        for col in table.columns
+    ]
+    return pa.table(columns, names=table.column_names)
+
+
+def _replace(write, path: str) -> None:
+    tmp = f"{path}.tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def write_columnar(csv_path: str) -> Optional[tuple[str, str]]:
+    """
+    Publish Parquet and Feather copies of a cleaned CSV; returns their paths,
+    or None if pyarrow is missing or the CSV is empty.
+
+    Nulls follow pandas.read_csv (empty fields and "NaN"/"NA"/... are null),
+    so the columnar copies load to the same values as the CSV.
+    """
+    if not ARROW_AVAILABLE or not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0:
+        return None
+
+    table = pa_csv.read_csv(csv_path, convert_options=pa_csv.ConvertOptions(strings_can_be_null=True))
+    table = _dictionary_encode(table)
+
+    parquet_path, feather_path = columnar_paths(csv_path)
+    _replace(lambda p: pq.write_table(table, p, compression="zstd", use_dictionary=True), parquet_path)
+    _replace(lambda p: feather.write_feather(table, p, compression="uncompressed"), feather_path)
+    return parquet_path, feather_path
+
+
+def read_table(path: str, columns: Optional[Sequence[str]] = None) -> "pa.Table":
+    """Memory-mapped read of a Feather or Parquet file, loading only `columns`."""
+    columns = list(columns) if columns is not None else None
+    if path.endswith(".parquet"):
+        return pq.read_table(path, columns=columns, memory_map=True)
+    return feather.read_table(path, columns=columns, memory_map=True)
+
+
+def read_frame(path: str, columns: Optional[Sequence[str]] = None, as_strings: bool = False) -> pd.DataFrame:
+    """
+    DataFrame over a columnar file. Dictionary columns come back as
+    categoricals with lexically sorted categories, so sorting them matches
+    sorting the CSV's strings. With `as_strings`, every column is text and
+    nulls are empty strings, like read_csv(dtype=str, keep_default_na=False).
+    """
+    table = read_table(path, columns)
+    if as_strings:
+        table = pa.table(
+            [col.cast(pa.string()).fill_null("") for col in table.columns],
+            names=table.column_names,
+        )
+        return table.to_pandas()
+
+    df = table.to_pandas()
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].cat.reorder_categories(sorted(df[col].cat.categories))
+    return df
@@ -0,0 +1,173 @@
+# utils/entities.py
+"""
+Entity resolution for institution records from several sources.
+
+The DHET map, the general scraper and the TVET details scraper do not spell
+institutions alike. For example, "Tshwane South TVET College" and "Tshwane
+South Technical and Vocational Education and Training College" are the same
+college. EntityIndex maps every spelling to one stable integer ID:
+
+1. Canonical key. canonical_name() folds case, accents, punctuation and
+   "&", and rewrites the long forms of TVET (and the older FET) to "tvet".
+   Spellings that differ only in those ways share a key.
+2. Hash index. Keys seen before, in this run or in an earlier one, resolve
+   with one dict lookup.
+3. Blocking index. An unseen key is compared only against keys sharing one
+   of its distinctive tokens (not "university", "college", ...). A candidate
+   is the same entity when its SequenceMatcher ratio reaches FUZZY_THRESHOLD
+   and every distinctive token has a close counterpart. The second check
+   catches a typo ("Sauth") but keeps "Tshwane South" and "Tshwane North"
+   apart. The new key is kept as an alias of the match. Tokens shared by
+   more than MAX_BLOCK keys are not used, so each lookup costs a bounded
+   number of comparisons, and resolving n records is O(n).
+4. Stable IDs. Keys and their IDs persist in data/institution_ids.json.
+   IDs are never reused, so programme rows and database rows can join on
+   them across runs.
+"""
+import json
+import os
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from typing import Iterable, Optional
+
+from utils.logger import setup_logger
+from utils.snapshots import atomic_write_json
+
+logger = setup_logger("entities")
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+ENTITY_IDS_FILE = os.path.join(BASE_DIR, "data", "institution_ids.json")
+
+FUZZY_THRESHOLD = 0.9
+TOKEN_THRESHOLD = 0.8   # each distinctive token needs a counterpart at least this close
+MAX_BLOCK = 50
+
+# Applied in order to the lower-cased, punctuation-free name
+_PHRASES = [
+    (re.compile(r"\btechnical (and )?vocational education (and )?training\b"), "tvet"),
+    (re.compile(r"\bfurther education (and )?training\b"), "tvet"),  # FET colleges became TVET colleges in 2014
+    (re.compile(r"\bfet\b"), "tvet"),
+    (re.compile(r"\buniv\b"), "university"),
+]
+_STOPWORDS = {"the"}
+# Too common to say which institution a name refers to
+_GENERIC_TOKENS = {"university", "college", "tvet", "of", "and", "for", "technology", "institute", "campus"}
+
+
+def canonical_name(name: str) -> str:
+    """Matching key for an institution name (see the module docstring)."""
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower().replace("&", " and ")
+    text = " ".join(re.sub(r"[^a-z0-9]+", " ", text).split())
+    for pattern, replacement in _PHRASES:
+        text = pattern.sub(replacement, text)
+    return " ".join(token for token in text.split() if token not in _STOPWORDS)
+
+
+def _block_tokens(key: str) -> set[str]:
+    return {token for token in key.split() if token not in _GENERIC_TOKENS and len(token) > 1}
+
+
+def _tokens_agree(a: set[str], b: set[str]) -> bool:
+    if len(a) != len(b):
+        return False
+    return all(
+        token in b or any(SequenceMatcher(None, token, other).ratio() >= TOKEN_THRESHOLD for other in b)
+        for token in a
+    )
+
+
+class EntityIndex:
+    """Canonical key -> stable ID, with fuzzy matching of unseen keys; persisted at `path`."""
+
+    def __init__(self, path: Optional[str] = ENTITY_IDS_FILE, threshold: float = FUZZY_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self.ids: dict[str, int] = {}
+        self.next_id = 1
+        self._blocks: dict[str, list[str]] = {}
+        self._dirty = False
+        self.stats = {"exact": 0, "fuzzy": 0, "new": 0, "scored": 0}
+
+        if path and os.path.exists(path) and os.path.getsize(path) > 0:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.next_id = int(data.get("next_id", 1))
+                for key, entity_id in data.get("ids", {}).items():
+                    self._add(key, int(entity_id))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable entity IDs {path}: {e}")
+
+    def _add(self, key: str, entity_id: int) -> None:
+        self.ids[key] = entity_id
+        self.next_id = max(self.next_id, entity_id + 1)
+        for token in _block_tokens(key):
+            self._blocks.setdefault(token, []).append(key)
+
+    def _fuzzy(self, key: str) -> Optional[int]:
+        candidates = {}
+        for token in _block_tokens(key):
+            block = self._blocks.get(token, ())
+            if len(block) <= MAX_BLOCK:
+                candidates.update(dict.fromkeys(block))
+        tokens = _block_tokens(key)
+        matcher = SequenceMatcher(None, "", key)
+        best, best_ratio = None, self.threshold
+        for candidate in candidates:
+            matcher.set_seq1(candidate)
+            self.stats["scored"] += 1
+            if (matcher.quick_ratio() >= best_ratio and matcher.ratio() >= best_ratio
+                    and _tokens_agree(tokens, _block_tokens(candidate))):
+                best, best_ratio = candidate, matcher.ratio()
+        return self.ids[best] if best is not None else None
+
+    def lookup(self, name: str) -> Optional[int]:
+        """ID of a known institution, or None; nothing is registered."""
+        key = canonical_name(name)
+        return self.ids.get(key) if key in self.ids else self._fuzzy(key)
+
+    def resolve(self, name: str) -> int:
+        """ID for `name`, registering a new entity (or an alias of a close match) when the key is unseen."""
+        key = canonical_name(name)
+        entity_id = self.ids.get(key)
+        if entity_id is not None:
+            self.stats["exact"] += 1
+            return entity_id
+        entity_id = self._fuzzy(key)
+        if entity_id is not None:
+            self.stats["fuzzy"] += 1
+            logger.info(f"'{name}' matched entity {entity_id} as a variant spelling")
+        else:
+            entity_id = self.next_id
+            self.stats["new"] += 1
+        self._add(key, entity_id)
+        self._dirty = True
+        return entity_id
+
+    def save(self) -> None:
+        """Write the keys and IDs, if any were added since loading."""
+        if self.path and self._dirty:
+            atomic_write_json(self.path, {"next_id": self.next_id, "ids": dict(sorted(self.ids.items()))}, indent=2)
+            self._dirty = False
+
+
+def merge_institutions(records: Iterable[dict], index: EntityIndex) -> list[dict]:
+    """
+    One record per entity, in first-seen order, each with its stable "id".
+
+    The first record of an entity wins. Fields it lacks (missing or empty)
+    are filled from the entity's later records.
+    """
+    merged: dict[int, dict] = {}
+    for record in records:
+        entity_id = index.resolve(record["name"])
+        existing = merged.get(entity_id)
+        if existing is None:
+            merged[entity_id] = {**record, "id": entity_id}
+            continue
+        for field, value in record.items():
+            if value not in (None, "") and existing.get(field) in (None, ""):
+                existing[field] = value
+    return list(merged.values())
@@ -0,0 +1,190 @@
+# utils/jobs.py
+"""
+In-process job runner for scheduled scraper work.
+
+Jobs are plain callables queued by priority and run on a small pool of
+worker threads inside the calling process. Each run therefore skips
+interpreter startup and the pandas/Selenium imports, because they are
+already loaded. A job records its status, timings and a tail of the log
+lines it emits, and those lines still go to the console as they happen.
+
+A job name is its identity. Submitting a name that is already queued or
+running returns the existing job instead of queueing a duplicate, so an
+hourly refresh cannot pile up behind a slow run of itself.
+"""
+import datetime
+import itertools
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+from utils.logger import setup_logger
+from utils.metrics import JOB_DURATION, JOBS
+
+logger = setup_logger("jobs")
+
+# Lower runs first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+JOB_WORKERS = 2
+JOB_HISTORY = 200   # finished jobs kept for status queries
+JOB_LOG_LINES = 500  # log lines kept per job
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+
+class Job:
+    """One unit of work and its run record."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, name: str, func: Callable, args: tuple = (), kwargs: Optional[dict] = None,
+                 priority: int = PRIORITY_NORMAL):
+        self.id = next(self._ids)
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.priority = priority
+        self.status = QUEUED
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.log: deque = deque(maxlen=JOB_LOG_LINES)
+        self.done = threading.Event()
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Seconds spent running so far, or in total once finished."""
+        if self.started_at is None:
+            return None
+        return (self.finished_at or time.time()) - self.started_at
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.done.wait(timeout)
+
+    def to_dict(self) -> dict:
+        def stamp(ts):
+            return datetime.datetime.fromtimestamp(ts).isoformat(timespec="seconds") if ts else None
+
+        return {
+            "id": self.id,
+            "name": self.name,
+            "priority": self.priority,
+            "status": self.status,
+            "submitted_at": stamp(self.submitted_at),
+            "started_at": stamp(self.started_at),
+            "finished_at": stamp(self.finished_at),
+            "duration": round(self.duration, 3) if self.duration is not None else None,
+            "error": self.error,
+        }
+
+    def __repr__(self):
+        return f"Job({self.id}, {self.name!r}, {self.status})"
+
+
+class _JobLogHandler(logging.Handler):
+    """Copies records emitted on a job's worker thread into that job's log tail."""
+
+    def __init__(self):
+        super().__init__()
+        self.jobs: dict[int, Job] = {}
+        self.setFormatter(logging.Formatter("[%(asctime)s] [%(levelname)s] [%(name)s]: %(message)s",
+                                            datefmt="%Y-%m-%d %H:%M:%S"))
+
+    def emit(self, record):
+        job = self.jobs.get(record.thread)
+        if job is not None:
+            job.log.append(self.format(record))
+
+
+class JobRunner:
+    """
+    Priority queue of jobs drained by `workers` threads.
+
+    Threads are started lazily on the first submit. Log lines are captured
+    from the worker thread running a job. Threads that the job starts itself
+    (e.g. the programme scraper pool) still log to the console, but those
+    lines do not go into the job's tail.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, history: int = JOB_HISTORY):
+        self.workers = workers
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._active: dict[str, Job] = {}  # queued or running, by name
+        self._history: deque = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+        self._log_handler = _JobLogHandler()
+
+    def submit(self, name: str, func: Callable, *args, priority: int = PRIORITY_NORMAL, **kwargs) -> Job:
+        """Queue func(*args, **kwargs) as job `name`; returns the already queued or running job of that name if any."""
+        with self._lock:
+            existing = self._active.get(name)
+            if existing is not None:
+                logger.info(f"Job '{name}' is already {existing.status}, not queueing another")
+                return existing
+            job = Job(name, func, args, kwargs, priority)
+            self._active[name] = job
+            logger.info(f"Queued job '{name}' (priority {priority}, {self._queue.qsize()} ahead)")
+            self._queue.put((priority, next(self._order), job))
+            self._start_workers()
+        return job
+
+    def jobs(self) -> list[dict]:
+        """Active jobs followed by finished ones, newest first."""
+        with self._lock:
+            active = sorted(self._active.values(), key=lambda j: (j.status != RUNNING, j.priority, j.id))
+            finished = list(reversed(self._history))
+        return [job.to_dict() for job in active + finished]
+
+    def get(self, name: str) -> Optional[Job]:
+        """The active job called `name`, else its most recent finished run."""
+        with self._lock:
+            if name in self._active:
+                return self._active[name]
+            return next((job for job in reversed(self._history) if job.name == name), None)
+
+    def _start_workers(self) -> None:
+        if self._threads:
+            return
+        logging.getLogger().addHandler(self._log_handler)
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self) -> None:
+        ident = threading.get_ident()
+        while True:
+            _, _, job = self._queue.get()
+            job.status = RUNNING
+            job.started_at = time.time()
+            self._log_handler.jobs[ident] = job
+            logger.info(f"▶️ Job '{job.name}' started")
+            try:
+                job.result = job.func(*job.args, **job.kwargs)
+                job.status = SUCCEEDED
+            except Exception as e:
+                job.status = FAILED
+                job.error = f"{type(e).__name__}: {e}"
+                logger.exception(f"❌ Job '{job.name}' failed")
+            finally:
+                job.finished_at = time.time()
+                JOBS.inc(job=job.name, status=job.status)
+                JOB_DURATION.observe(job.duration, job=job.name)
+                if job.status == SUCCEEDED:
+                    logger.info(f"✅ Job '{job.name}' finished in {job.duration:.1f}s")
+                self._log_handler.jobs.pop(ident, None)
+                with self._lock:
+                    self._active.pop(job.name, None)
+                    self._history.append(job)
+                job.done.set()
@@ -0,0 +1,156 @@
+# utils/leader.py
+"""
+Lease-based leader election between API worker processes.
+
+Every uvicorn/gunicorn worker (and every replica sharing the data volume)
+runs startup_event. Only the process holding the "scheduler" lease should
+run scheduled scrapes, and the rest just serve requests.
+
+The lease is a row in the SQLite database (db/db.py, WAL mode). A holder
+renews it every TTL/3 seconds. Other processes try to take it on the same
+cadence, and one succeeds only once the lease has expired. If the leader
+dies, another worker takes over within about one TTL. A leader that cannot
+renew (database locked, clock jump) steps down once its lease may have
+lapsed, so two schedulers never believe they lead at once.
+"""
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+
+from db.db import connect
+from utils.logger import setup_logger
+
+logger = setup_logger("leader")
+
+LEASE_TTL = float(os.getenv("LEADER_LEASE_TTL", "30"))
+
+LEASE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    name        TEXT PRIMARY KEY,
+    holder      TEXT NOT NULL,
+    expires_at  REAL NOT NULL,   -- unix time
+    renewed_at  REAL NOT NULL
+)
+"""
+
+
+class LeaderElection:
+    """
+    Holds or waits for the lease `name` on a background thread.
+
+    on_elected runs when this process becomes leader, and on_demoted when it
+    loses the lease. Both run on the election thread.
+    """
+
+    def __init__(
+        self,
+        name: str = "scheduler",
+        ttl: float = LEASE_TTL,
+        on_elected: Optional[Callable[[], None]] = None,
+        on_demoted: Optional[Callable[[], None]] = None,
+        path: Optional[str] = None,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.path = path
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self._renewed_at = 0.0
+        self._stop = threading.Event()
+        self._lock = threading.Lock()  # a campaign attempt and release() never overlap
+        self._thread: Optional[threading.Thread] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = connect(self.path)
+        conn.execute(LEASE_SCHEMA)
+        return conn
+
+    def try_acquire(self) -> bool:
+        """Take or renew the lease; True if this process holds it afterwards."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                # One statement, so taking an expired lease is atomic across processes
+                cursor = conn.execute(
+                    """
+                    INSERT INTO leases (name, holder, expires_at, renewed_at) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (name) DO UPDATE SET
+                        holder = excluded.holder, expires_at = excluded.expires_at, renewed_at = excluded.renewed_at
+                    WHERE leases.holder = excluded.holder OR leases.expires_at < ?
+                    """,
+                    (self.name, self.holder, now + self.ttl, now, now),
+                )
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def release(self) -> None:
+        """
+        Stop campaigning and give up the lease so another process can take over immediately.
+
+        The row is deleted by holder even when `is_leader` is False: an attempt
+        that was in flight when release() was called may just have won it.
+        """
+        self._stop.set()
+        with self._lock:
+            try:
+                conn = self._connect()
+                try:
+                    with conn:
+                        conn.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (self.name, self.holder))
+                finally:
+                    conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not release lease '{self.name}': {e}")
+        if self.is_leader:
+            self._set_leader(False)
+
+    def current_holder(self) -> Optional[str]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT holder FROM leases WHERE name = ? AND expires_at >= ?", (self.name, time.time())
+            ).fetchone()
+            return row["holder"] if row else None
+        finally:
+            conn.close()
+
+    def start(self) -> "LeaderElection":
+        """Start campaigning on a daemon thread; returns self."""
+        self._thread = threading.Thread(target=self._run, name=f"lease-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                with self._lock:
+                    if self._stop.is_set():
+                        break
+                    held = self.try_acquire()
+                if held:
+                    self._renewed_at = time.monotonic()
+            except sqlite3.Error as e:
+                logger.warning(f"Lease '{self.name}' check failed: {e}")
+                # Keep leading only while the last successful renewal still covers us
+                held = self.is_leader and time.monotonic() - self._renewed_at < self.ttl * 2 / 3
+            if held != self.is_leader and not self._stop.is_set():
+                self._set_leader(held)
+            self._stop.wait(self.ttl / 3)
+
+    def _set_leader(self, leader: bool) -> None:
+        self.is_leader = leader
+        callback = self.on_elected if leader else self.on_demoted
+        logger.info(f"{'👑 Acquired' if leader else 'Lost'} lease '{self.name}' as {self.holder}")
+        if callback is not None:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Lease '{self.name}' {'election' if leader else 'demotion'} callback failed: {e}")
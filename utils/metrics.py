@@ -0,0 +1,288 @@
+# utils/metrics.py
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Counters, gauges and histograms (with labels) live in one process-wide
+registry. They are rendered by render(), which the API serves on GET
+/metrics, and written by write_textfile() for processes that serve no HTTP:
+the standalone scheduler and command-line scraper runs. Point a node
+exporter's textfile collector at METRICS_FILE (env METRICS_FILE, default
+data/metrics.prom) to scrape them.
+
+Each process keeps its own registry. With several API workers, every
+worker reports its own requests. Scrapes run in whichever worker leads the
+scheduler (utils/leader.py), so their metrics appear in that worker's
+/metrics and in METRICS_FILE.
+
+Values already kept elsewhere, such as the HTTP cache's hit and miss
+counts, are exported with set_function(), which reads them at render time.
+API request metrics are defined in api/metrics.py.
+"""
+import atexit
+import bisect
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable, Optional
+
+from utils.logger import setup_logger
+from utils.snapshots import atomic_write
+
+logger = setup_logger("metrics")
+
+METRICS_FILE = os.getenv(
+    "METRICS_FILE", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "metrics.prom")
+)
+EXPORT_INTERVAL = 15.0
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; from a cached API response up to a full nightly stage
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+DURATION_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), registry: Optional["Registry"] = None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._values: dict[tuple, object] = {}
+        self._function: Optional[Callable[[], object]] = None
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def set_function(self, function: Callable[[], object]) -> None:
+        """
+        Read the value(s) from `function` at render time: a number, or for a
+        labelled metric a {label values tuple: number} dict.
+        """
+        self._function = function
+
+    def _current(self) -> dict[tuple, object]:
+        if self._function is None:
+            with self._lock:
+                return dict(self._values)
+        try:
+            value = self._function()
+        except Exception as e:
+            logger.warning(f"Metric {self.name} could not be read: {e}")
+            return {}
+        if isinstance(value, dict):
+            return {tuple(str(v) for v in (k if isinstance(k, tuple) else (k,))): v for k, v in value.items()}
+        return {(): value}
+
+    def samples(self) -> list[str]:
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(float(value))}"
+                for key, value in sorted(self._current().items())]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(_Metric):
+    """Monotonically increasing total."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Value that goes up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, plus their sum and count."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS,
+                 registry: Optional["Registry"] = None):
+        super().__init__(name, help, labels, registry)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0}
+            state["counts"][bisect.bisect_left(self.buckets, value)] += 1
+            state["sum"] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the `with` block, also when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> list[str]:
+        lines = []
+        with self._lock:
+            states = {key: {"counts": list(s["counts"]), "sum": s["sum"]} for key, s in self._values.items()}
+        for key, state in sorted(states.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, state["counts"]):
+                cumulative += count
+                le = _labels(self.labelnames, key, f'le="{_number(float(bound))}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(state['sum'])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+def write_textfile(path: str = METRICS_FILE) -> None:
+    """Write the registry atomically, so a collector never reads half a file."""
+    body = render()
+    atomic_write(path, lambda f: f.write(body))
+
+
+_exporter: Optional[threading.Thread] = None
+_exporter_stop = threading.Event()
+
+
+def start_file_exporter(path: str = METRICS_FILE, interval: float = EXPORT_INTERVAL) -> threading.Thread:
+    """
+    Rewrite `path` every `interval` seconds on a daemon thread (once per process).
+
+    At interpreter exit the thread is stopped and the file written one last
+    time, so it is never left half-written and holds the final values.
+    """
+    global _exporter
+    if _exporter is not None:
+        return _exporter
+
+    def export():
+        try:
+            write_textfile(path)
+        except OSError as e:
+            logger.warning(f"Could not write metrics to {path}: {e}")
+
+    def loop():
+        while not _exporter_stop.is_set():
+            export()
+            _exporter_stop.wait(interval)
+
+    def stop():
+        _exporter_stop.set()
+        _exporter.join(timeout=5)
+        export()
+
+    _exporter = threading.Thread(target=loop, name="metrics-exporter", daemon=True)
+    _exporter.start()
+    atexit.register(stop)
+    logger.info(f"Exporting metrics to {path} every {interval:.0f}s")
+    return _exporter
+
+
+# -------------------------
+# Scraper metrics
+# -------------------------
+STAGE_DURATION = Histogram("scrape_stage_duration_seconds", "Duration of scrape pipeline stages.",
+                           ["stage"], buckets=DURATION_BUCKETS)
+STAGE_LAST_SUCCESS = Gauge("scrape_stage_last_success_timestamp_seconds",
+                           "Unix time the stage last finished without raising.", ["stage"])
+INSTITUTION_SCRAPE_DURATION = Histogram("institution_scrape_duration_seconds",
+                                        "Duration of programme scrapes per institution.", ["institution"],
+                                        buckets=DURATION_BUCKETS)
+INSTITUTION_SCRAPE_FAILURES = Counter("institution_scrape_failures_total",
+                                      "Programme scrapes that failed or timed out, per institution.", ["institution"])
+FETCH_DURATION = Histogram("http_fetch_duration_seconds", "Latency of scraper HTTP fetches.", ["client"])
+INSTITUTION_FETCH_DURATION = Histogram("institution_homepage_fetch_duration_seconds",
+                                       "Time to find and fetch an institution's homepage, candidates included.",
+                                       ["institution"], buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120))
+FETCH_BYTES = Counter("http_downloaded_bytes_total",
+                      "Response body bytes read by the scrapers (httpx: as transferred; requests: decoded).", ["client"])
+HTTP_CACHE_REQUESTS = Counter("http_cache_requests_total", "Conditional HTTP cache lookups by result.", ["result"])
+HTTP_CACHE_HIT_RATIO = Gauge("http_cache_hit_ratio", "Share of cacheable scraper fetches answered by a 304.")
+JOBS = Counter("jobs_total", "Scheduler jobs finished, by name and final status.", ["job", "status"])
+JOB_DURATION = Histogram("job_duration_seconds", "Duration of scheduler jobs.", ["job"], buckets=DURATION_BUCKETS)
+BROWSER_LAUNCHES = Counter("browser_launches_total", "Headless Chrome sessions launched.")
+BROWSER_ACTIVE = Gauge("browser_sessions_active", "Headless Chrome sessions currently open.")
+BROWSER_WARM_REUSES = Counter("browser_warm_reuses_total", "Page loads skipped because a warm session had the page.")
+BROWSER_LAUNCH_DURATION = Histogram("browser_launch_duration_seconds", "Time to launch headless Chrome.",
+                                    buckets=(0.25, 0.5, 1, 2, 5, 10, 30))
+BROWSER_PAGE_READY = Histogram("browser_page_ready_seconds", "Time from navigation to the awaited element.",
+                               buckets=(0.25, 0.5, 1, 2, 5, 10, 15, 30))
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Time a pipeline stage, and record when it last succeeded."""
+    with STAGE_DURATION.time(stage=stage):
+        yield
+    STAGE_LAST_SUCCESS.set(time.time(), stage=stage)
@@ -0,0 +1,142 @@
+# utils/programme_grouping.py
+"""
+Candidate-blocked fuzzy grouping of programme keys.
+
+Gives exactly the same result as the original loop in
+utils.cleaner.group_similar_programmes: each key is assigned the *first*
+previously seen key (in insertion order) whose
+`SequenceMatcher(None, key, existing).ratio()` reaches the threshold,
+otherwise it becomes a new group key.
+
+Instead of scoring every key against every earlier key, candidates come
+from a character bigram inverted index, bucketed by key length:
+
+- Length filter: ratio <= 2 * min(la, lb) / (la + lb), so only lengths in
+  a window around len(key) can reach the threshold.
+- Count filter: ratio >= t means the two keys are at most
+  D = (la + lb) * (1 - t) insertions/deletions apart, and each indel
+  destroys at most Q bigrams, so they share at least
+  la - Q + 1 - Q * D bigrams (counted with multiplicity).
+
+Both filters are necessary conditions, so no qualifying pair is skipped;
+only the surviving candidates are scored exactly, in insertion order.
+Short keys, where the count bound is vacuous, fall back to scanning their
+length window. Results are memoised per distinct key, which is exact: a
+key's first match can never change once computed, because later keys are
+always inserted after it.
+"""
+import math
+from array import array
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Iterable, Optional
+
+Q = 2
+_EPS = 1e-9
+
+
+def _grams(key: str) -> Counter:
+    return Counter(key[i:i + Q] for i in range(len(key) - Q + 1))
+
+
+class ProgrammeKeyGrouper:
+    """Assigns group keys incrementally; see the module docstring for the matching rule."""
+
+    def __init__(self, threshold: float = 0.85, known_keys: Iterable[str] = ()):
+        self.threshold = threshold
+        self.keys: list[str] = []
+        self._ids: dict[str, int] = {}
+        self._by_length: dict[int, array] = {}
+        self._postings: dict[tuple[str, int], array] = {}
+        self._matchers: list[SequenceMatcher] = []
+        self._assigned: dict[str, str] = {}
+        self.scored = 0
+
+        for key in known_keys:
+            self._insert(key)
+
+    def _insert(self, key: str) -> None:
+        if key in self._ids:
+            return
+        key_id = len(self.keys)
+        self.keys.append(key)
+        self._ids[key] = key_id
+        # The existing key is always `b`; analysing it once saves rebuilding b2j per comparison
+        matcher = SequenceMatcher(None, "", key)
+        self._matchers.append(matcher)
+        length = len(key)
+        self._by_length.setdefault(length, array("l")).append(key_id)
+        for gram, count in _grams(key).items():
+            postings = self._postings.setdefault((gram, length), array("l"))
+            for _ in range(count):
+                postings.append(key_id)
+
+    def _length_window(self, la: int) -> Iterable[int]:
+        t = self.threshold
+        if t <= 0:
+            return list(self._by_length)
+        if t > 1:
+            return []
+        lo = math.floor(la * t / (2 - t) - _EPS)
+        hi = math.ceil(la * (2 - t) / t + _EPS)
+        return [lb for lb in range(max(lo, 0), hi + 1) if lb in self._by_length]
+
+    def _candidates(self, key: str) -> list[int]:
+        la = len(key)
+        t = self.threshold
+        query = _grams(key)
+        candidates: set[int] = set()
+
+        for lb in self._length_window(la):
+            max_indels = math.floor((la + lb) * (1 - t) + _EPS)
+            need = la - Q + 1 - Q * max_indels
+            if need <= 0:
+                # Count bound is vacuous for this length; every key is a candidate
+                candidates.update(self._by_length[lb])
+                continue
+
+            shared: dict[int, int] = {}
+            for gram, q_count in query.items():
+                postings = self._postings.get((gram, lb))
+                if postings is None:
+                    continue
+                seen: dict[int, int] = {}
+                for key_id in postings:
+                    c = seen[key_id] = seen.get(key_id, 0) + 1
+                    if c <= q_count:
+                        shared[key_id] = shared.get(key_id, 0) + 1
+            candidates.update(key_id for key_id, n in shared.items() if n >= need)
+
+        return sorted(candidates)
+
+    def _first_match(self, key: str) -> Optional[str]:
+        for key_id in self._candidates(key):
+            matcher = self._matchers[key_id]
+            matcher.set_seq1(key)
+            # quick_ratio() is a cheap upper bound on ratio()
+            if matcher.quick_ratio() < self.threshold:
+                continue
+            self.scored += 1
+            if matcher.ratio() >= self.threshold:
+                return self.keys[key_id]
+        return None
+
+    def assign(self, key: str) -> str:
+        """Return the group key for `key`, registering it as a new group if nothing matches."""
+        found = self._assigned.get(key)
+        if found is not None:
+            return found
+
+        # An empty match is falsy in the original loop and counts as no match
+        found = self._first_match(key) or None
+        if found is None:
+            self._insert(key)
+            found = key
+        self._assigned[key] = found
+        return found
+
+
+def group_keys(keys: Iterable[str], threshold: float = 0.85, known_keys: Iterable[str] = ()) -> list[str]:
+    """Group a sequence of programme keys; returns one group key per input key."""
+    grouper = ProgrammeKeyGrouper(threshold, known_keys)
+    return [grouper.assign(key) for key in keys]
@@ -1,87 +1,208 @@
+
 import os
+import json
 import time
+import argparse
 import schedule
 import threading
-import datetime
+from typing import Optional
 from utils.logger import setup_logger
+from utils.jobs import JobRunner, PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL
+from utils.leader import LeaderElection
+from utils.metrics import start_file_exporter
 
 # Setup logger
 logger = setup_logger("scheduler")
 
-# Path to the scraper manager
-SCRAPER_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "scrapers", "scraper_manager.py")
+# Optional per-job schedules (see load_schedules); without the file only the
+# full pipeline runs, at the interval passed to run_scheduler.
+SCHEDULES_FILE = os.getenv(
+    "SCRAPE_SCHEDULES_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "schedules.json"),
+)
+
+# Longest the loop sleeps at once (re-checks after clock jumps or suspend)
+MAX_IDLE = 300
+
+# Shared runner: scheduled and ad-hoc jobs go through the same queue and worker pool
+runner = JobRunner()
+
+
+# -------------------------
+# Jobs
+# -------------------------
+def run_pipeline():
+    """Run the whole pipeline in incremental mode, in this process."""
+    from scrapers.scraper_manager import main
+    main(incremental=True)
+
+
+def run_stage(stage: str):
+    from scrapers.scraper_manager import run_stage
+    return run_stage(stage)
+
+
+def refresh_institution(name: str):
+    from scrapers.scraper_manager import refresh_institution
+    return refresh_institution(name)
 
 
 def run_scraper():
     """
-    Executes scraper_manager.py as a subprocess.
+    Queues the incremental pipeline on the in-process job runner,
+    so scheduled runs only redo institutions that changed or went stale.
     """
-    import subprocess
-    start_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    logger.info(f"🕒 Scraper job started at {start_time}")
+    return runner.submit("pipeline", run_pipeline, priority=PRIORITY_LOW)
 
+
+def submit(job: str, name: Optional[str] = None, priority: Optional[int] = None):
+    """
+    Queue a job by type: "pipeline", "stage" (name = sources, tvet_details or
+    programmes) or "institution" (name = institution name). Returns the Job.
+    """
+    if job in ("stage", "institution") and not name:
+        raise ValueError(f"A {job} job needs a name")
+    if job == "pipeline":
+        return runner.submit("pipeline", run_pipeline, priority=PRIORITY_LOW if priority is None else priority)
+    if job == "stage":
+        return runner.submit(f"stage:{name}", run_stage, name,
+                             priority=PRIORITY_NORMAL if priority is None else priority)
+    if job == "institution":
+        # Single institutions are small and usually the "hot" sources, so they jump the queue
+        return runner.submit(f"institution:{name}", refresh_institution, name,
+                             priority=PRIORITY_HIGH if priority is None else priority)
+    raise ValueError(f"Unknown job type '{job}'")
+
+
+# -------------------------
+# Schedules
+# -------------------------
+def load_schedules(path: str = SCHEDULES_FILE) -> list[dict]:
+    """
+    Per-job schedules from a JSON list, e.g.
+
+        [
+            {"job": "pipeline", "every": "daily", "at": "02:00"},
+            {"job": "institution", "name": "Durban University of Technology", "every": "hourly"},
+            {"job": "stage", "name": "tvet_details", "every": "weekly", "at": "03:00"}
+        ]
+
+    "every" is hourly, daily or weekly ("at" is ignored for hourly). A
+    missing file gives an empty list.
+    """
+    if not os.path.exists(path):
+        return []
     try:
-        result = subprocess.run(
-            ["python", SCRAPER_PATH],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        logger.info(f"✅ Scraper completed successfully:\n{result.stdout}")
-    except subprocess.CalledProcessError as e:
-        logger.error(f"❌ Scraper failed:\n{e.stderr}")
-    except Exception as e:
-        logger.error(f"⚠️ Unexpected error running scraper: {e}")
-
-    end_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    logger.info(f"✅ Job finished at {end_time}\n")
-
-
-def schedule_job(interval: str = "daily", time_str: str = "02:00"):
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.error(f"Ignoring unreadable schedule file {path}: {e}")
+        return []
+    return [entry for entry in entries if isinstance(entry, dict) and entry.get("job")]
+
+
+def schedule_job(scheduler: schedule.Scheduler, entry: dict) -> None:
     """
-    Schedule the scraper based on a given interval.
-    
+    Schedule one job entry (see load_schedules) on `scheduler`.
+
     Args:
-        interval (str): "hourly", "daily", "weekly"
-        time_str (str): Time in 24-hour format (for daily/weekly jobs)
+        entry (dict): {"job", "name", "every": "hourly" | "daily" | "weekly", "at": "HH:MM"}
     """
+    interval = entry.get("every", "daily")
+    time_str = entry.get("at", "02:00")
+    label = entry["job"] + (f" '{entry['name']}'" if entry.get("name") else "")
+    task = (submit, entry["job"], entry.get("name"), entry.get("priority"))
+
     if interval == "hourly":
-        schedule.every().hour.do(run_scraper)
-        logger.info("Scheduled scraper to run hourly.")
+        scheduler.every().hour.do(*task)
+        logger.info(f"Scheduled {label} to run hourly.")
     elif interval == "daily":
-        schedule.every().day.at(time_str).do(run_scraper)
-        logger.info(f"Scheduled scraper to run daily at {time_str}.")
+        scheduler.every().day.at(time_str).do(*task)
+        logger.info(f"Scheduled {label} to run daily at {time_str}.")
     elif interval == "weekly":
-        schedule.every().monday.at(time_str).do(run_scraper)
-        logger.info(f"Scheduled scraper to run weekly at {time_str}.")
+        scheduler.every().monday.at(time_str).do(*task)
+        logger.info(f"Scheduled {label} to run weekly at {time_str}.")
     else:
-        logger.warning(f"Unknown interval '{interval}', defaulting to daily.")
-        schedule.every().day.at("02:00").do(run_scraper)
+        logger.warning(f"Unknown interval '{interval}' for {label}, defaulting to daily.")
+        scheduler.every().day.at("02:00").do(*task)
 
 
-def run_scheduler(interval: str = "daily", time_str: str = "02:00"):
+def run_scheduler(interval: str = "daily", time_str: str = "02:00", schedules: Optional[list[dict]] = None,
+                  stop: Optional[threading.Event] = None):
     """
-    Launches the scheduler loop in a background thread.
+    Launches the scheduler loop in a background thread; returns its schedule.Scheduler.
+
+    `schedules` (default: load_schedules()) adds per-stage and per-institution
+    jobs. The pipeline runs at interval/time_str unless an entry schedules it.
+    The loop sleeps until the next job is due instead of polling, and due jobs
+    are handed to the job runner, so a long scrape never delays other schedules.
+    Setting `stop` ends the loop (jobs already queued still run).
+    Metrics of this process are written to utils.metrics.METRICS_FILE every
+    few seconds, for a textfile collector to pick up.
     """
-    schedule_job(interval, time_str)
+    stop = stop or threading.Event()
+    entries = load_schedules() if schedules is None else list(schedules)
+    if not any(entry["job"] == "pipeline" for entry in entries):
+        entries.insert(0, {"job": "pipeline", "every": interval, "at": time_str})
+
+    scheduler = schedule.Scheduler()
+    for entry in entries:
+        schedule_job(scheduler, entry)
     logger.info("⏳ Scheduler started. Waiting for next run...")
+    start_file_exporter()
 
     def loop():
-        while True:
-            schedule.run_pending()
-            time.sleep(30)
+        while not stop.is_set():
+            scheduler.run_pending()
+            idle = scheduler.idle_seconds
+            stop.wait(min(max(idle, 1), MAX_IDLE) if idle is not None else MAX_IDLE)
+        logger.info("Scheduler loop stopped.")
 
     # Run in background so it doesn’t block main app
-    thread = threading.Thread(target=loop, daemon=True)
+    thread = threading.Thread(target=loop, name="scheduler", daemon=True)
     thread.start()
+    return scheduler
+
+
+def run_scheduler_when_leader(interval: str = "daily", time_str: str = "02:00") -> LeaderElection:
+    """
+    Run the scheduler only while this process holds the "scheduler" lease (utils/leader.py).
+
+    Call it from every API worker: exactly one of them schedules jobs, and if
+    it dies another takes over within about one lease TTL. Returns the
+    election, whose release() hands the lease over on shutdown.
+    """
+    state = {}
+
+    def elected():
+        state["stop"] = threading.Event()
+        run_scheduler(interval, time_str, stop=state["stop"])
+
+    def demoted():
+        if "stop" in state:
+            state.pop("stop").set()
+
+    return LeaderElection("scheduler", on_elected=elected, on_demoted=demoted).start()
 
 
 if __name__ == "__main__":
-    # Example usage
-    run_scheduler(interval="daily", time_str="01:00")
+    parser = argparse.ArgumentParser(description="Run the scrape scheduler, or one job right away.")
+    parser.add_argument("--run", metavar="JOB",
+                        help="Run one job and exit: pipeline, stage:<name> or institution:<name>")
+    args = parser.parse_args()
+
+    if args.run:
+        job_type, _, job_name = args.run.partition(":")
+        job = submit(job_type, job_name or None)
+        job.wait()
+        print(json.dumps(job.to_dict(), indent=4))
+        raise SystemExit(0 if job.status == "succeeded" else 1)
+
+    election = run_scheduler_when_leader(interval="daily", time_str="01:00")
 
     try:
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
+        election.release()
         logger.info("🛑 Scheduler stopped manually.")
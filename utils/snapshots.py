@@ -0,0 +1,315 @@
+# utils/snapshots.py
+"""
+Atomic writes and versioned, double-buffered dataset publishing.
+
+Writers never modify a data file in place. They write a temporary file in
+the same directory and os.replace() it over the target, so a reader opens
+either the old file or the new one, never a partial one.
+
+At the end of a scrape the manager publishes the finished files as a
+snapshot:
+
+    data/snapshots/<version>/sources.json, programmes_clean.csv, ..., manifest.json
+    data/snapshots/CURRENT        <- name of the live version
+
+The files are copied into a staging directory and validated. Only then is
+the directory renamed into place and CURRENT swapped (itself an atomic
+replace). The last KEEP_SNAPSHOTS versions are kept, so rollback is just
+pointing CURRENT back.
+
+Readers call resolve(path) with a flat data path (e.g. data/sources.json).
+They get that file inside the current snapshot, or the flat path itself
+when nothing has been published yet.
+
+Usage (from the project root):
+    python -m utils.snapshots --list
+    python -m utils.snapshots --rollback [VERSION]
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Callable, Optional
+
+from utils.logger import setup_logger
+
+logger = setup_logger("snapshots")
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+SNAPSHOTS_DIRNAME = "snapshots"
+POINTER_NAME = "CURRENT"
+MANIFEST_NAME = "manifest.json"
+KEEP_SNAPSHOTS = 5
+
+# A new snapshot may not shrink a dataset below this share of the live one
+# (a half-failed scrape should not replace a good catalogue)
+MIN_RETAINED_RATIO = 0.5
+
+
+class SnapshotError(Exception):
+    """A snapshot failed validation or cannot be published."""
+
+
+# -------------------------
+# Atomic writes
+# -------------------------
+def atomic_write(path: str, write: Callable, mode: str = "w", **open_kwargs) -> None:
+    """Call write(f) on a temporary file next to `path`, then replace `path` with it."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+    if "b" not in mode:
+        open_kwargs.setdefault("encoding", "utf-8")
+    try:
+        with open(tmp_path, mode, **open_kwargs) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_json(path: str, data, indent: int = 4) -> None:
+    atomic_write(path, lambda f: json.dump(data, f, indent=indent, ensure_ascii=False))
+
+
+def atomic_write_csv(df, path: str) -> None:
+    """DataFrame.to_csv through a temporary file."""
+    atomic_write(path, lambda f: df.to_csv(f, index=False), newline="")
+
+
+# -------------------------
+# Snapshot layout
+# -------------------------
+def snapshots_dir(data_dir: str = DATA_DIR) -> str:
+    return os.path.join(data_dir, SNAPSHOTS_DIRNAME)
+
+
+def current_version(data_dir: str = DATA_DIR) -> Optional[str]:
+    try:
+        with open(os.path.join(snapshots_dir(data_dir), POINTER_NAME), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def list_versions(data_dir: str = DATA_DIR) -> list[str]:
+    """Published versions, oldest first (names sort chronologically)."""
+    root = snapshots_dir(data_dir)
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        name for name in os.listdir(root)
+        if not name.startswith(".") and os.path.isfile(os.path.join(root, name, MANIFEST_NAME))
+    )
+
+
+_pointer_cache: dict[str, tuple[tuple[int, int], Optional[str]]] = {}
+
+
+def _cached_version(data_dir: str) -> Optional[str]:
+    """current_version, re-read only when the pointer file's stat changes (called per request)."""
+    pointer = os.path.join(snapshots_dir(data_dir), POINTER_NAME)
+    try:
+        st = os.stat(pointer)
+    except FileNotFoundError:
+        return None
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _pointer_cache.get(pointer)
+    if cached is None or cached[0] != key:
+        cached = (key, current_version(data_dir))
+        _pointer_cache[pointer] = cached
+    return cached[1]
+
+
+def resolve(path: str) -> str:
+    """The current snapshot's copy of a flat data file, or `path` itself if there is none."""
+    data_dir, name = os.path.split(path)
+    version = _cached_version(data_dir)
+    if version:
+        candidate = os.path.join(snapshots_dir(data_dir), version, name)
+        if os.path.exists(candidate):
+            return candidate
+    return path
+
+
+# -------------------------
+# Validation
+# -------------------------
+def _file_digest(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(1 << 20):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _count_rows(path: str) -> int:
+    """Records in a published file (JSON list length, CSV data rows, columnar num_rows)."""
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, list) or not all(isinstance(item, dict) for item in data):
+            raise SnapshotError(f"{os.path.basename(path)} is not a list of records")
+        if os.path.basename(path) == "sources.json" and not all(item.get("name") for item in data):
+            raise SnapshotError("sources.json has institutions without a name")
+        return len(data)
+    if path.endswith(".csv"):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if not header:
+                raise SnapshotError(f"{os.path.basename(path)} has no header")
+            return sum(1 for _ in reader)
+    if path.endswith((".parquet", ".feather")):
+        from utils.columnar import read_table
+        return read_table(path, columns=[]).num_rows
+    return 0
+
+
+def validate(directory: str, previous: Optional[dict] = None) -> dict:
+    """
+    Check every file in a staged snapshot and return its manifest entries.
+
+    Raises SnapshotError on unreadable or empty files, CSV and columnar copies
+    that disagree, or datasets shrinking below MIN_RETAINED_RATIO of the
+    previous manifest.
+    """
+    files = {}
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name == MANIFEST_NAME or not os.path.isfile(path):
+            continue
+        try:
+            rows = _count_rows(path)
+        except SnapshotError:
+            raise
+        except Exception as e:
+            raise SnapshotError(f"{name} is unreadable: {e}") from e
+        files[name] = {"sha256": _file_digest(path), "bytes": os.path.getsize(path), "rows": rows}
+    _check_rows(files, previous)
+    return files
+
+
+def _check_rows(files: dict, previous: Optional[dict]) -> None:
+    """Row-count checks across the files of a snapshot and against the previous manifest."""
+    if "sources.json" in files and files["sources.json"]["rows"] == 0:
+        raise SnapshotError("sources.json is empty")
+
+    csv_rows = {name[: -len(".csv")]: meta["rows"] for name, meta in files.items() if name.endswith(".csv")}
+    for name, meta in files.items():
+        stem, ext = os.path.splitext(name)
+        if ext in (".parquet", ".feather") and stem in csv_rows and meta["rows"] != csv_rows[stem]:
+            raise SnapshotError(f"{name} has {meta['rows']} rows but {stem}.csv has {csv_rows[stem]}")
+
+    for name, meta in (previous or {}).get("files", {}).items():
+        if name in files and files[name]["rows"] < meta["rows"] * MIN_RETAINED_RATIO:
+            raise SnapshotError(f"{name} shrank from {meta['rows']} to {files[name]['rows']} rows")
+
+
+# -------------------------
+# Publish / rollback
+# -------------------------
+def read_manifest(version: str, data_dir: str = DATA_DIR) -> Optional[dict]:
+    try:
+        with open(os.path.join(snapshots_dir(data_dir), version, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _set_current(version: str, data_dir: str) -> None:
+    atomic_write(os.path.join(snapshots_dir(data_dir), POINTER_NAME), lambda f: f.write(version + "\n"))
+
+
+def publish(paths: list[str], data_dir: str = DATA_DIR, keep: int = KEEP_SNAPSHOTS, force: bool = False) -> str:
+    """
+    Copy `paths` into a new snapshot, validate it and make it current; returns the version.
+
+    Missing and empty paths are skipped. With `force`, the shrink check against the
+    live snapshot is skipped. On failure nothing visible changes and the
+    staging directory is removed.
+    """
+    root = snapshots_dir(data_dir)
+    os.makedirs(root, exist_ok=True)
+    now = time.time()
+    version = time.strftime("%Y%m%dT%H%M%S", time.gmtime(now)) + f"{int(now * 1e6) % 1_000_000:06d}Z"
+    staging = os.path.join(root, f".staging-{version}")
+
+    try:
+        os.makedirs(staging)
+        for path in paths:
+            if os.path.exists(path) and os.path.getsize(path) > 0:
+                shutil.copy2(path, os.path.join(staging, os.path.basename(path)))
+
+        live = current_version(data_dir)
+        previous = None if force or live is None else read_manifest(live, data_dir)
+        files = validate(staging, previous)
+        if not files:
+            raise SnapshotError("nothing to publish")
+        atomic_write_json(
+            os.path.join(staging, MANIFEST_NAME),
+            {"version": version, "created_at": time.time(), "previous": live, "files": files},
+        )
+        os.rename(staging, os.path.join(root, version))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    _set_current(version, data_dir)
+    counts = ", ".join(f"{name}: {meta['rows']}" for name, meta in files.items())
+    logger.info(f"Published snapshot {version} ({counts})")
+    prune(data_dir, keep)
+    return version
+
+
+def prune(data_dir: str = DATA_DIR, keep: int = KEEP_SNAPSHOTS) -> list[str]:
+    """Delete all but the newest `keep` snapshots; the current one is always kept."""
+    current = current_version(data_dir)
+    versions = list_versions(data_dir)
+    doomed = [v for v in versions[: max(0, len(versions) - keep)] if v != current]
+    for version in doomed:
+        shutil.rmtree(os.path.join(snapshots_dir(data_dir), version), ignore_errors=True)
+    return doomed
+
+
+def rollback(version: Optional[str] = None, data_dir: str = DATA_DIR) -> str:
+    """Point CURRENT at `version`, or at the one before the current; returns the new version."""
+    versions = list_versions(data_dir)
+    if version is None:
+        current = current_version(data_dir)
+        older = [v for v in versions if current is None or v < current]
+        if not older:
+            raise SnapshotError("no earlier snapshot to roll back to")
+        version = older[-1]
+    elif version not in versions:
+        raise SnapshotError(f"unknown snapshot {version}")
+    _set_current(version, data_dir)
+    logger.info(f"Rolled back to snapshot {version}")
+    return version
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or roll back published dataset snapshots.")
+    parser.add_argument("--list", action="store_true", help="List snapshots (* marks the current one)")
+    parser.add_argument("--rollback", nargs="?", const="", metavar="VERSION",
+                        help="Make VERSION current (default: the previous snapshot)")
+    args = parser.parse_args()
+
+    if args.rollback is not None:
+        rollback(args.rollback or None)
+    current = current_version()
+    for version in list_versions():
+        manifest = read_manifest(version) or {}
+        rows = ", ".join(f"{name}: {meta['rows']}" for name, meta in manifest.get("files", {}).items())
+        print(f"{'*' if version == current else ' '} {version}  {rows}")
+
+
+if __name__ == "__main__":
+    main()